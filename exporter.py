@@ -1,12 +1,25 @@
 import csv
 import datetime
 import calendar
+import itertools
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle
 
 WEEKDAYS = ["Lun", "Mar", "Mer", "Gio", "Ven", "Sab", "Dom"]
 MONTHS = [0, "Gennaio", "Febbraio", "Marzo", "Aprile", "Maggio", "Giugno", "Luglio", "Agosto",
           "Settembre", "Ottobre", "Novembre", "Dicembre"]
+# Orari dei turni nei calendari iCalendar, se non indicati in config.json -> shift_settings -> shift_times:
+# {"turno": ["hh:mm", "hh:mm"]}. Un orario di fine non successivo a quello di inizio termina il giorno dopo
+DEFAULT_SHIFT_TIMES = {
+    "mattina": ["07:00", "14:00"],
+    "mattina_rep": ["07:00", "14:00"],
+    "pomeriggio": ["14:00", "21:00"],
+    "weekend_rep": ["08:00", "20:00"]
+}
 
 
 class Exporter:
@@ -27,134 +40,452 @@ class Exporter:
 
         self.SHIFT_CORRISPONDANCE = self.config["shift_settings"]["shift_representation"]
 
-        # Preparazione di un data grid leggibile
-        self.data_grid = self._prepare_data_grid()
-
-    def _prepare_data_grid(self):
-        """Converts the raw schedule data into a simple list of lists (a grid) that can be easily written
-        to any file format."""
-
-        grid = []
-        num_days = calendar.monthrange(self.year, self.month)[1]
-
-        # Creazione Header Row
+        self.num_days = calendar.monthrange(self.year, self.month)[1]
+        self.first_date = datetime.date(self.year, self.month, 1)
+        self.last_date = datetime.date(self.year, self.month, self.num_days)
+        # Turni del mese in forma compatta, costruiti al primo export (_shift_codes)
+        self._cached_shift_codes = None
+
+    @property
+    def data_grid(self):
+        """Griglia completa (lista di liste), costruita a ogni accesso.
+        Gli export non la usano: scrivono le righe di iter_rows() una alla volta."""
+        return self._prepare_data_grid()
+
+    def _build_shift_codes(self):
+        """Turni del mese in forma compatta, costruiti con una sola passata su schedule_data.
+        Restituisce (colonne, testi): una colonna per giorno del mese, cioè un bytearray con un byte per impiegato
+        esportato (nella posizione di employee_list), e la lista dei testi dei turni a cui rimandano i byte
+        (0 = nessun turno). Un impiegato in mattina_rep viene mostrato come tale; negli altri casi vale il primo
+        turno della giornata. La memoria è di un byte per impiegato e giorno."""
+        n_of_employees = len(self.employee_list)
+        columns = [bytearray(n_of_employees) for _ in range(self.num_days)]
+        texts = [""]
+        if not self.schedule_data:
+            return columns, texts
+
+        # Compare by employee ID instead of object identity (temp list has deep copies)
+        positions = {emp.id: position for position, emp in enumerate(self.employee_list)}
+        text_codes = {}
+        for current_date, daily_shifts in self.schedule_data.items():
+            if (current_date.year, current_date.month) != (self.year, self.month):
+                continue
+            column = columns[current_date.day - 1]
+            for shift_type, emp_assigned_to_shift in daily_shifts.items():
+                shift_text = self.SHIFT_CORRISPONDANCE.get(shift_type, "?")
+                code = text_codes.get(shift_text)
+                if code is None:
+                    code = text_codes[shift_text] = len(texts)
+                    texts.append(shift_text)
+                for emp in emp_assigned_to_shift:
+                    position = positions.get(emp.id)
+                    if position is not None and (shift_type == "mattina_rep" or not column[position]):
+                        column[position] = code
+        return columns, texts
+
+    def _shift_codes(self):
+        """(colonne, testi) di _build_shift_codes, costruiti al primo export e poi riusati."""
+        if self._cached_shift_codes is None:
+            self._cached_shift_codes = self._build_shift_codes()
+        return self._cached_shift_codes
+
+    def _days_off_in_month(self, employee):
+        """Giorni del mese (numeri) in cui l'impiegato è in ferie."""
+        return {d.day for d in employee.days_off.between(self.first_date, self.last_date)}
+
+    def header_row(self):
+        """Riga di intestazione: anagrafica e un giorno del mese per colonna."""
         headers = ["Matricola", "Cognome", "Nome"]
-        for day in range(1, num_days + 1):
+        for day in range(1, self.num_days + 1):
             day_name = WEEKDAYS[datetime.date(self.year, self.month, day).weekday()]
             headers.append(f"{day_name} {day}")
-        grid.append(headers)
+        return headers
 
-        # Creazione Data Rows
-        for employee in self.employee_list:
-            row_values = [employee.serial_number, employee.surname, employee.name]
-            for day in range(1, num_days + 1):
-                current_date = datetime.date(self.year, self.month, day)
-                shift_text = ""
-
-                if current_date in employee.days_off:
-                    shift_text = self.SHIFT_CORRISPONDANCE["off_duty"]
-                elif self.schedule_data and current_date in self.schedule_data:
-                    daily_shifts = self.schedule_data[current_date]
-                    # Compare by employee ID instead of object identity (temp list has deep copies)
-                    employee_ids_in_mattina_rep = [emp.id for emp in daily_shifts["mattina_rep"]]
-                    if employee.id in employee_ids_in_mattina_rep:
-                            shift_text = self.SHIFT_CORRISPONDANCE["mattina_rep"]
-                    else:
-                        for shift_type, emp_assigned_to_shift in daily_shifts.items():
-                            # Compare by ID instead of object identity
-                            employee_ids_in_shift = [emp.id for emp in emp_assigned_to_shift]
-                            if employee.id in employee_ids_in_shift:
-                                shift_text = self.SHIFT_CORRISPONDANCE.get(shift_type, "?")
-                                break
-
-                row_values.append(shift_text)
-            grid.append(row_values)
-        return grid
+    def iter_rows(self):
+        """Generatore delle righe della griglia: prima l'intestazione, poi una riga per impiegato.
+        Ogni riga viene costruita solo quando richiesta, quindi chi la scrive subito su file usa memoria costante
+        rispetto al numero di impiegati. Le celle vengono lette dai codici dei turni (_build_shift_codes) e dalle
+        ferie del mese di ogni impiegato, senza scorrere le liste dei turni per ogni impiegato e giorno."""
+        yield self.header_row()
 
-    def export_to_txt(self, filepath):
-        """Exports the data grid to a formatted TXT file."""
-        if not self.data_grid:
-            return None
+        columns, texts = self._shift_codes()
+        off_duty_text = self.SHIFT_CORRISPONDANCE["off_duty"]
 
-        # Calculate columns width
-        num_of_columns = len(self.data_grid[0])
-        columns_width = [0] * num_of_columns
-
-        for row in self.data_grid:
-            for i, cell in enumerate(row):
-                cell_width = max(len(line) for line in cell.split("\n"))
-                if cell_width > columns_width[i]:
-                    columns_width[i] = cell_width
-
-        # +++ LINES BUILDING +++
-        lines = []
-
-        # Header Row
-        header_cells = []
-        for i, header in enumerate(self.data_grid[0]):
-            # Ceneter header text within calculated column width
-            header_cells.append(header.replace("\n", " ").center(columns_width[i] + 2))
-        lines.append(" | ".join(header_cells))
-
-        # Separator Line
-        separator_cells = ["-" * (w + 2) for w in columns_width]
-        lines.append("-+-".join(separator_cells))
-
-        # Data Rows
-        for row in self.data_grid[1:]:
-            data_cells = []
-            for i, cell in enumerate(row):
-                # Center the data text
-                data_cells.append(cell.center(columns_width[i] + 2))
-            lines.append(" | ".join(data_cells))
+        for position, employee in enumerate(self.employee_list):
+            row_values = [employee.serial_number, employee.surname, employee.name]
+            days_off_in_month = self._days_off_in_month(employee)
+            for day, column in enumerate(columns, start=1):
+                if day in days_off_in_month:
+                    row_values.append(off_duty_text)
+                else:
+                    row_values.append(texts[column[position]])
+            yield row_values
+
+    def _prepare_data_grid(self):
+        """Converts the raw schedule data into a simple list of lists (a grid) that can be easily written
+        to any file format."""
+        return list(self.iter_rows())
+
+    @staticmethod
+    def _text_width(cell):
+        """Larghezza di una cella nel TXT: la sua riga più lunga."""
+        return max(len(line) for line in cell.split("\n"))
+
+    def _txt_columns_width(self, header):
+        """Larghezze delle colonne del TXT calcolate senza costruire le righe.
+        Le colonne anagrafiche vengono misurate sulla lista impiegati; quelle dei giorni sui testi che compariranno
+        nella colonna, cioè i codici dei turni degli impiegati che non sono in ferie quel giorno e il
+        testo delle ferie se almeno un impiegato lo è."""
+        columns_width = [self._text_width(cell) for cell in header]
+
+        off_duty_positions_by_day = {}
+        for position, employee in enumerate(self.employee_list):
+            for i, cell in enumerate((employee.serial_number, employee.surname, employee.name)):
+                columns_width[i] = max(columns_width[i], self._text_width(cell))
+            for day in self._days_off_in_month(employee):
+                off_duty_positions_by_day.setdefault(day, []).append(position)
+
+        columns, texts = self._shift_codes()
+        off_duty_text = self.SHIFT_CORRISPONDANCE["off_duty"]
+        for day, column in enumerate(columns, start=1):
+            off_duty_positions = off_duty_positions_by_day.get(day)
+            if off_duty_positions:
+                # Le ferie nascondono il turno: i codici di quegli impiegati non compaiono nella colonna
+                column = bytearray(column)
+                for position in off_duty_positions:
+                    column[position] = 0
+            column_texts = [texts[code] for code in set(column)]
+            if off_duty_positions:
+                column_texts.append(off_duty_text)
+            for text in column_texts:
+                columns_width[2 + day] = max(columns_width[2 + day], self._text_width(text))
+        return columns_width
 
-        # Write content to the file
-        file_content = "\n".join(lines) # Join all prepared lines with a newline character
+    def export_to_txt(self, filepath):
+        """Exports the data grid to a formatted TXT file.
+        Le larghezze delle colonne vengono calcolate prima (_txt_columns_width), poi le righe vengono scritte una
+        alla volta man mano che iter_rows() le produce."""
+        rows = self.iter_rows()
+        header = next(rows)
+        columns_width = self._txt_columns_width(header)
 
         with open(filepath, "w", encoding="utf-8") as f:
-            f.write(file_content)
-            return None
+            # Header Row
+            header_cells = []
+            for i, cell in enumerate(header):
+                # Ceneter header text within calculated column width
+                header_cells.append(cell.replace("\n", " ").center(columns_width[i] + 2))
+            f.write(" | ".join(header_cells))
+
+            # Separator Line
+            separator_cells = ["-" * (w + 2) for w in columns_width]
+            f.write("\n" + "-+-".join(separator_cells))
+
+            # Data Rows
+            for row in rows:
+                # Center the data text
+                data_cells = [cell.center(columns_width[i] + 2) for i, cell in enumerate(row)]
+                f.write("\n" + " | ".join(data_cells))
+        return None
 
     def export_to_csv(self, filepath):
-        """Exports the data grid to a CSV file."""
+        """Exports the data grid to a CSV file, una riga alla volta."""
+        rows = self.iter_rows()
 
         with open(filepath, 'w', newline='', encoding='utf-8') as f:
             writer=csv.writer(f)
 
             # CSV doesn't handle multi-line headers well, so we replace newline with a space.
-            header = [h.replace('\n', ' ') for h in self.data_grid[0]]
+            header = [h.replace('\n', ' ') for h in next(rows)]
             writer.writerow(header)
-            writer.writerows(self.data_grid[1:])
+            for row in rows:
+                writer.writerow(row)
 
     def export_to_xlsx(self, filepath):
-        """exports the data grid to an Excel (.xlsx) file."""
-
-        number_of_rows = len(self.data_grid)
-        wb = Workbook()
-        ws = wb.active
-        ws.title = f"Turni {MONTHS[self.month]} {self.year}"
-
-        for row_data in self.data_grid:
-            ws.append(row_data)
-
-        # Styling
-        header_font = Font(bold=True)
+        """exports the data grid to an Excel (.xlsx) file.
+        Il workbook è in modalità write-only (openpyxl): le righe vengono scritte in streaming sul file, con stili
+        condivisi (named styles) e larghezze delle colonne impostate una sola volta, e il file viene salvato una
+        sola volta. La memoria non dipende dal numero di righe."""
+
+        wb = Workbook(write_only=True)
+        header_style, cell_style = self._xlsx_named_styles(wb)
+        self._write_xlsx_sheet(wb, f"Turni {MONTHS[self.month]} {self.year}", self.iter_rows(),
+                               header_style, cell_style)
+        wb.save(filepath)
+
+    @staticmethod
+    def _xlsx_named_styles(wb):
+        """Registra nel workbook gli stili condivisi da tutte le celle: (intestazione, dati)."""
         center_alignment = Alignment(
             horizontal="center",
             vertical="center",
             wrap_text=True
         )
+        header_style = NamedStyle(name="turni_intestazione", font=Font(bold=True), alignment=center_alignment)
+        cell_style = NamedStyle(name="turni_cella", alignment=center_alignment)
+        wb.add_named_style(header_style)
+        wb.add_named_style(cell_style)
+        return header_style.name, cell_style.name
+
+    @staticmethod
+    def _write_xlsx_sheet(wb, title, rows, header_style, cell_style):
+        """Aggiunge al workbook (write-only) un foglio con le righe date; la prima riga è l'intestazione.
+        rows può essere un qualsiasi iterabile di righe (anche un generatore)."""
+        ws = wb.create_sheet(title=title)
+
+        # Adjust column widths (in modalità write-only vanno impostate prima di scrivere le righe)
+        for column in ("A", "B", "C"):
+            ws.column_dimensions[column].width = 20
+
+        style = header_style  # Make headers bold
+        for row_data in rows:
+            row_cells = []
+            for value in row_data:
+                cell = WriteOnlyCell(ws, value=value)
+                cell.style = style  # Center alignment in all cells
+                row_cells.append(cell)
+            ws.append(row_cells)
+            style = cell_style
+        return ws
+
+
+class PeriodExporter:
+    """Gestisce gli export di più mesi letti dallo storico turni: un foglio per mese (XLSX), un'unica tabella (CSV)
+    o un calendario iCalendar per impiegato (ICS).
+    I mesi vengono letti e preparati in parallelo da un pool di thread; il thread chiamante li scrive nel file
+    nell'ordine dei mesi, ciascuno appena è pronto (i fogli di un workbook openpyxl vanno scritti uno alla volta)."""
+
+    # Colonne dell'export CSV: i mesi hanno un numero di giorni diverso, i giorni mancanti restano vuoti
+    CSV_HEADER = ["Anno", "Mese", "Matricola", "Cognome", "Nome"] + [str(day) for day in range(1, 32)]
 
-        for cell in ws[1]:
-            cell.font = header_font # Make headers bold
+    def __init__(self,
+                 file_loader,
+                 employees_list,
+                 months,
+                 config,
+                 max_workers=None):
+        """months: coppie (anno, mese) da esportare, nell'ordine in cui compariranno nel file.
+        file_loader: gestore dello storico (JsonManager o SqliteManager), letto tramite load_month_shifts.
+        Le ferie degli anni esportati devono essere già caricate negli impiegati."""
+
+        self.file_loader = file_loader
+        self.employee_list = employees_list
+        self.months = list(months)
+        self.config = config
+        self.max_workers = max_workers
+        self.employee_lookup = {emp.id: emp for emp in self.employee_list}
+
+    def _load_month(self, year, month, prepare):
+        """Eseguito nei thread del pool: legge il mese dallo storico e lo passa a prepare(anno, mese, programmazione
+        con i soli IDs). Ritorna il risultato di prepare, o None se il mese non è stato salvato."""
+        schedule_with_only_ids = self.file_loader.load_month_shifts(year, month)
+        if not schedule_with_only_ids:
+            return None
+        return prepare(year, month, schedule_with_only_ids)
+
+    def _iter_loaded_months(self, prepare):
+        """Risultati di prepare per i mesi salvati, nell'ordine di self.months (i mesi assenti dallo storico vengono
+        saltati). I mesi vengono letti e preparati in parallelo dal pool di thread."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._load_month, year, month, prepare) for year, month in self.months]
+            for future in futures:
+                result = future.result()
+                if result is not None:
+                    yield result
+
+    def _month_exporter(self, year, month, schedule_with_only_ids):
+        """Exporter del mese, con i codici dei turni già costruiti."""
+        schedule_data = {
+            datetime.date.fromisoformat(date_str): {
+                shift_type: [self.employee_lookup[emp_id] for emp_id in emp_ids if emp_id in self.employee_lookup]
+                for shift_type, emp_ids in daily_shifts.items()
+            }
+            for date_str, daily_shifts in schedule_with_only_ids.items()
+        }
+        exporter = Exporter(schedule_data, self.employee_list, year, month, self.config)
+        exporter._shift_codes()
+        return exporter
+
+    def _iter_month_exporters(self):
+        """Exporter dei mesi salvati, nell'ordine di self.months."""
+        return self._iter_loaded_months(self._month_exporter)
+
+    def export_to_xlsx(self, filepath):
+        """Esporta un workbook con un foglio per mese, scritto in modalità write-only e salvato una sola volta.
+        Ritorna la lista dei mesi (anno, mese) esportati; se nessun mese è salvato il file non viene creato."""
+        wb = Workbook(write_only=True)
+        header_style, cell_style = Exporter._xlsx_named_styles(wb)
 
-        for row in range(1, number_of_rows + 1):
-            for cell in ws[row]:
-                cell.alignment = center_alignment # Center alignment in all cells
+        exported_months = []
+        for exporter in self._iter_month_exporters():
+            Exporter._write_xlsx_sheet(wb, f"Turni {MONTHS[exporter.month]} {exporter.year}", exporter.iter_rows(),
+                                       header_style, cell_style)
+            exported_months.append((exporter.year, exporter.month))
 
-            # Adjust column widths
-            ws.column_dimensions["A"].width = 20
-            ws.column_dimensions["B"].width = 20
-            ws.column_dimensions["C"].width = 20
+        if exported_months:
+            wb.save(filepath)
+        return exported_months
 
-            wb.save(filepath)
\ No newline at end of file
+    def export_to_csv(self, filepath):
+        """Esporta un unico CSV con una riga per impiegato e mese (colonne CSV_HEADER), scritto una riga alla volta.
+        Ritorna la lista dei mesi (anno, mese) esportati; se nessun mese è salvato il file non viene creato."""
+        exporters = self._iter_month_exporters()
+        first_exporter = next(exporters, None)
+        if first_exporter is None:
+            return []
+
+        exported_months = []
+        with open(filepath, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.CSV_HEADER)
+            for exporter in itertools.chain([first_exporter], exporters):
+                month_columns = [exporter.year, MONTHS[exporter.month]]
+                padding = [""] * (31 - exporter.num_days)
+                rows = exporter.iter_rows()
+                next(rows)  # Intestazione del mese, sostituita da CSV_HEADER
+                for row in rows:
+                    writer.writerow(month_columns + row + padding)
+                exported_months.append((exporter.year, exporter.month))
+        return exported_months
+
+    def _month_employee_shifts(self, year, month, schedule_with_only_ids):
+        """Una sola passata sul mese: {emp_id: {giorno: tipo di turno}} degli impiegati esportati.
+        Come nella griglia, un impiegato in mattina_rep viene mostrato come tale; negli altri casi vale il primo
+        turno della giornata."""
+        employee_shifts = {}
+        for date_str, daily_shifts in schedule_with_only_ids.items():
+            day = datetime.date.fromisoformat(date_str)
+            for shift_type, emp_ids in daily_shifts.items():
+                for emp_id in emp_ids:
+                    if emp_id not in self.employee_lookup:
+                        continue
+                    days = employee_shifts.setdefault(emp_id, {})
+                    if shift_type == "mattina_rep" or day not in days:
+                        days[day] = shift_type
+        return employee_shifts
+
+    def export_to_ics(self, directory):
+        """Esporta nella directory un calendario iCalendar (.ics) per impiegato, con i suoi turni e le sue ferie nel
+        periodo. I turni di tutti gli impiegati vengono raccolti con una sola passata su ogni mese; i file vengono
+        poi scritti in parallelo dal pool di thread.
+        Ritorna la lista dei file scritti (gli impiegati senza turni né ferie nel periodo non hanno un file)."""
+        if not self.months:
+            return []
+
+        shifts_by_employee = {}
+        for month_shifts in self._iter_loaded_months(self._month_employee_shifts):
+            for emp_id, days in month_shifts.items():
+                shifts_by_employee.setdefault(emp_id, {}).update(days)
+
+        (first_year, first_month), (last_year, last_month) = min(self.months), max(self.months)
+        first_date = datetime.date(first_year, first_month, 1)
+        last_date = datetime.date(last_year, last_month, calendar.monthrange(last_year, last_month)[1])
+
+        calendars = []
+        for employee in self.employee_list:
+            shifts = shifts_by_employee.get(employee.id, {})
+            days_off = list(employee.days_off.between(first_date, last_date))
+            if shifts or days_off:
+                calendars.append((employee, shifts, days_off))
+
+        # Parti degli eventi che dipendono solo dal turno, preparate una volta per tutti i calendari
+        shift_times = {**DEFAULT_SHIFT_TIMES, **self.config["shift_settings"].get("shift_times", {})}
+        shift_types = {*self.config["shift_settings"]["shift_representation"], *shift_times}
+        shift_types.update(shift_type for days in shifts_by_employee.values() for shift_type in days.values())
+        event_templates = {shift_type: self._ics_event_template(shift_type, shift_times) for shift_type in shift_types}
+        # Stesso DTSTAMP per tutti gli eventi dell'export
+        dtstamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+        os.makedirs(directory, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(
+                lambda calendar_data: self._write_ics(directory, *calendar_data, event_templates, dtstamp), calendars
+            ))
+
+    def _ics_event_template(self, shift_type, shift_times):
+        """Parti di un evento che dipendono solo dal turno: (inizio, fine, termina il giorno dopo, righe di testo).
+        Inizio e fine sono i suffissi orari di DTSTART/DTEND ("Thhmmss"), None per gli eventi dell'intera giornata
+        (ferie e turni senza orari in shift_times)."""
+        shift_representation = self.config["shift_settings"]["shift_representation"]
+        shift_names = self.config.get("employees_view", {})
+        text_lines = [
+            _ics_fold(f"SUMMARY:{_ics_escape(shift_representation.get(shift_type, shift_type))}"),
+            _ics_fold(f"DESCRIPTION:{_ics_escape(shift_names.get(shift_type, shift_type))}")
+        ]
+
+        if shift_type not in shift_times:
+            return None, None, False, ["TRANSP:TRANSPARENT"] + text_lines
+        start_time, end_time = (datetime.time.fromisoformat(t) for t in shift_times[shift_type])
+        return f"T{start_time:%H%M%S}", f"T{end_time:%H%M%S}", end_time <= start_time, text_lines
+
+    def _write_ics(self, directory, employee, shifts, days_off, event_templates, dtstamp):
+        """Eseguito nei thread del pool: scrive il calendario di un impiegato e ne ritorna il percorso."""
+        # L'id rende il nome univoco anche con matricola e nominativo ripetuti (o uguali dopo la sostituzione dei
+        # caratteri non validi): altrimenti un calendario sovrascriverebbe quello di un altro impiegato
+        file_name = re.sub(r"[^\w-]+", "_",
+                           f"{employee.serial_number}_{employee.surname}_{employee.name}_{employee.id}")
+        filepath = os.path.join(directory, f"{file_name}.ics")
+        lines = self._ics_lines(employee, shifts, days_off, event_templates, dtstamp)
+
+        # RFC 5545: righe terminate da CRLF
+        with open(filepath, "w", newline="", encoding="utf-8") as f:
+            f.write("\r\n".join(lines) + "\r\n")
+        return filepath
+
+    @staticmethod
+    def _ics_lines(employee, shifts, days_off, event_templates, dtstamp):
+        """Righe del calendario iCalendar di un impiegato: un evento per turno (con gli orari di shift_times, o per
+        l'intera giornata se il turno non ha orari) e uno per giorno di ferie. Le ferie nascondono il turno del
+        giorno, come nella griglia. C'è un solo evento per impiegato e giorno, quindi l'UID dipende solo da
+        impiegato e giorno: reimportando un calendario esportato di nuovo, anche con il turno del giorno cambiato,
+        gli eventi vengono aggiornati invece che duplicati."""
+        lines = [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//ShiftManager//Turni//IT",
+            "CALSCALE:GREGORIAN",
+            _ics_fold(f"X-WR-CALNAME:{_ics_escape(f'Turni {employee.surname} {employee.name}')}")
+        ]
+
+        days_off_set = set(days_off)
+        events = [(day, shift_type) for day, shift_type in shifts.items() if day not in days_off_set]
+        events += [(day, "off_duty") for day in days_off]
+        for day, shift_type in sorted(events):
+            start, end, ends_next_day, text_lines = event_templates[shift_type]
+            day_str = day.strftime("%Y%m%d")
+            lines += ["BEGIN:VEVENT", f"UID:{day_str}-{employee.id}@shiftmanager", f"DTSTAMP:{dtstamp}"]
+            if start is None:
+                next_day_str = (day + datetime.timedelta(days=1)).strftime("%Y%m%d")
+                lines += [f"DTSTART;VALUE=DATE:{day_str}", f"DTEND;VALUE=DATE:{next_day_str}"]
+            else:
+                end_day_str = (day + datetime.timedelta(days=1)).strftime("%Y%m%d") if ends_next_day else day_str
+                lines += [f"DTSTART:{day_str}{start}", f"DTEND:{end_day_str}{end}"]
+            lines += text_lines
+            lines.append("END:VEVENT")
+
+        lines.append("END:VCALENDAR")
+        return lines
+
+
+def _ics_escape(text):
+    """Escape dei caratteri speciali nei valori di testo iCalendar (RFC 5545, 3.3.11)."""
+    return (str(text).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\n", "\\n"))
+
+
+def _ics_fold(line):
+    """Spezza le righe più lunghe di 75 ottetti (RFC 5545, 3.1): le continuazioni iniziano con uno spazio."""
+    if len(line.encode("utf-8")) <= 75:
+        return line
+
+    parts = []
+    current, size = "", 0
+    for char in line:
+        char_size = len(char.encode("utf-8"))
+        if size + char_size > 75:
+            parts.append(current)
+            current, size = " ", 1
+        current += char
+        size += char_size
+    parts.append(current)
+    return "\r\n".join(parts)
@@ -1,17 +1,310 @@
+import contextlib
 import datetime
+import gzip
+import hashlib
 import json
+import lzma
+import mmap
 import os
+import queue
+import re
+import sqlite3
+import struct
 import sys
+import threading
+import zlib
+from array import array
 
+# +++ FORMATO BINARIO DEGLI SHARD MENSILI +++
+# Alternativa compatta al JSON (config.json -> files -> shift_storage_format = "binary"):
+#   intestazione: magic, anno, mese, numero di giorni, typecode degli IDs ("H" se tutti < 65536, altrimenti "I")
+#   per ogni giorno: giorno del mese, numero di turni
+#   per ogni turno: codice del tipo di turno, numero di impiegati (32 bit), IDs impiegati (array little-endian)
+# Gli shard "SMB1" (versione precedente, numero di impiegati per turno a 16 bit) vengono ancora letti.
+SHARD_MAGIC = b"SMB2"
+SHARD_HEADER = struct.Struct("<4sHBBc")
+SHARD_DAY = struct.Struct("<BB")
+SHARD_SHIFT = struct.Struct("<BI")
+SHARD_SHIFT_BY_MAGIC = {b"SMB1": struct.Struct("<BH"), SHARD_MAGIC: SHARD_SHIFT}
+SHIFT_TYPE_CODES = ("mattina", "mattina_rep", "pomeriggio", "weekend_rep")
+SHIFT_TYPE_CODE = {shift_type: code for code, shift_type in enumerate(SHIFT_TYPE_CODES)}
+
+
+def encode_month_shard(year, month, month_schedule_json):
+    """Codifica la programmazione di un mese ({"yyyy-mm-dd": {shift_type: [ids]}}) nel formato binario."""
+    max_id = max((emp_id for daily_shifts in month_schedule_json.values()
+                  for emp_ids in daily_shifts.values() for emp_id in emp_ids), default=0)
+    typecode = "H" if max_id < 2 ** 16 else "I"
+
+    encoded = bytearray(SHARD_HEADER.pack(SHARD_MAGIC, int(year), int(month), len(month_schedule_json),
+                                          typecode.encode()))
+    for date_iso, daily_shifts in month_schedule_json.items():
+        encoded += SHARD_DAY.pack(int(date_iso[8:10]), len(daily_shifts))
+        for shift_type, emp_ids in daily_shifts.items():
+            encoded += SHARD_SHIFT.pack(SHIFT_TYPE_CODE[shift_type], len(emp_ids))
+            ids = array(typecode, emp_ids)
+            if sys.byteorder == "big":
+                ids.byteswap()
+            encoded += ids.tobytes()
+    return bytes(encoded)
+
+
+def decode_month_shard(encoded):
+    """Operazione inversa di encode_month_shard. Ritorna {"yyyy-mm-dd": {shift_type: [ids]}}."""
+    magic, year, month, n_of_days, typecode = SHARD_HEADER.unpack_from(encoded, 0)
+    if magic not in SHARD_SHIFT_BY_MAGIC:
+        raise ValueError("Shard binario non valido")
+    shard_shift = SHARD_SHIFT_BY_MAGIC[magic]
+    typecode = typecode.decode()
+    item_size = array(typecode).itemsize
+    offset = SHARD_HEADER.size
+
+    month_schedule_json = {}
+    for _ in range(n_of_days):
+        day, n_of_shifts = SHARD_DAY.unpack_from(encoded, offset)
+        offset += SHARD_DAY.size
+        daily_shifts = {}
+        for _ in range(n_of_shifts):
+            code, n_of_ids = shard_shift.unpack_from(encoded, offset)
+            offset += shard_shift.size
+            ids = array(typecode)
+            ids.frombytes(encoded[offset:offset + n_of_ids * item_size])
+            if sys.byteorder == "big":
+                ids.byteswap()
+            offset += n_of_ids * item_size
+            daily_shifts[SHIFT_TYPE_CODES[code]] = ids.tolist()
+        month_schedule_json[f"{year:04d}-{month:02d}-{day:02d}"] = daily_shifts
+    return month_schedule_json
+
+
+# +++ ARCHIVI COMPRESSI DEGLI ANNI CHIUSI +++
+# Gli shard di un anno concluso vengono riuniti in un unico segmento compresso (./data/shifts/<anno>.json.xz, ...):
+# {"mese": programmazione del mese}. Algoritmo scelto in config.json -> files -> archive_compression.
+ARCHIVE_CODECS = {
+    "lzma": (".json.xz", lzma.compress, lzma.decompress),
+    "gzip": (".json.gz", gzip.compress, gzip.decompress),
+    "zlib": (".json.zz", zlib.compress, zlib.decompress)
+}
+
+
+def _archive_codec(file_path):
+    for codec in ARCHIVE_CODECS.values():
+        if file_path.endswith(codec[0]):
+            return codec
+    raise ValueError(f"Formato di archivio non riconosciuto: {file_path}")
+
+
+# +++ SCRITTURE ATOMICHE +++
+# Ogni file viene scritto in <file>.tmp e sostituito con os.replace(): un'interruzione durante il salvataggio lascia
+# intatta la versione precedente, mai un file troncato.
+
+def _fsync_file(file_path):
+    with open(file_path, "r+b") as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_directories(file_paths):
+    """Rende persistenti le rinomine (su Windows le directory non possono essere aperte: non necessario)."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    for directory in {os.path.dirname(os.path.abspath(file_path)) for file_path in file_paths}:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def write_file_atomically(file_path, data):
+    """Scrive data (bytes) in file_path tramite file temporaneo, fsync e rinomina atomica."""
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, file_path)
+    _fsync_directories([file_path])
+
+
+def _dump_json(content):
+    return json.dumps(content, indent=4).encode()
+
+
+class StorageFileReader:
+    """Lettura in streaming di shift_storage.json ({"anno": {"mese": {...}}}) senza caricare l'intero file.
+    Il file viene mappato in memoria (mmap) e scandito solo a livello di anno/mese: dei sotto-alberi dei mesi si
+    individuano gli estremi saltando stringhe e parentesi con espressioni regolari, senza creare oggetti Python.
+    Gli estremi di ogni mese vengono tenuti in un indice in memoria (valido finché dimensione e mtime del file non
+    cambiano), senza file accanto allo storico: le letture successive dello stesso lettore leggono con seek() solo i
+    byte del mese richiesto, quindi memoria e tempo di lettura di un mese non dipendono dalla dimensione dello
+    storico."""
+
+    _WHITESPACE = re.compile(rb"[ \t\n\r]*")
+    _STRING = re.compile(rb'"(?:[^"\\]|\\.)*"', re.DOTALL)
+    # Contenuto di un oggetto fino alla prossima parentesi graffa (le stringhe vengono saltate per intero)
+    _CONTENT = re.compile(rb'(?:[^{}"]+|"(?:[^"\\]|\\.)*")*', re.DOTALL)
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._index = None  # (firma del file, estremi dei mesi)
+
+    def _skip_whitespace(self, data, pos):
+        return self._WHITESPACE.match(data, pos).end()
+
+    def _read_key(self, data, pos):
+        """Legge una chiave stringa e i due punti successivi. Ritorna (chiave, posizione del valore)."""
+        match = self._STRING.match(data, pos)
+        if match is None:
+            raise ValueError(f"Chiave attesa alla posizione {pos}")
+        pos = self._skip_whitespace(data, match.end())
+        if data[pos:pos + 1] != b":":
+            raise ValueError(f"':' atteso alla posizione {pos}")
+        return json.loads(match.group()), self._skip_whitespace(data, pos + 1)
+
+    def _skip_object(self, data, pos):
+        """Ritorna la posizione successiva alla fine dell'oggetto che inizia in pos."""
+        depth = 0
+        while True:
+            pos = self._CONTENT.match(data, pos).end()
+            token = data[pos:pos + 1]
+            if not token:
+                raise ValueError("Oggetto JSON non terminato")
+            pos += 1
+            depth += 1 if token == b"{" else -1
+            if depth == 0:
+                return pos
+
+    def _iter_members(self, data, pos):
+        """Itera (chiave, inizio, fine) dei membri dell'oggetto che inizia in pos (valori di tipo oggetto)."""
+        if data[pos:pos + 1] != b"{":
+            raise ValueError(f"Oggetto atteso alla posizione {pos}")
+        pos = self._skip_whitespace(data, pos + 1)
+        if data[pos:pos + 1] == b"}":
+            return
+        while True:
+            key, value_start = self._read_key(data, pos)
+            value_end = self._skip_object(data, value_start)
+            yield key, value_start, value_end
+            pos = self._skip_whitespace(data, value_end)
+            if data[pos:pos + 1] == b"}":
+                return
+            if data[pos:pos + 1] != b",":
+                raise ValueError(f"',' atteso alla posizione {pos}")
+            pos = self._skip_whitespace(data, pos + 1)
+
+    def _iter_month_spans(self, data):
+        for year_key, year_start, _ in self._iter_members(data, self._skip_whitespace(data, 0)):
+            for month_key, month_start, month_end in self._iter_members(data, year_start):
+                yield year_key, month_key, month_start, month_end
+
+    def month_spans(self):
+        """Ritorna [[anno, mese, inizio, fine], ...] dei mesi nel file, dall'indice se ancora valido."""
+        file_stat = os.stat(self.file_path)
+        signature = (file_stat.st_size, file_stat.st_mtime_ns)
+        if self._index is not None and self._index[0] == signature:
+            return self._index[1]
+
+        spans = []
+        if file_stat.st_size > 0:
+            with open(self.file_path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    spans = [list(span) for span in self._iter_month_spans(data)]
+
+        self._index = (signature, spans)
+        return spans
+
+    def _read_span(self, f, start, end):
+        f.seek(start)
+        return json.loads(f.read(end - start))
+
+    def iter_months(self):
+        """Itera (anno, mese, programmazione del mese) decodificando un mese alla volta."""
+        spans = self.month_spans()
+        with open(self.file_path, "rb") as f:
+            for year_key, month_key, start, end in spans:
+                yield year_key, month_key, self._read_span(f, start, end)
+
+    def load_month(self, year, month):
+        """Decodifica solo il mese richiesto. Ritorna None se il mese non è presente."""
+        for year_key, month_key, start, end in self.month_spans():
+            if year_key == str(year) and month_key == str(month):
+                with open(self.file_path, "rb") as f:
+                    return self._read_span(f, start, end)
+        return None
+
+
+class EditJournal:
+    """Journal append-only delle modifiche (una riga JSON per operazione, con numero di sequenza "seq").
+    Ogni append() scrive un batch di operazioni con un solo fsync; le operazioni restano anche in memoria
+    (self.entries) fino alla compattazione, che le rimuove con drop()."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = threading.RLock()
+        self.entries = self._read()
+        self.last_seq = self.entries[-1]["seq"] if self.entries else 0
+
+    def _read(self):
+        entries = []
+        if not os.path.exists(self.file_path):
+            return entries
+        with open(self.file_path, "r+b") as f:
+            valid_size = 0
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Riga troncata da un'interruzione durante la scrittura: viene scartata insieme alle successive,
+                    # in modo che i nuovi batch siano accodati dopo l'ultima operazione valida
+                    f.truncate(valid_size)
+                    break
+                valid_size += len(line)
+        return entries
+
+    def append(self, operations):
+        """Aggiunge un batch di operazioni ({"op": ..., ...}) assegnando i numeri di sequenza.
+        Ritorna le operazioni registrate."""
+        with self.lock:
+            for operation in operations:
+                self.last_seq += 1
+                operation["seq"] = self.last_seq
+            with open(self.file_path, "a") as f:
+                f.write("".join(json.dumps(operation) + "\n" for operation in operations))
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries.extend(operations)
+            return operations
+
+    def drop(self, last_seq):
+        """Rimuove dal journal le operazioni con seq <= last_seq (già incluse negli snapshot)."""
+        with self.lock:
+            self.entries = [entry for entry in self.entries if entry["seq"] > last_seq]
+            temp_path = f"{self.file_path}.tmp"
+            with open(temp_path, "w") as f:
+                f.write("".join(json.dumps(entry) + "\n" for entry in self.entries))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.file_path)
+
+
+class StorageManager:
+    """Base comune dei gestori di persistenza (JsonManager, SqliteManager): percorsi di config.json e dei dati,
+    lettura di config.json con la cache dei documenti JSON e lettura dello storico un mese alla volta.
+    Non crea file né directory dello storico: la preparazione dello storage è a carico delle sottoclassi."""
 
-class JsonManager:
     def __init__(self):
         self.directories = ["data"]
         self.file_path_config = "config.json"
         self.file_path_employees = os.path.join(self.directories[0], "employees.json") #./Data/.json
+        # Storico monolitico (versioni precedenti): convertito automaticamente nel formato a shard mensili
         self.file_path_shifts_storage = os.path.join(self.directories[0], "shift_storage.json") #./Data/.json
+        # Un file per mese (./data/shifts/<anno>/<mese>.json) più un manifest con l'elenco dei mesi salvati
+        self.directory_shifts_storage = os.path.join(self.directories[0], "shifts")
 
-        self._directories_check()
+        # Cache dei documenti JSON già letti: {percorso: (mtime_ns, dimensione, contenuto)}
+        self._cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def _directories_check(self):
         """Checks if a directory exists at the given path, and creates it if not."""
@@ -19,6 +312,40 @@ class JsonManager:
         for directory in self.directories:
             os.makedirs(directory,exist_ok=True)
 
+    def _load_cached_file(self, file_to_load, default_file, loader=None):
+        """Come _load_file, ma riusa il documento già letto se mtime e dimensione del file non sono cambiati.
+        Il documento ritornato è condiviso con la cache: i chiamanti non devono modificarlo.
+            - loader: funzione di lettura alternativa a _load_file (es. per gli shard binari)."""
+        try:
+            file_stat = os.stat(file_to_load)
+        except OSError:
+            file_stat = None
+
+        if file_stat is not None:
+            cached = self._cache.get(file_to_load)
+            if cached is not None and cached[:2] == (file_stat.st_mtime_ns, file_stat.st_size):
+                self.cache_hits += 1
+                return cached[2]
+
+        self.cache_misses += 1
+        loaded_file = loader(file_to_load) if loader else self._load_file(file_to_load, default_file)
+        if loaded_file is not None:
+            self._store_cached_file(file_to_load, loaded_file)
+        return loaded_file
+
+    def _store_cached_file(self, file_path, content):
+        """Aggiorna la cache dopo una scrittura del file, in modo che la lettura successiva non acceda al disco."""
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            self._cache.pop(file_path, None)
+            return
+        self._cache[file_path] = (file_stat.st_mtime_ns, file_stat.st_size, content)
+
+    def cache_stats(self):
+        """Contatori della cache delle letture: {"hits": ..., "misses": ...}."""
+        return {"hits": self.cache_hits, "misses": self.cache_misses}
+
     @staticmethod
     def _load_file(file_to_load, default_file):
         """Verifica l'esistenza e l'integrità del file da aprire.
@@ -26,9 +353,8 @@ class JsonManager:
             - default_file: contenuto default da caricare se il file desiderato non esiste."""
         if not os.path.exists(file_to_load):
             try:
-                with open(file_to_load, "w") as f:
-                    json.dump(default_file, f, indent=4)
-                    return default_file
+                write_file_atomically(file_to_load, _dump_json(default_file))
+                return default_file
             except IOError:
                 print(f"Impossibile creare {file_to_load}")
                 return None
@@ -56,7 +382,12 @@ class JsonManager:
             },
             "files": {
                 "employees_database_file": self.file_path_employees,
-                "shift_storage_database_file": self.file_path_shifts_storage
+                "shift_storage_database_file": self.file_path_shifts_storage,
+                "shift_storage_directory": self.directory_shifts_storage,
+                "storage_backend": "json",
+                "shift_storage_format": "json",
+                "archive_compression": "lzma",
+                "sqlite_database_file": os.path.join(self.directories[0], "shift_manager.db")
             },
             "shift_settings": {
                 "shift_representation": {
@@ -70,7 +401,16 @@ class JsonManager:
                     "mattina_rep": 1,
                     "weekend_rep": 1
                 },
-                "weekend_days": [5, 6]
+                "weekend_days": [5, 6],
+                "engine": "python",
+                "candidates": 1,
+                "time_budget": 2,
+                "shift_times": {
+                    "mattina": ["07:00", "14:00"],
+                    "mattina_rep": ["07:00", "14:00"],
+                    "pomeriggio": ["14:00", "21:00"],
+                    "weekend_rep": ["08:00", "20:00"]
+                }
             },
             "employees_view": {
                 "matricola": "Matricola",
@@ -84,25 +424,11 @@ class JsonManager:
             }
         }
 
-        return self._load_file(self.file_path_config, default_configuration)
-
-    def load_employees_file(self):
-        """Verifica l'esistenza del file employees.json.
-        employees.json sarà un array (in modo da poter contarne gli elementi), i cui elementi sono dictionary:
-
-        employees.json = [{'id': ..., 'surname': ..., 'name': ..., 'serial_number': ...'shift_count': {'mattina': ...,
-        mattina_rep': ..., 'pomeriggio': ..., 'weekend_rep': ...}, {...}]
-
-        Se il file non esiste lo crea inserendovi un array vuoto."""
-
-        default_employees_json = []
-
-        return self._load_file(self.file_path_employees, default_employees_json)
+        return self._load_cached_file(self.file_path_config, default_configuration)
 
     def load_shifts_file(self):
-        """Verifica l'esistenza del file shits_storage.json.
-        Se non esiste crea un dictionary vuoto.
-        Il file avrà una struttura del tipo:
+        """Ritorna l'intero storico dei turni (dictionary vuoto se non ci sono mesi salvati).
+        Lo storico avrà una struttura del tipo:
         {
         "2024": {
             "5": {
@@ -119,48 +445,698 @@ class JsonManager:
             "1": {
                 "...": "..."
             }
-        }"""
+        }
+        La struttura viene ricostruita leggendo tutti gli shard mensili elencati nel manifest: per leggere un solo
+        mese usare load_month_shifts()."""
+
+        schedule_database = {}
+        for year_key, month_key, month_schedule_json in self.iter_month_shifts():
+            schedule_database.setdefault(year_key, {})[month_key] = month_schedule_json
 
-        default_shifts_storage = {}
+        return schedule_database
 
-        return self._load_file(self.file_path_shifts_storage, default_shifts_storage)
+    def iter_month_shifts(self):
+        """Itera lo storico un mese alla volta: (anno, mese, programmazione del mese), con anno e mese stringhe."""
+        for year_key, months in self.load_shifts_manifest()["months"].items():
+            for month in months:
+                month_schedule_json = self.load_month_shifts(int(year_key), month)
+                if month_schedule_json is not None:
+                    yield year_key, str(month), month_schedule_json
 
     @staticmethod
     def reset_file(file_to_reset, default_file):
         print(f"Ripristino {file_to_reset} in corso...")
-        with open(file_to_reset, "w") as f:
-            json.dump(default_file, f, indent=4)
-            return default_file
+        write_file_atomically(file_to_reset, _dump_json(default_file))
+        return default_file
 
-    def save_employees_file(self, exported_employees_list):
-        """Salva gli impiegati e i loro attributi (dati in input) nel file employees.json"""
-        file_to_save = []
 
-        for employee in exported_employees_list:
-            employee_dictionary = {
-                "id": employee.id,
-                "surname": employee.surname,
-                "name": employee.name,
-                "serial_number": employee.serial_number,
-                # JSON non gestisce gli oggetti. Conversione da oggetto datetime.date a stringa
-                "days_off": [d.isoformat() for d in employee.days_off],
-                "shift_count": employee.shift_count
+class JsonManager(StorageManager):
+    # Numero di operazioni nel journal oltre il quale gli snapshot vengono riscritti in background
+    JOURNAL_COMPACTION_THRESHOLD = 1000
+
+    def __init__(self, shift_storage_format="json", archive_compression="lzma"):
+        super().__init__()
+        self.directories += [self.directory_shifts_storage, os.path.join(self.directories[0], "days_off")]
+        # Formato degli shard: "json" (<mese>.json) o "binary" (<mese>.bin, vedi encode_month_shard)
+        self.shift_storage_format = shift_storage_format
+        # Compressione dei segmenti degli anni archiviati (vedi archive_closed_years): "lzma", "gzip" o "zlib"
+        if archive_compression not in ARCHIVE_CODECS:
+            raise ValueError(f"archive_compression non valido: {archive_compression}")
+        self.archive_compression = archive_compression
+        self.file_path_shifts_manifest = os.path.join(self.directory_shifts_storage, "manifest.json")
+        # Journal delle modifiche e snapshot dei turni bloccati (employees.json è lo snapshot degli impiegati)
+        self.file_path_journal = os.path.join(self.directories[0], "journal.log")
+        self.file_path_locks = os.path.join(self.directories[0], "locks.json")
+        # Ferie partizionate per anno (./data/days_off/<anno>.json: {"emp_id": ["yyyy-mm-dd", ...]}): all'avvio si
+        # leggono solo gli anni richiesti, quindi il costo non cresce con lo storico delle ferie
+        self.directory_days_off = self.directories[2]
+
+        # Serializza la decompressione dei segmenti archiviati: più thread che leggono mesi dello stesso anno
+        # (es. PeriodExporter) decomprimono il segmento una sola volta
+        self._archive_lock = threading.Lock()
+        # Ultima versione scritta di ogni file: {percorso: (mtime_ns, dimensione, hash del contenuto)}
+        self._written = {}
+        self.writes = 0
+        self.writes_skipped = 0
+        self._local = threading.local()  # Batch di scritture in corso (uno per thread, vedi write_batch)
+
+        self._directories_check()
+        self._migrate_shifts_storage()
+
+        self.journal = EditJournal(self.file_path_journal)
+        self._journal_state = None  # Stato snapshot + journal, caricato alla prima lettura
+        self._compaction_thread = None
+        # employees.json nel formato precedente (ferie di tutti gli anni nei record): da partizionare alla compattazione
+        self._days_off_migration_pending = False
+
+    # +++ JOURNAL +++
+    # Le modifiche a impiegati, ferie, contatori, turni bloccati e mesi salvati vengono registrate nel journal
+    # come operazioni (costo proporzionale alla modifica); gli snapshot (employees.json, manifest.json, locks.json)
+    # vengono riscritti solo durante la compattazione. Ogni record di employees.json conserva il seq dell'ultima
+    # operazione applicata ("journal_seq"), quindi il replay dopo un'interruzione non applica due volte i delta.
+    # Le ferie sono partizionate per anno (state["days_off"] = {anno: {emp_id: {giorni}}}): ogni anno viene letto
+    # dal suo snapshot e ricostruito con le operazioni del journal solo quando richiesto (_load_days_off_year).
+    # Aggiungere o rimuovere un giorno è idempotente, quindi il replay delle ferie non dipende da journal_seq.
+
+    def _load_journal_state(self):
+        """Ritorna lo stato corrente: snapshot su disco più le operazioni del journal.
+        None se employees.json è corrotto."""
+        if self._journal_state is not None:
+            return self._journal_state
+
+        employees_json = self._load_file(self.file_path_employees, [])
+        if employees_json is None:
+            return None
+        locks_json = self._load_file(self.file_path_locks, []) or []
+
+        state = {
+            "employees": {record["id"]: record for record in employees_json},
+            "months": {year_key: set(months) for year_key, months in self._load_manifest_snapshot()["months"].items()},
+            "locks": {(day, employee_id): shift_type for day, employee_id, shift_type in locks_json},
+            "days_off": {}
+        }
+        # Formato precedente: le ferie di tutti gli anni sono nei record e vengono partizionate una sola volta
+        if any("days_off" in record for record in employees_json):
+            for record in employees_json:
+                for day in record.pop("days_off", []):
+                    state["days_off"].setdefault(int(day[:4]), {}).setdefault(record["id"], set()).add(day)
+            for year in self._days_off_years_on_disk():
+                state["days_off"].setdefault(year, {})
+            self._days_off_migration_pending = True
+
+        with self.journal.lock:
+            for entry in self.journal.entries:
+                self._apply_journal_entry(state, entry)
+            # Dopo una compattazione il journal è vuoto: la numerazione riparte dall'ultimo seq negli snapshot
+            self.journal.last_seq = max([self.journal.last_seq] + [record.get("journal_seq", 0)
+                                                                   for record in state["employees"].values()])
+        self._journal_state = state
+        return state
+
+    def _load_history_state(self):
+        """Stato dei mesi salvati e dei turni bloccati (snapshot più journal). Se employees.json è illeggibile
+        (_load_journal_state() ritorna None) viene ricostruito ad ogni chiamata dai soli snapshot di manifest e lock e
+        dalle relative operazioni del journal, in modo che turni e lock restino leggibili e salvabili."""
+        state = self._load_journal_state()
+        if state is not None:
+            return state
+
+        locks_json = self._load_file(self.file_path_locks, []) or []
+        state = {
+            "months": {year_key: set(months) for year_key, months in self._load_manifest_snapshot()["months"].items()},
+            "locks": {(day, employee_id): shift_type for day, employee_id, shift_type in locks_json}
+        }
+        with self.journal.lock:
+            for entry in self.journal.entries:
+                if entry["op"] in ("month_committed", "lock_set", "lock_removed"):
+                    self._apply_journal_entry(state, entry)
+        return state
+
+    @staticmethod
+    def _apply_days_off_entry(year_days_off, year, entry):
+        """Applica alle ferie dell'anno ({emp_id: {giorni}}) un'operazione del journal."""
+        op = entry["op"]
+        if op == "employee_set":
+            # Solo i nuovi impiegati (e il formato precedente del journal) hanno le ferie nell'operazione
+            if "days_off" not in entry["employee"]:
+                return
+            year_prefix = f"{year:04d}-"
+            days = {day for day in entry["employee"]["days_off"] if day.startswith(year_prefix)}
+            if days:
+                year_days_off[entry["employee"]["id"]] = days
+            else:
+                year_days_off.pop(entry["employee"]["id"], None)
+        elif op == "employee_removed":
+            year_days_off.pop(entry["employee_id"], None)
+        elif op in ("day_off_added", "day_off_removed") and int(entry["day"][:4]) == year:
+            days = year_days_off.setdefault(entry["employee_id"], set())
+            if op == "day_off_added":
+                days.add(entry["day"])
+            else:
+                days.discard(entry["day"])
+                if not days:
+                    del year_days_off[entry["employee_id"]]
+
+    def _days_off_file_path(self, year):
+        return os.path.join(self.directory_days_off, f"{int(year)}.json")
+
+    def _days_off_years_on_disk(self):
+        try:
+            names = os.listdir(self.directory_days_off)
+        except OSError:
+            return set()
+        return {int(name[:-5]) for name in names if name.endswith(".json") and name[:-5].isdigit()}
+
+    def _load_days_off_year(self, state, year):
+        """Ferie dell'anno ({emp_id: {giorni}}): snapshot dell'anno più le operazioni del journal, letto una volta."""
+        year = int(year)
+        with self.journal.lock:
+            year_days_off = state["days_off"].get(year)
+            if year_days_off is not None:
+                return year_days_off
+
+            year_days_off = {}
+            file_path = self._days_off_file_path(year)
+            if os.path.exists(file_path):
+                snapshot = self._load_file(file_path, {})
+                if snapshot is None:
+                    raise ValueError(f"{file_path} corrupted or unreadable!")
+                year_days_off = {int(emp_id): set(days) for emp_id, days in snapshot.items()}
+            for entry in self.journal.entries:
+                self._apply_days_off_entry(year_days_off, year, entry)
+            state["days_off"][year] = year_days_off
+            return year_days_off
+
+    def list_days_off_years(self):
+        """Anni per i quali sono registrati giorni di ferie (snapshot su disco, anni già letti e journal)."""
+        state = self._load_journal_state()
+        with self.journal.lock:
+            years = self._days_off_years_on_disk() | {year for year, days in (state or {"days_off": {}})["days_off"].items()
+                                                      if days}
+            for entry in self.journal.entries:
+                if entry["op"] == "day_off_added":
+                    years.add(int(entry["day"][:4]))
+                elif entry["op"] == "employee_set":
+                    years.update(int(day[:4]) for day in entry["employee"].get("days_off", []))
+        return sorted(years)
+
+    def load_days_off(self, year):
+        """Ferie dell'anno: {emp_id: ["yyyy-mm-dd", ...]} (solo impiegati presenti)."""
+        state = self._load_journal_state()
+        if state is None:
+            return {}
+        year_days_off = self._load_days_off_year(state, year)
+        with self.journal.lock:
+            return {emp_id: sorted(days) for emp_id, days in year_days_off.items()
+                    if days and emp_id in state["employees"]}
+
+    @classmethod
+    def _apply_journal_entry(cls, state, entry):
+        op = entry["op"]
+        if op in ("employee_set", "employee_removed", "day_off_added", "day_off_removed"):
+            # Le ferie vengono aggiornate solo negli anni già letti; gli altri applicano il journal alla lettura
+            for year, year_days_off in state["days_off"].items():
+                cls._apply_days_off_entry(year_days_off, year, entry)
+            if op in ("day_off_added", "day_off_removed"):
+                return
+
+        if op == "month_committed":
+            state["months"].setdefault(str(entry["year"]), set()).add(int(entry["month"]))
+            return
+        if op == "lock_set":
+            state["locks"][(entry["day"], entry["employee_id"])] = entry["shift_type"]
+            return
+        if op == "lock_removed":
+            state["locks"].pop((entry["day"], entry["employee_id"]), None)
+            return
+
+        employees = state["employees"]
+        if op == "employee_set":
+            record = {key: value for key, value in entry["employee"].items() if key != "days_off"}
+            employees[record["id"]] = dict(record, journal_seq=entry["seq"])
+            return
+        if op == "employee_removed":
+            employees.pop(entry["employee_id"], None)
+            return
+
+        record = employees.get(entry["employee_id"])
+        # Operazione già inclusa nello snapshot dell'impiegato
+        if record is None or record.get("journal_seq", 0) >= entry["seq"]:
+            return
+        if op == "counter_delta":
+            record["shift_count"][entry["shift_type"]] = record["shift_count"].get(entry["shift_type"], 0) + entry["delta"]
+        record["journal_seq"] = entry["seq"]
+
+    def _record_operations(self, operations):
+        """Registra nel journal un batch di operazioni, le applica allo stato in memoria e avvia la compattazione
+        in background se il journal ha superato JOURNAL_COMPACTION_THRESHOLD operazioni."""
+        if not operations:
+            return None
+        state = self._load_journal_state()
+        with self.journal.lock:
+            for entry in self.journal.append(operations):
+                # Con employees.json illeggibile non c'è uno stato in memoria da aggiornare: le operazioni restano
+                # nel journal e vengono applicate quando lo stato viene caricato (vedi _load_history_state)
+                if state is not None:
+                    self._apply_journal_entry(state, entry)
+            n_of_entries = len(self.journal.entries)
+
+        if n_of_entries >= self.JOURNAL_COMPACTION_THRESHOLD:
+            self.compact_journal(wait=False)
+        return None
+
+    def compact_journal(self, wait=True):
+        """Riscrive gli snapshot (employees.json, manifest.json, locks.json) con lo stato corrente e svuota il
+        journal. Con wait=False viene eseguita in un thread in background."""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            if not wait:
+                return None
+            # Le operazioni registrate dopo lo snapshot della compattazione in corso restano nel journal: al termine
+            # si compatta di nuovo, in modo che all'uscita il journal sia vuoto
+            self._compaction_thread.join()
+
+        if wait:
+            self._compact_journal()
+        else:
+            self._compaction_thread = threading.Thread(target=self._compact_journal, daemon=True)
+            self._compaction_thread.start()
+        return None
+
+    def _compact_journal(self):
+        state = self._load_journal_state()
+        if state is None:
+            return None
+
+        with self.journal.lock:
+            if not self.journal.entries and not self._days_off_migration_pending:
+                return None
+            last_seq = self.journal.last_seq
+
+            # Anni di ferie da riscrivere: quelli toccati dal journal. Un impiegato aggiunto o rimosso (o la
+            # partizione del formato precedente) interessa tutti gli anni
+            ops = {entry["op"] for entry in self.journal.entries}
+            if self._days_off_migration_pending or "employee_set" in ops or "employee_removed" in ops:
+                years = set(self.list_days_off_years()) | set(state["days_off"])
+            else:
+                years = {int(entry["day"][:4]) for entry in self.journal.entries
+                         if entry["op"] in ("day_off_added", "day_off_removed")}
+            days_off_json = {
+                year: {str(emp_id): sorted(days) for emp_id, days in self._load_days_off_year(state, year).items()
+                       if days and emp_id in state["employees"]}
+                for year in sorted(years)
             }
-            file_to_save.append(employee_dictionary)
 
-        with open(self.file_path_employees, "w") as f:
-            json.dump(file_to_save, f, indent=4)
-            print("SALVATAGGIO IMPIEGATI COMPLETATO")
+            employees_json = [dict(record, shift_count=dict(record["shift_count"]))
+                              for record in state["employees"].values()]
+            manifest = dict(self._load_manifest_snapshot())
+            manifest["months"] = {year_key: sorted(months) for year_key, months in sorted(state["months"].items())}
+            locks_json = [[day, employee_id, shift_type] for (day, employee_id), shift_type in state["locks"].items()]
 
-    def save_shifts_file(self, exported_shifts_list):
-        """Salva i turni nel file shifts_storage.json
-        Trasforma gli oggetti datetime.date in stringhe e associa alle date gli IDs degli employees."""
-        # Il dictionary da salvare in shift_storage.json deriva direttamente da quello caricato.
-        # Si interpreti come:
-        ## Loaded_file = self.load_shifts_file()
-        ## schedule_to_save = loaded_file
-        schedule_to_save = self.load_shifts_file()
+        # Scrittura degli snapshot su file temporanei e sostituzione atomica: employees.json non resta mai troncato.
+        # Le ferie precedono employees.json: se la partizione del formato precedente si interrompe, al riavvio i
+        # record contengono ancora tutte le ferie. Il journal viene svuotato solo dopo che tutti gli snapshot sono
+        # su disco
+        with self.write_batch():
+            for year, year_days_off in days_off_json.items():
+                self._replace_file(self._days_off_file_path(year), year_days_off)
+            self._replace_file(self.file_path_employees, employees_json)
+            self._save_manifest(manifest)
+            self._replace_file(self.file_path_locks, locks_json)
+        self._days_off_migration_pending = False
+        self.journal.drop(last_seq)
+        return None
+
+    # +++ SCRITTURE +++
+
+    @contextlib.contextmanager
+    def write_batch(self):
+        """Raggruppa le scritture eseguite nel blocco: i file temporanei ricevono fsync e vengono rinominati tutti
+        all'uscita, con un solo fsync per directory. Usato da migrazione e compattazione, che scrivono molti file."""
+        if getattr(self._local, "batch", None) is not None:
+            yield  # Batch già aperto da un chiamante: le scritture vi confluiscono
+            return
+        self._local.batch = {}
+        try:
+            yield
+        finally:
+            pending, self._local.batch = self._local.batch, None
+            self._commit_writes(pending)
+
+    def _commit_writes(self, pending):
+        """pending: {percorso: (percorso temporaneo, hash)}. fsync dei file, rinomina nell'ordine di scrittura."""
+        for temp_path, _ in pending.values():
+            _fsync_file(temp_path)
+        for file_path, (temp_path, digest) in pending.items():
+            os.replace(temp_path, file_path)
+            file_stat = os.stat(file_path)
+            self._written[file_path] = (file_stat.st_mtime_ns, file_stat.st_size, digest)
+        _fsync_directories(pending)
+
+    def _is_unchanged(self, file_path, data, digest):
+        """True se file_path contiene già data. Se il file non è cambiato dall'ultima scrittura di questo manager
+        basta confrontare l'hash, altrimenti (es. primo salvataggio dopo l'avvio) il file viene riletto."""
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            return False
+        if file_stat.st_size != len(data):
+            return False
+        written = self._written.get(file_path)
+        if written is not None and written[:2] == (file_stat.st_mtime_ns, file_stat.st_size):
+            return written[2] == digest
+        with open(file_path, "rb") as f:
+            if f.read() != data:
+                return False
+        self._written[file_path] = (file_stat.st_mtime_ns, file_stat.st_size, digest)
+        return True
+
+    def _write_file(self, file_path, data):
+        """Scrive data (bytes) in modo atomico. La scrittura viene saltata se il file ha già lo stesso contenuto.
+        Ritorna True se il file è stato scritto."""
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        batch = getattr(self._local, "batch", None)
+        # Un file già scritto nel batch non è ancora su disco: il confronto con il disco non è significativo
+        if (batch is None or file_path not in batch) and self._is_unchanged(file_path, data, digest):
+            self.writes_skipped += 1
+            return False
+
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        self.writes += 1
+
+        if batch is None:
+            self._commit_writes({file_path: (temp_path, digest)})
+        else:
+            batch.pop(file_path, None)  # Riscrittura nello stesso batch: conta l'ultima, nell'ordine di scrittura
+            batch[file_path] = (temp_path, digest)
+        return True
+
+    def _replace_file(self, file_path, content):
+        self._write_file(file_path, _dump_json(content))
+
+    def write_stats(self):
+        """Contatori delle scritture: {"written": ..., "skipped": ...} (skipped: contenuto già su disco)."""
+        return {"written": self.writes, "skipped": self.writes_skipped}
+
+    def _migrate_shifts_storage(self):
+        """Converte shift_storage.json (un unico file con tutto lo storico) in shard mensili.
+        Eseguita una sola volta: se il manifest esiste già non fa nulla. Il file originale non viene modificato."""
+        if os.path.exists(self.file_path_shifts_manifest):
+            return None
+
+        manifest = {"months": {}}
+        if os.path.exists(self.file_path_shifts_storage):
+            # Lettura in streaming: in memoria c'è un solo mese alla volta, indipendentemente dallo storico
+            # Gli shard vengono scritti in un unico batch (un fsync per directory invece di uno per file)
+            try:
+                with self.write_batch():
+                    for year_key, month_key, month_schedule_json in \
+                            StorageFileReader(self.file_path_shifts_storage).iter_months():
+                        self._write_month_shard(year_key, month_key, month_schedule_json)
+                        manifest["months"].setdefault(year_key, []).append(int(month_key))
+            except (ValueError, IOError):
+                # File corrotto: la migrazione verrà ritentata al prossimo avvio
+                print(f"{self.file_path_shifts_storage} corrupted or unreadable! Try to reset "
+                      f"{self.file_path_shifts_storage} or correct it manually.")
+                return None
+
+            for months in manifest["months"].values():
+                months.sort()
+            manifest["migrated_from"] = self.file_path_shifts_storage
+            print(f"Migrazione di {self.file_path_shifts_storage} in {self.directory_shifts_storage} completata")
+
+        self._save_manifest(manifest)
+        return None
+
+    # +++ ARCHIVI DEGLI ANNI CHIUSI +++
+
+    def _archive_path(self, year_key, archive_compression=None):
+        extension = ARCHIVE_CODECS[archive_compression or self.archive_compression][0]
+        return os.path.join(self.directory_shifts_storage, f"{int(year_key)}{extension}")
+
+    def _find_archive(self, year_key):
+        """Percorso del segmento compresso dell'anno (in qualsiasi formato), None se l'anno non è archiviato."""
+        for archive_compression in (self.archive_compression, *ARCHIVE_CODECS):
+            archive_path = self._archive_path(year_key, archive_compression)
+            if os.path.exists(archive_path):
+                return archive_path
+        return None
+
+    @staticmethod
+    def _read_archive(archive_path):
+        try:
+            with open(archive_path, "rb") as f:
+                return json.loads(_archive_codec(archive_path)[2](f.read()))
+        except (ValueError, IOError, lzma.LZMAError, zlib.error, EOFError):
+            print(f"{archive_path} corrupted or unreadable!")
+            return None
+
+    def _load_archive(self, year_key):
+        """Segmento dell'anno decompresso ({"mese": programmazione}), letto una volta e poi dalla cache."""
+        archive_path = self._find_archive(year_key)
+        if archive_path is None:
+            return None
+        with self._archive_lock:
+            return self._load_cached_file(archive_path, {}, self._read_archive)
+
+    def archive_year(self, year):
+        """Riunisce i mesi dell'anno (shard e eventuale segmento precedente) in un segmento compresso e rimuove gli
+        shard. I mesi archiviati restano leggibili con load_month_shifts(); un mese salvato di nuovo torna in uno
+        shard, che ha la precedenza sul segmento fino alla successiva archiviazione.
+        Ritorna il numero di mesi archiviati."""
+        year_key = str(int(year))
+        months = self.load_shifts_manifest()["months"].get(year_key, [])
+        shard_paths = [self._month_shard_path(year_key, month, shift_storage_format)
+                       for month in months for shift_storage_format in ("json", "binary")]
+        shard_paths = [shard_path for shard_path in shard_paths if os.path.exists(shard_path)]
+        previous_archive_path = self._find_archive(year_key)
+        if not shard_paths and (previous_archive_path is None or previous_archive_path == self._archive_path(year_key)):
+            return 0  # Anno già archiviato (o senza mesi salvati)
+
+        segment = {}
+        for month in months:
+            month_schedule_json = self.load_month_shifts(year_key, month)
+            if month_schedule_json is None:
+                raise ValueError(f"Impossibile archiviare {year_key}: mese {month} illeggibile")
+            segment[str(month)] = month_schedule_json
 
+        # Il segmento è su disco (scrittura atomica) prima della rimozione degli shard
+        archive_path = self._archive_path(year_key)
+        self._write_file(archive_path, ARCHIVE_CODECS[self.archive_compression][1](_dump_json(segment)))
+        self._store_cached_file(archive_path, segment)
+        for shard_path in shard_paths:
+            os.remove(shard_path)
+            self._cache.pop(shard_path, None)
+        if previous_archive_path is not None and previous_archive_path != archive_path:
+            os.remove(previous_archive_path)
+            self._cache.pop(previous_archive_path, None)
+        try:
+            os.rmdir(os.path.join(self.directory_shifts_storage, year_key))
+        except OSError:
+            pass  # Directory non vuota o già rimossa
+        return len(segment)
+
+    def archive_closed_years(self, before_year=None):
+        """Archivia gli anni precedenti a before_year (default: l'anno corrente), che non vengono più modificati.
+        Ritorna gli anni archiviati."""
+        before_year = before_year or datetime.date.today().year
+        archived_years = []
+        for year_key in self.load_shifts_manifest()["months"]:
+            if int(year_key) < before_year and self.archive_year(year_key):
+                archived_years.append(int(year_key))
+        return archived_years
+
+    def _month_shard_path(self, year_key, month_key, shift_storage_format=None):
+        extension = "bin" if (shift_storage_format or self.shift_storage_format) == "binary" else "json"
+        return os.path.join(self.directory_shifts_storage, str(year_key), f"{int(month_key)}.{extension}")
+
+    def _write_month_shard(self, year_key, month_key, month_schedule_json):
+        os.makedirs(os.path.join(self.directory_shifts_storage, str(year_key)), exist_ok=True)
+        shard_path = self._month_shard_path(year_key, month_key)
+        if self.shift_storage_format == "binary":
+            self._write_file(shard_path, encode_month_shard(year_key, month_key, month_schedule_json))
+            other_format_path = self._month_shard_path(year_key, month_key, "json")
+        else:
+            self._write_file(shard_path, _dump_json(month_schedule_json))
+            other_format_path = self._month_shard_path(year_key, month_key, "binary")
+        if getattr(self._local, "batch", None) is None:
+            self._store_cached_file(shard_path, month_schedule_json)
+
+        # Lo shard del mese salvato in precedenza nell'altro formato non è più aggiornato
+        if os.path.exists(other_format_path):
+            os.remove(other_format_path)
+            self._cache.pop(other_format_path, None)
+
+    @staticmethod
+    def _read_binary_shard(shard_path):
+        try:
+            with open(shard_path, "rb") as f:
+                return decode_month_shard(f.read())
+        except (ValueError, IOError, struct.error):
+            print(f"{shard_path} corrupted or unreadable!")
+            return None
+
+    def _save_manifest(self, manifest):
+        self._replace_file(self.file_path_shifts_manifest, manifest)
+        if getattr(self._local, "batch", None) is None:
+            self._store_cached_file(self.file_path_shifts_manifest, manifest)
+
+    def _load_manifest_snapshot(self):
+        """Manifest così com'è su disco (senza i mesi registrati nel journal)."""
+        manifest = self._load_cached_file(self.file_path_shifts_manifest, {"months": {}})
+        return manifest if manifest is not None else {"months": {}}
+
+    def load_shifts_manifest(self):
+        """Ritorna il manifest dello storico turni: {"months": {"anno": [mesi salvati]}}.
+        Include i mesi salvati dopo l'ultima compattazione del journal."""
+        state = self._load_history_state()
+        with self.journal.lock:
+            return {"months": {year_key: sorted(months) for year_key, months in state["months"].items() if months}}
+
+    def load_employees_file(self, days_off_years=None):
+        """Verifica l'esistenza del file employees.json.
+        employees.json sarà un array (in modo da poter contarne gli elementi), i cui elementi sono dictionary:
+
+        employees.json = [{'id': ..., 'surname': ..., 'name': ..., 'serial_number': ...'shift_count': {'mattina': ...,
+        mattina_rep': ..., 'pomeriggio': ..., 'weekend_rep': ...}, {...}]
+
+        Se il file non esiste lo crea inserendovi un array vuoto.
+        Alle righe di employees.json vengono applicate le modifiche registrate nel journal.
+        Ogni record riceve "days_off" con le ferie degli anni days_off_years (tutti gli anni se None): gli anni
+        esclusi possono essere letti in seguito con load_days_off()."""
+
+        state = self._load_journal_state()
+        if state is None:
+            return None
+
+        years = self.list_days_off_years() if days_off_years is None else sorted(set(days_off_years))
+        year_days_off = [self._load_days_off_year(state, year) for year in years]
+        with self.journal.lock:
+            return [
+                dict({key: value for key, value in record.items() if key != "journal_seq"},
+                     days_off=[day for days_off in year_days_off for day in sorted(days_off.get(emp_id, ()))])
+                for emp_id, record in state["employees"].items()
+            ]
+
+    def has_month_shifts(self, year, month):
+        """Ritorna True se esiste una programmazione salvata per il mese (consulta solo il manifest)."""
+        return int(month) in self.load_shifts_manifest()["months"].get(str(year), [])
+
+    def load_month_shifts(self, year, month):
+        """Carica la programmazione di un singolo mese: {"yyyy-mm-dd": {"mattina": [ids], ...}, ...}.
+        Legge solo lo shard del mese richiesto (dalla cache se il file non è cambiato), da non modificare.
+        Ritorna None se il mese non è stato salvato."""
+        # Si cerca prima lo shard nel formato configurato, poi quello nell'altro formato (mesi salvati prima del
+        # cambio di formato, convertiti al successivo salvataggio)
+        for shift_storage_format in (self.shift_storage_format, "json", "binary"):
+            shard_path = self._month_shard_path(year, month, shift_storage_format)
+            if os.path.exists(shard_path):
+                loader = self._read_binary_shard if shard_path.endswith(".bin") else None
+                return self._load_cached_file(shard_path, {}, loader)
+
+        # Anno archiviato: il segmento compresso viene decompresso solo alla prima richiesta di un suo mese
+        segment = self._load_archive(year)
+        if segment is not None:
+            return segment.get(str(int(month)))
+        return None
+
+    def save_employees_file(self, exported_employees_list, days_off_years=None):
+        """Salva gli impiegati e i loro attributi (dati in input).
+        Nel journal vengono registrate solo le differenze rispetto all'ultimo salvataggio (nuovi impiegati, delta dei
+        contatori, giorni di ferie aggiunti o rimossi); employees.json viene riscritto alla compattazione.
+        Le ferie vengono confrontate solo negli anni days_off_years (gli anni caricati in memoria; tutti se None):
+        le ferie salvate negli altri anni restano invariate."""
+        state = self._load_journal_state()
+        if state is None:
+            # employees.json illeggibile: viene sostituito per intero con la lista corrente
+            self._replace_file(self.file_path_employees, [])
+            state = self._load_journal_state()
+
+        if days_off_years is None:
+            years = set(self.list_days_off_years())
+            years.update(d.year for employee in exported_employees_list for d in employee.days_off)
+        else:
+            years = set(days_off_years)
+        year_days_off = [self._load_days_off_year(state, year) for year in sorted(years)]
+
+        operations = []
+        saved_ids = set()
+        with self.journal.lock:
+            for employee in exported_employees_list:
+                saved_ids.add(employee.id)
+                # JSON non gestisce gli oggetti. Conversione da oggetto datetime.date a stringa
+                days_off = [d.isoformat() for d in employee.days_off if d.year in years]
+                record = state["employees"].get(employee.id)
+
+                if record is None:
+                    operations.append({"op": "employee_set", "employee": {
+                        "id": employee.id,
+                        "surname": employee.surname,
+                        "name": employee.name,
+                        "serial_number": employee.serial_number,
+                        "days_off": days_off,
+                        "shift_count": dict(employee.shift_count)
+                    }})
+                    continue
+
+                if (record["surname"], record["name"], record["serial_number"]) != \
+                        (employee.surname, employee.name, employee.serial_number):
+                    # Anagrafica modificata: le ferie restano quelle salvate e vengono confrontate sotto
+                    operations.append({"op": "employee_set", "employee": {
+                        "id": employee.id,
+                        "surname": employee.surname,
+                        "name": employee.name,
+                        "serial_number": employee.serial_number,
+                        "shift_count": dict(employee.shift_count)
+                    }})
+                else:
+                    for shift_type, value in employee.shift_count.items():
+                        delta = value - record["shift_count"].get(shift_type, 0)
+                        if delta:
+                            operations.append({"op": "counter_delta", "employee_id": employee.id,
+                                               "shift_type": shift_type, "delta": delta})
+
+                previous_days_off = set().union(*(days.get(employee.id, ()) for days in year_days_off))
+                current_days_off = set(days_off)
+                if current_days_off != previous_days_off:
+                    operations.extend({"op": "day_off_added", "employee_id": employee.id, "day": day}
+                                      for day in sorted(current_days_off - previous_days_off))
+                    operations.extend({"op": "day_off_removed", "employee_id": employee.id, "day": day}
+                                      for day in sorted(previous_days_off - current_days_off))
+
+            operations.extend({"op": "employee_removed", "employee_id": emp_id}
+                              for emp_id in state["employees"] if emp_id not in saved_ids)
+
+        self._record_operations(operations)
+        print("SALVATAGGIO IMPIEGATI COMPLETATO")
+
+    def load_locked_shifts(self, year, month):
+        """Turni bloccati del mese: {(data_iso, emp_id): shift_type}."""
+        month_prefix = datetime.date(year, month, 1).isoformat()[:8]
+        state = self._load_history_state()
+        with self.journal.lock:
+            return {key: shift_type for key, shift_type in state["locks"].items() if key[0].startswith(month_prefix)}
+
+    def save_locked_shifts(self, year, month, locked_shifts):
+        """Sostituisce i turni bloccati del mese con quelli di locked_shifts ({(data_iso, emp_id): shift_type}),
+        registrando nel journal solo i lock aggiunti, modificati o rimossi."""
+        month_prefix = datetime.date(year, month, 1).isoformat()[:8]
+        previous_locks = self.load_locked_shifts(year, month)
+        current_locks = {key: shift_type for key, shift_type in locked_shifts.items()
+                         if key[0].startswith(month_prefix)}
+
+        operations = [{"op": "lock_set", "day": day, "employee_id": employee_id, "shift_type": shift_type}
+                      for (day, employee_id), shift_type in current_locks.items()
+                      if previous_locks.get((day, employee_id)) != shift_type]
+        operations.extend({"op": "lock_removed", "day": day, "employee_id": employee_id}
+                          for (day, employee_id) in previous_locks if (day, employee_id) not in current_locks)
+        self._record_operations(operations)
+
+    def save_shifts_file(self, exported_shifts_list):
+        """Salva i turni del mese nel relativo shard (./data/shifts/<anno>/<mese>.json) e aggiorna il manifest.
+        Trasforma gli oggetti datetime.date in stringhe e associa alle date gli IDs degli employees.
+        Gli altri mesi dello storico non vengono né letti né riscritti."""
         if not exported_shifts_list:
             print("Nessuna programmazione da salvare.")
             return None
@@ -199,23 +1175,451 @@ class JsonManager:
             month_schedule_json[date_to_string] = daily_shifts_schedule_json
         # print(month_schedule_json) # DEBUG
 
-        # Check dell'esistenza della key dell'anno di riferimento. Se non esiste la crea
-        if year_key not in schedule_to_save:
-            schedule_to_save[year_key] = {}
-
-        # Aggiunta del json-friendly dict generato al loaded
-        schedule_to_save[year_key][month_key] = month_schedule_json
-
-        # Scrittura della schedula mensile generata su shifts_storage.json
+        # Scrittura della schedula mensile generata nel suo shard e registrazione del mese nel journal
+        # (il manifest viene aggiornato alla compattazione)
         try:
-            with open(self.file_path_shifts_storage, "w") as f:
-                json.dump(schedule_to_save, f, indent=4)
-                print("SALVATAGGIO TURNI COMPLETATO")
+            self._write_month_shard(year_key, month_key, month_schedule_json)
+            self._record_operations([{"op": "month_committed", "year": int(year_key), "month": int(month_key)}])
+            print("SALVATAGGIO TURNI COMPLETATO")
         except (IOError, ValueError):
-            print(f"Errore durante il salvataggio di {self.file_path_shifts_storage}.")
+            print(f"Errore durante il salvataggio di {self._month_shard_path(year_key, month_key)}.")
+            # Rilanciato: chi salva (es. il PersistenceWorker) deve sapere che il mese non è su disco
+            raise
 
         return None
 
+class SqliteManager(StorageManager):
+    """Backend di persistenza su database SQLite (config.json -> files -> storage_backend = "sqlite").
+    Espone gli stessi metodi di JsonManager per impiegati e turni (config.json resta un file JSON), ma ogni lettura
+    e scrittura interessa solo le righe coinvolte grazie alle tabelle indicizzate:
+        - employees: anagrafica e contatori dei turni
+        - days_off: un giorno di ferie per riga
+        - schedule_days / assignments: giorni salvati e assegnazioni (giorno, turno, impiegato)
+        - locks: turni bloccati manualmente
+    Usa una sola connessione in modalità WAL. Alla creazione del database importa i dati JSON esistenti."""
+
+    SHIFT_TYPES = ("mattina", "mattina_rep", "pomeriggio", "weekend_rep")
+    SHIFT_COUNT_KEYS = ("mattina", "mattina_rep", "pomeriggio", "weekend_rep", "days_off")
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS employees (
+            id INTEGER PRIMARY KEY,
+            surname TEXT NOT NULL,
+            name TEXT NOT NULL,
+            serial_number TEXT,
+            mattina INTEGER NOT NULL DEFAULT 0,
+            mattina_rep INTEGER NOT NULL DEFAULT 0,
+            pomeriggio INTEGER NOT NULL DEFAULT 0,
+            weekend_rep INTEGER NOT NULL DEFAULT 0,
+            days_off INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS days_off (
+            employee_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            PRIMARY KEY (employee_id, day)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_days_off_day ON days_off (day);
+        CREATE TABLE IF NOT EXISTS schedule_days (
+            day TEXT PRIMARY KEY,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_schedule_days_month ON schedule_days (year, month);
+        CREATE TABLE IF NOT EXISTS assignments (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            shift_type TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            employee_id INTEGER NOT NULL,
+            PRIMARY KEY (year, month, day, shift_type, position)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_assignments_employee ON assignments (employee_id, shift_type, year);
+        CREATE TABLE IF NOT EXISTS locks (
+            day TEXT NOT NULL,
+            employee_id INTEGER NOT NULL,
+            shift_type TEXT NOT NULL,
+            PRIMARY KEY (day, employee_id)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, database_path=None):
+        # Solo la base comune: niente shard, manifest o journal JSON (letti solo da import_json_storage)
+        super().__init__()
+        self._directories_check()
+        self.file_path_database = database_path or os.path.join(self.directories[0], "shift_manager.db")
+        is_new_database = not os.path.exists(self.file_path_database)
+
+        # La connessione è condivisa tra il thread dell'interfaccia e quello dei salvataggi in background
+        # (PersistenceWorker): ogni uso avviene con _connection_lock, quindi una lettura non si intercala con le
+        # istruzioni di una transazione in corso né ne vede le modifiche parziali
+        self.connection = sqlite3.connect(self.file_path_database, check_same_thread=False)
+        self._connection_lock = threading.RLock()
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.SCHEMA)
+
+        if is_new_database:
+            self.import_json_storage(JsonManager())
+
+    def close(self):
+        with self._connection_lock:
+            self.connection.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Transazione (commit o rollback all'uscita) eseguita tenendo il lock della connessione."""
+        with self._connection_lock, self.connection:
+            yield self.connection
+
+    def import_json_storage(self, json_manager):
+        """Importa nel database impiegati e storico turni gestiti dal JsonManager dato
+        (employees.json e shard mensili, o shift_storage.json delle versioni precedenti)."""
+        employees_json = json_manager.load_employees_file() or []
+        self._write_employees(employees_json)
+
+        # Import un mese alla volta, senza caricare l'intero storico
+        with self._transaction():
+            for year_key, month_key, month_schedule_json in json_manager.iter_month_shifts():
+                self._write_month(int(year_key), int(month_key), month_schedule_json)
+
+        print(f"Importazione dei dati JSON in {self.file_path_database} completata")
+
+    @staticmethod
+    def _year_bounds(year):
+        return f"{int(year):04d}-01-01", f"{int(year):04d}-12-31"
+
+    def load_employees_file(self, days_off_years=None):
+        """Ritorna gli impiegati nello stesso formato di employees.json (days_off come stringhe ISO).
+        Le ferie sono limitate agli anni days_off_years (tutti se None), come in JsonManager."""
+        days_off_by_employee = {}
+        employees_json = []
+        query = f"SELECT id, surname, name, serial_number, {', '.join(self.SHIFT_COUNT_KEYS)} FROM employees ORDER BY id"
+        with self._connection_lock:
+            if days_off_years is None:
+                rows = self.connection.execute("SELECT employee_id, day FROM days_off ORDER BY day")
+            else:
+                rows = (row for year in sorted(set(days_off_years)) for row in self.connection.execute(
+                    "SELECT employee_id, day FROM days_off WHERE day BETWEEN ? AND ? ORDER BY day",
+                    self._year_bounds(year)))
+            for employee_id, day in rows:
+                days_off_by_employee.setdefault(employee_id, []).append(day)
+
+            for row in self.connection.execute(query):
+                employees_json.append({
+                    "id": row[0],
+                    "surname": row[1],
+                    "name": row[2],
+                    "serial_number": row[3],
+                    "days_off": days_off_by_employee.get(row[0], []),
+                    "shift_count": dict(zip(self.SHIFT_COUNT_KEYS, row[4:]))
+                })
+            return employees_json
+
+    def list_days_off_years(self):
+        with self._connection_lock:
+            return [int(year) for (year,) in self.connection.execute(
+                "SELECT DISTINCT substr(day, 1, 4) FROM days_off ORDER BY 1")]
+
+    def load_days_off(self, year):
+        """Ferie dell'anno: {emp_id: ["yyyy-mm-dd", ...]}."""
+        days_off = {}
+        with self._connection_lock:
+            for employee_id, day in self.connection.execute(
+                    "SELECT employee_id, day FROM days_off WHERE day BETWEEN ? AND ? ORDER BY day",
+                    self._year_bounds(year)):
+                days_off.setdefault(employee_id, []).append(day)
+            return days_off
+
+    def save_employees_file(self, exported_employees_list, days_off_years=None):
+        """Salva gli impiegati e i loro attributi nel database.
+        Vengono sostituite solo le ferie degli anni days_off_years (tutte se None)."""
+        years = None if days_off_years is None else set(days_off_years)
+        employees_json = [
+            {
+                "id": employee.id,
+                "surname": employee.surname,
+                "name": employee.name,
+                "serial_number": employee.serial_number,
+                "days_off": [d.isoformat() for d in employee.days_off if years is None or d.year in years],
+                "shift_count": employee.shift_count
+            }
+            for employee in exported_employees_list
+        ]
+        self._write_employees(employees_json, years)
+        print("SALVATAGGIO IMPIEGATI COMPLETATO")
+
+    def _write_employees(self, employees_json, days_off_years=None):
+        """Aggiorna solo le righe degli impiegati modificati e rimuove quelle degli impiegati eliminati."""
+        saved_ids = {emp["id"] for emp in employees_json}
+        with self._transaction():
+            removed_ids = [(employee_id,) for (employee_id,) in self.connection.execute("SELECT id FROM employees")
+                           if employee_id not in saved_ids]
+            self.connection.executemany("DELETE FROM employees WHERE id = ?", removed_ids)
+            # Ferie (anche degli anni non caricati) degli impiegati rimossi
+            self.connection.executemany("DELETE FROM days_off WHERE employee_id = ?", removed_ids)
+            if days_off_years is None:
+                self.connection.execute("DELETE FROM days_off")
+            else:
+                self.connection.executemany("DELETE FROM days_off WHERE day BETWEEN ? AND ?",
+                                            [self._year_bounds(year) for year in days_off_years])
+            columns = ("surname", "name", "serial_number", *self.SHIFT_COUNT_KEYS)
+            # Le righe invariate non vengono riscritte (clausola WHERE dell'upsert)
+            self.connection.executemany(
+                f"INSERT INTO employees (id, {', '.join(columns)}) VALUES ({', '.join('?' * (1 + len(columns)))}) "
+                f"ON CONFLICT(id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in columns)} "
+                f"WHERE {' OR '.join(f'employees.{c} IS NOT excluded.{c}' for c in columns)}",
+                [
+                    (emp["id"], emp["surname"], emp["name"], emp["serial_number"],
+                     *(emp["shift_count"].get(key, 0) for key in self.SHIFT_COUNT_KEYS))
+                    for emp in employees_json
+                ]
+            )
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO days_off (employee_id, day) VALUES (?, ?)",
+                [(emp["id"], day) for emp in employees_json for day in emp["days_off"]]
+            )
+
+    def load_shifts_manifest(self):
+        months = {}
+        with self._connection_lock:
+            for year, month in self.connection.execute(
+                    "SELECT DISTINCT year, month FROM schedule_days ORDER BY year, month"):
+                months.setdefault(str(year), []).append(month)
+            return {"months": months}
+
+    def load_shifts_file(self):
+        """Ritorna l'intero storico dei turni nello stesso formato di JsonManager.load_shifts_file()."""
+        schedule_database = {}
+        for year_key, months in self.load_shifts_manifest()["months"].items():
+            for month in months:
+                schedule_database.setdefault(year_key, {})[str(month)] = self.load_month_shifts(int(year_key), month)
+        return schedule_database
+
+    def has_month_shifts(self, year, month):
+        with self._connection_lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM schedule_days WHERE year = ? AND month = ? LIMIT 1", (int(year), int(month))
+            ).fetchone()
+            return row is not None
+
+    def load_month_shifts(self, year, month):
+        """Carica la programmazione di un singolo mese (stesso formato degli shard JSON).
+        Ritorna None se il mese non è stato salvato."""
+        with self._connection_lock:
+            month_schedule_json = {
+                day: {shift_type: [] for shift_type in self.SHIFT_TYPES}
+                for (day,) in self.connection.execute(
+                    "SELECT day FROM schedule_days WHERE year = ? AND month = ? ORDER BY day", (int(year), int(month)))
+            }
+            if not month_schedule_json:
+                return None
+
+            for day, shift_type, employee_id in self.connection.execute(
+                    "SELECT day, shift_type, employee_id FROM assignments WHERE year = ? AND month = ? "
+                    "ORDER BY day, shift_type, position", (int(year), int(month))):
+                month_schedule_json[day].setdefault(shift_type, []).append(employee_id)
+            return month_schedule_json
+
+    def save_shifts_file(self, exported_shifts_list):
+        """Salva i turni del mese sostituendo solo le righe del mese nel database."""
+        if not exported_shifts_list:
+            print("Nessuna programmazione da salvare.")
+            return None
+
+        first_date = next(iter(exported_shifts_list))
+        month_schedule_json = {
+            date_objects.isoformat(): {
+                shift_type: [emp.id for emp in list_of_employees]
+                for shift_type, list_of_employees in daily_shifts_dicts.items()
+            }
+            for date_objects, daily_shifts_dicts in exported_shifts_list.items()
+        }
+
+        try:
+            with self._transaction():
+                self._write_month(first_date.year, first_date.month, month_schedule_json)
+            print("SALVATAGGIO TURNI COMPLETATO")
+        except sqlite3.Error:
+            print(f"Errore durante il salvataggio dei turni in {self.file_path_database}.")
+            raise
+        return None
+
+    def _write_month(self, year, month, month_schedule_json):
+        """Sostituisce le righe del mese (da eseguire all'interno di una transazione)."""
+        self.connection.execute("DELETE FROM schedule_days WHERE year = ? AND month = ?", (year, month))
+        self.connection.execute("DELETE FROM assignments WHERE year = ? AND month = ?", (year, month))
+        self.connection.executemany(
+            "INSERT INTO schedule_days (day, year, month) VALUES (?, ?, ?)",
+            [(day, year, month) for day in month_schedule_json]
+        )
+        self.connection.executemany(
+            "INSERT INTO assignments (year, month, day, shift_type, position, employee_id) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (year, month, day, shift_type, position, employee_id)
+                for day, daily_shifts in month_schedule_json.items()
+                for shift_type, employee_ids in daily_shifts.items()
+                for position, employee_id in enumerate(employee_ids)
+            ]
+        )
+
+    def load_employee_shifts(self, employee_id, year, shift_type=None):
+        """Giorni (stringhe ISO) in cui l'impiegato ha svolto turni nell'anno, eventualmente di un solo tipo.
+        Es. tutte le reperibilità weekend dell'impiegato 42 nel 2024: load_employee_shifts(42, 2024, "weekend_rep")."""
+        with self._connection_lock:
+            if shift_type is None:
+                rows = self.connection.execute(
+                    "SELECT day FROM assignments WHERE employee_id = ? AND year = ? ORDER BY day", (employee_id, year))
+            else:
+                rows = self.connection.execute(
+                    "SELECT day FROM assignments WHERE employee_id = ? AND shift_type = ? AND year = ? ORDER BY day",
+                    (employee_id, shift_type, year))
+            return [day for (day,) in rows]
+
+    def load_locked_shifts(self, year, month):
+        """Turni bloccati del mese: {(data_iso, emp_id): shift_type}."""
+        first_day = datetime.date(year, month, 1).isoformat()
+        last_day = f"{first_day[:8]}31"
+        with self._connection_lock:
+            return {
+                (day, employee_id): shift_type
+                for day, employee_id, shift_type in self.connection.execute(
+                    "SELECT day, employee_id, shift_type FROM locks WHERE day BETWEEN ? AND ?", (first_day, last_day))
+            }
+
+    def save_locked_shifts(self, year, month, locked_shifts):
+        """Sostituisce i turni bloccati del mese con quelli di locked_shifts ({(data_iso, emp_id): shift_type})."""
+        first_day = datetime.date(year, month, 1).isoformat()
+        last_day = f"{first_day[:8]}31"
+        with self._transaction():
+            self.connection.execute("DELETE FROM locks WHERE day BETWEEN ? AND ?", (first_day, last_day))
+            self.connection.executemany(
+                "INSERT INTO locks (day, employee_id, shift_type) VALUES (?, ?, ?)",
+                [
+                    (day, employee_id, shift_type)
+                    for (day, employee_id), shift_type in locked_shifts.items()
+                    if first_day <= day <= last_day
+                ]
+            )
+
+
+class PersistenceWorker:
+    """Esegue i salvataggi (save_shifts_file, save_employees_file, ...) in un thread in background, in modo che
+    l'interfaccia Tk non resti bloccata durante la serializzazione e la scrittura dei file.
+    I lavori vengono eseguiti uno alla volta, nell'ordine di invio. Un lavoro inviato con la stessa chiave di uno
+    ancora in coda lo sostituisce (conta solo l'ultimo salvataggio), mantenendo la posizione in coda.
+    Le callback di completamento non vengono eseguite dal thread in background ma da dispatch_completed(), da
+    chiamare periodicamente nel thread dell'interfaccia (es. con Tk.after())."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._queue = queue.Queue()
+        self._pending = {}  # {chiave: (funzione, argomenti, callbacks)} dei lavori in coda
+        self._unfinished = 0  # Lavori in coda o in esecuzione
+        self._completed = queue.Queue()  # (callback, errore) da eseguire nel thread dell'interfaccia
+        self.coalesced = 0  # Salvataggi sostituiti da uno successivo prima di essere eseguiti
+        self.last_error = None  # Errore dell'ultimo lavoro fallito (None dopo un lavoro riuscito)
+        self._idle_callbacks = []  # Callback di when_idle() in attesa che la coda si svuoti
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, key, function, *args, callback=None):
+        """Accoda function(*args). callback(errore), se indicata, viene eseguita da dispatch_completed() al termine
+        del lavoro (errore è None se il salvataggio è riuscito). Gli argomenti non devono essere modificati dal
+        chiamante dopo l'invio: passare una copia dei dati."""
+        with self._condition:
+            callbacks = []
+            if key in self._pending:
+                callbacks = self._pending[key][2]
+                self.coalesced += 1
+            else:
+                self._queue.put(key)
+                self._unfinished += 1
+            if callback is not None:
+                callbacks.append(callback)
+            self._pending[key] = (function, args, callbacks)
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            if key is None:
+                return
+            with self._condition:
+                function, args, callbacks = self._pending.pop(key)
+            try:
+                function(*args)
+                error = None
+            except Exception as e:
+                print(f"Errore durante il salvataggio in background: {e}")
+                error = e
+            with self._condition:
+                self._unfinished -= 1
+                self.last_error = error
+                idle_callbacks = []
+                if self._unfinished == 0:
+                    idle_callbacks, self._idle_callbacks = self._idle_callbacks, []
+                self._condition.notify_all()
+                # Sotto il lock: una when_idle() concorrente non può essere eseguita prima di queste callback
+                for callback in callbacks:
+                    self._completed.put((callback, error))
+                for callback in idle_callbacks:
+                    self._completed.put((lambda error, callback=callback: callback(), None))
+
+    def pending_count(self):
+        """Numero di salvataggi in coda o in esecuzione (0: tutte le modifiche inviate sono su disco)."""
+        with self._condition:
+            return self._unfinished
+
+    def dispatch_completed(self):
+        """Esegue, nel thread chiamante, le callback dei lavori completati. Ritorna il numero di callback eseguite."""
+        n_of_callbacks = 0
+        while True:
+            try:
+                callback, error = self._completed.get_nowait()
+            except queue.Empty:
+                return n_of_callbacks
+            callback(error)
+            n_of_callbacks += 1
+
+    def when_idle(self, callback):
+        """Esegue callback() da dispatch_completed() appena i salvataggi inviati finora sono completati (al prossimo
+        dispatch_completed() se la coda è già vuota). A differenza di flush() non blocca il thread chiamante: è il
+        modo di attendere i salvataggi dal thread dell'interfaccia prima di rileggere lo storico."""
+        with self._condition:
+            if self._unfinished == 0:
+                self._completed.put((lambda error: callback(), None))
+            else:
+                self._idle_callbacks.append(callback)
+
+    def flush(self, timeout=None):
+        """Attende il completamento dei salvataggi in coda. Ritorna False se scade il timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def close(self, timeout=None):
+        """Completa i salvataggi in coda e termina il thread."""
+        self.flush(timeout)
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+def create_storage_manager(config_dict, json_manager=None):
+    """Ritorna il gestore di persistenza scelto in config.json -> files -> storage_backend ("json" o "sqlite").
+    json_manager, se indicato, viene riutilizzato per il backend JSON."""
+    files_config = config_dict.get("files", {})
+    if files_config.get("storage_backend", "json") == "sqlite":
+        database_path = files_config.get("sqlite_database_file")
+        # I percorsi in config.json possono usare il separatore Windows: "/" è valido su ogni sistema
+        return SqliteManager(database_path.replace("\\", "/") if database_path else None)
+
+    shift_storage_format = files_config.get("shift_storage_format", "json")
+    archive_compression = files_config.get("archive_compression", "lzma")
+    if json_manager is not None and (json_manager.shift_storage_format, json_manager.archive_compression) == \
+            (shift_storage_format, archive_compression):
+        return json_manager
+    return JsonManager(shift_storage_format=shift_storage_format, archive_compression=archive_compression)
+
+
 def resource_path(relative_path):
     """Get absolute path to resource, works for dev and for PyInstaller"""
     try:
@@ -6,8 +6,7 @@ from tkinter import filedialog
 import datetime
 import library
 import file_manager
-from exporter import Exporter
-import copy
+from exporter import Exporter, PeriodExporter
 
 FILE_VERSION = "2.2"
 
@@ -159,6 +158,12 @@ class ShiftManagerGui(tk.Tk):
             # Aggiorna i dati nel backend (locked_shifts e days_off) e i contatori
             # Necessario riferimento alla GUI principale per locked_shifts
             main_gui = self.winfo_toplevel()
+
+            # Se la schedula del mese è in memoria si ripianifica solo il giorno modificato
+            schedule = getattr(main_gui, "currently_displayed_schedule", None)
+            if schedule and date_obj in schedule:
+                self._apply_manual_change_incrementally(main_gui, schedule, employee, date_obj, new_val, col_index)
+                return
             
             # Chiave per locked_shifts
             lock_key = (date_obj.isoformat(), employee.id)
@@ -238,6 +243,75 @@ class ShiftManagerGui(tk.Tk):
             if hasattr(main_gui, "employees_table_manager"):
                 main_gui.employees_table_manager.employees_populate_table()
 
+        def _apply_manual_change_incrementally(self, main_gui, schedule, employee, date_obj, new_val, col_index):
+            """Applica la modifica manuale (lock o ferie) e ripianifica solo il giorno interessato tramite
+            ShiftManager.repair_schedule, aggiornando le sole celle cambiate. I contatori dei turni restano
+            allineati alla schedula in memoria, che può essere salvata senza rigenerare il mese."""
+            lock_key = (date_obj.isoformat(), employee.id)
+            shift_map = {v: k for k, v in self.SHIFTS_CORRISPONDANCE.items()}
+
+            # 1. Rimuovi stato precedente (ferie e lock)
+            if date_obj in employee.days_off:
+                employee.days_off.remove(date_obj)
+                self._update_shift_count(employee, "off_duty", -1)
+            if lock_key in main_gui.locked_shifts:
+                del main_gui.locked_shifts[lock_key]
+
+            # 2. Applica nuovo stato
+            if new_val == "X":
+                employee.days_off.append(date_obj)
+                self._update_shift_count(employee, "off_duty", 1)
+                main_gui.locked_shifts[lock_key] = "off_duty"
+            elif new_val in shift_map:
+                main_gui.locked_shifts[lock_key] = shift_map[new_val]
+
+            # 3. Ripianificazione del solo giorno modificato
+            changed_ids = main_gui.schedule_manager.repair_schedule(
+                schedule,
+                date_obj,
+                self.configuration,
+                locked_shifts=main_gui.locked_shifts,
+                employees_list=self.emp_list
+            )
+            changed_ids.add(employee.id)
+            main_gui.generated_schedule = schedule  # La schedula modificata è salvabile con "Salva"
+
+            # 4. Aggiorna solo le celle cambiate
+            daily_shifts = {shift_type: [emp.id for emp in emps] for shift_type, emps in schedule[date_obj].items()}
+            for emp_id in changed_ids:
+                if emp_id not in self.employee_rows:
+                    continue
+                row_id, changed_employee = self.employee_rows[emp_id]
+                row_values = list(self.schedule_table.item(row_id, "values"))
+                row_values[col_index] = self._shift_text(
+                    main_gui.locked_shifts.for_employee(emp_id), changed_employee, date_obj, daily_shifts
+                )
+                self.schedule_table.item(row_id, values=row_values)
+
+            # Aggiorna tabella impiegati
+            if hasattr(main_gui, "employees_table_manager"):
+                main_gui.employees_table_manager.employees_populate_table(employees_list=self.emp_list)
+
+        def _shift_text(self, employee_locks, employee, current_date, daily_shifts):
+            """Testo della cella di un impiegato in un certo giorno.
+            Priorità: turno bloccato, ferie, schedula (daily_shifts in formato {shift_type: [emp_ids]})."""
+            day_key_str_format = current_date.isoformat()
+
+            # FIRST check if there's a locked shift for this employee on this day
+            if day_key_str_format in employee_locks:
+                return self.SHIFTS_CORRISPONDANCE.get(employee_locks[day_key_str_format], "")
+            # THEN check if employee is off-duty (from days_off list)
+            if current_date in employee.days_off:
+                return self.SHIFTS_CORRISPONDANCE["off_duty"]
+            # FINALLY check the generated schedule
+            if daily_shifts:
+                if employee.id in daily_shifts["mattina_rep"]:
+                    return self.SHIFTS_CORRISPONDANCE["mattina_rep"]
+                for shift_type, emp_ids in daily_shifts.items():
+                    if employee.id in emp_ids:
+                        return self.SHIFTS_CORRISPONDANCE[shift_type]
+            return ""
+
         def _update_shift_count(self, employee, shift_type, delta):
             if shift_type in employee.shift_count:
                 employee.shift_count[shift_type] += delta
@@ -307,40 +381,26 @@ class ShiftManagerGui(tk.Tk):
             if employees_list is not None:
                 self.emp_list = employees_list
 
+            # Get reference to main GUI to access locked_shifts
+            main_gui = self.winfo_toplevel()
+            locked_shifts = getattr(main_gui, "locked_shifts", None)
+
+            # Riga della tabella associata a ciascun impiegato, per aggiornare le singole celle dopo una modifica
+            self.employee_rows = {}
+            month_dates = [datetime.date(year, month, day) for day in range(1, number_of_days + 1)]
+
             for employee in current_emp_list:
                 row_values = [employee.serial_number, employee.surname, employee.name]
-                for day in range(1, number_of_days + 1):
-                    current_date = datetime.date(year, month, day)
-                    day_key_str_format = current_date.isoformat()
-                    shift_text = ""  # Default to blank
-                    
-                    # Get reference to main GUI to access locked_shifts
-                    main_gui = self.winfo_toplevel()
-                    lock_key = (day_key_str_format, employee.id)
-                    
-                    # FIRST check if there's a locked shift for this employee on this day
-                    if hasattr(main_gui, 'locked_shifts') and lock_key in main_gui.locked_shifts:
-                        locked_shift_type = main_gui.locked_shifts[lock_key]
-                        shift_text = self.SHIFTS_CORRISPONDANCE.get(locked_shift_type, "")
-                    # THEN check if employee is off-duty (from days_off list)
-                    elif current_date in employee.days_off:
-                        shift_text = self.SHIFTS_CORRISPONDANCE["off_duty"]
-                    # FINALLY check the generated schedule
-                    elif schedule_data and day_key_str_format in schedule_data:
-                        daily_shifts = schedule_data[day_key_str_format]
-                        # print(f"{day_key_str_format} - {daily_shifts.items()}")
-                        if employee.id in daily_shifts["mattina_rep"]:
-                            shift_text = self.SHIFTS_CORRISPONDANCE["mattina_rep"]
-                        else:
-                            for shift_type, emp_ids in daily_shifts.items():
-                                # print(f"day: {day_key_str_format} - shift_type: {shift_type} - emp_ids {emp_ids}")
-                                if employee.id in emp_ids:
-                                    shift_text = self.SHIFTS_CORRISPONDANCE[shift_type]
-                                    break  # Non è necessario ricercare ulteriormente una volta trovato l'employee
-
-                    row_values.append(shift_text)
-
-                self.schedule_table.insert("", "end", values=row_values)
+
+                # Lock dell'impiegato letti una sola volta tramite l'indice per employee
+                employee_locks = locked_shifts.for_employee(employee.id) if locked_shifts else {}
+
+                for current_date in month_dates:
+                    daily_shifts = schedule_data.get(current_date.isoformat()) if schedule_data else None
+                    row_values.append(self._shift_text(employee_locks, employee, current_date, daily_shifts))
+
+                row_id = self.schedule_table.insert("", "end", values=row_values)
+                self.employee_rows[employee.id] = (row_id, employee)
 
     class EmployeeTable(ttk.Frame):
         """A custom widget that encapsulates a Treeview for displaying the employees list.
@@ -585,6 +645,109 @@ class ShiftManagerGui(tk.Tk):
             if new_employee_added:
                 self._command_clear_fields()
 
+    class ExportPeriodDialogWindow(tk.Toplevel):
+        """Classe di gestione della finestra di dialogo per scegliere i mesi da esportare dallo storico"""
+
+        def __init__(self, master_frame, years, default_year, export_format, callback_export_period):
+            super().__init__(master_frame)
+
+            self.master_frame = master_frame
+            self.years = years  # Anni selezionabili (str)
+            self.default_year = default_year
+            self.export_format = export_format
+            self.callback_export_period = callback_export_period
+
+            self._root_setting()
+            self._frame_setting()
+            self._widget_setting()
+
+            self.transient(self.master_frame)  # Permette l'utilizzo della "X" per chiudere la finestra
+            self.grab_set()  # Impedisce all'user di utilizzare la finestra sottostante
+
+        def _root_setting(self):
+            self._center_window()
+            self.title(f"Esporta Periodo ({self.export_format.upper()})")
+            self.resizable(False, False)  # Impedisce all'user di ridimensionare la finestra
+
+        def _center_window(self):
+            """Centers the Toplevel window on the screen."""
+
+            # This is needed to ensure that the window's dimensions are updated
+            # before we try to get them.
+            self.update_idletasks()
+
+            # Storage delle dimensioni dello schermo
+            screen_x = self.winfo_screenwidth()
+            screen_y = self.winfo_screenheight()
+
+            dialog_window_x = self.winfo_width()
+            dialog_window_y = self.winfo_height()
+
+            center_x = int((screen_x / 2) - (dialog_window_x / 2))
+            center_y = int((screen_y / 2) - (dialog_window_y / 2))
+
+            self.geometry(f"-{center_x}+{center_y}")
+
+        def _frame_setting(self):
+            self.frame_master = ttk.Frame(self)
+            self.frame_master.pack(expand=True, fill="both")
+            self.frame_master.columnconfigure((0, 1, 2), weight=1)
+
+        def _widget_setting(self):
+            # LABEL
+            label_from = ttk.Label(self.frame_master, text="Da")
+            label_to = ttk.Label(self.frame_master, text="A")
+
+            label_from.grid(row=0, column=0, sticky="e")
+            label_to.grid(row=1, column=0, sticky="e")
+
+            # COMBOBOX (default: l'intero anno selezionato nella vista turni)
+            self.box_month_from = ttk.Combobox(self.frame_master, values=MONTHS[1:], state="readonly", width=10)
+            self.box_year_from = ttk.Combobox(self.frame_master, values=self.years, state="readonly", width=5)
+            self.box_month_to = ttk.Combobox(self.frame_master, values=MONTHS[1:], state="readonly", width=10)
+            self.box_year_to = ttk.Combobox(self.frame_master, values=self.years, state="readonly", width=5)
+            self.box_month_from.set(MONTHS[1])
+            self.box_year_from.set(self.default_year)
+            self.box_month_to.set(MONTHS[12])
+            self.box_year_to.set(self.default_year)
+
+            self.box_month_from.grid(row=0, column=1, sticky="ew", padx=10, pady=5)
+            self.box_year_from.grid(row=0, column=2, sticky="ew", padx=10, pady=5)
+            self.box_month_to.grid(row=1, column=1, sticky="ew", padx=10, pady=5)
+            self.box_year_to.grid(row=1, column=2, sticky="ew", padx=10, pady=5)
+
+            # BUTTON
+            button_export = ttk.Button(
+                self.frame_master,
+                text="Esporta",
+                command=self._command_export_period
+            )
+            button_close = ttk.Button(
+                self.frame_master,
+                text="Chiudi",
+                command=self.destroy  # Chiude la finestra di dialogo
+            )
+
+            button_export.grid(row=2, column=1, pady=10)
+            button_close.grid(row=2, column=2, pady=10, padx=10)
+
+        def _command_export_period(self):
+            """Validates the range and calls the callback with the (anno, mese) pairs to export."""
+            start_year = int(self.box_year_from.get())
+            start_month = MONTHS.index(self.box_month_from.get())
+            end_year = int(self.box_year_to.get())
+            end_month = MONTHS.index(self.box_month_to.get())
+
+            # Input Validation
+            n_of_months = (end_year - start_year) * 12 + end_month - start_month + 1
+            if n_of_months < 1:
+                messagebox.showerror("Errore", "Il mese finale precede quello iniziale", parent=self)
+                return
+
+            months = list(library.months_range(start_year, start_month, n_of_months))
+            self.destroy()
+            self.callback_export_period(months, self.export_format)
+
     class InfoDialogWindow(tk.Toplevel):
         """Classe che consente di visualizare la finestra di info."""
 
@@ -922,7 +1085,7 @@ class ShiftManagerGui(tk.Tk):
     def __init__(self,
                  employees_manager: library.EmployeesManager,
                  schedule_manager: library.ShiftManager,
-                 json_manager: file_manager.JsonManager,
+                 json_manager: file_manager.StorageManager,
                  config_json_file):
         super().__init__()
 
@@ -939,12 +1102,22 @@ class ShiftManagerGui(tk.Tk):
         self.current_month = today.month
 
         self.temp_employees_list = None # Initialize temp list
-        self.locked_shifts = {} # Initialize locked shifts
+        self.draft_session = None  # Bozza (library.DraftSession) della generazione non ancora salvata
+        self.locked_shifts = library.ShiftLocks() # Initialize locked shifts (indexed by date and employee)
         self.currently_displayed_schedule = None # Initialize currently displayed schedule
         self.SHIFTS_CORRISPONDANCE = self.configuration["shift_settings"]["shift_representation"]
         self.current_displayed_year = None # Track which month is currently displayed
         self.current_displayed_month = None # Track which month is currently displayed
 
+        # Salvataggi eseguiti in background: la finestra resta reattiva durante la scrittura dei file
+        self.persistence_worker = file_manager.PersistenceWorker()
+        self.persistence_status = tk.StringVar()
+        self._actions_after_saves = []  # Azioni che leggono lo storico, in attesa dei salvataggi in coda
+
+        # Con "candidates" > 1 i processi worker della generazione vengono avviati subito e riusati a ogni
+        # "Genera Turni" (il pool viene chiuso in main.py all'uscita)
+        self.schedule_manager.start_process_pool(self.configuration["shift_settings"].get("candidates", 1))
+
         self._frame_setting()  # Creazione dei frame
 
         # Popolazione dei frame
@@ -955,6 +1128,8 @@ class ShiftManagerGui(tk.Tk):
 
         self._show_view("shifts")  # Imposta la schermata iniziale (shift schedule)
 
+        self._poll_persistence()  # Avvia l'aggiornamento dello stato dei salvataggi
+
     def _frame_setting(self):
         # Creazione master frame su root
         self.frame_master = ttk.Frame(self)
@@ -1025,6 +1200,19 @@ class ShiftManagerGui(tk.Tk):
             label="Excel (.xlsx)",
             command=lambda: self._command_export("xlsx")
         )
+        submenu_export.add_separator()
+        submenu_export.add_command(
+            label="Periodo - Excel, un foglio per mese (.xlsx)",
+            command=lambda: self._command_export_period("xlsx")
+        )
+        submenu_export.add_command(
+            label="Periodo - CSV unico",
+            command=lambda: self._command_export_period("csv")
+        )
+        submenu_export.add_command(
+            label="Periodo - Calendari per impiegato (.ics)",
+            command=lambda: self._command_export_period("ics")
+        )
 
         submenu_other = tk.Menu(master=menu_bar, tearoff=False)
         menu_bar.add_cascade(label="Info", menu=submenu_other)
@@ -1097,8 +1285,75 @@ class ShiftManagerGui(tk.Tk):
             messagebox.showerror("Errore", "Impiegato già presente nella lista.")
             return False
 
+    # +++ SALVATAGGI IN BACKGROUND +++
+    PERSISTENCE_POLL_MS = 100  # Intervallo di controllo dei salvataggi completati
+
+    def _poll_persistence(self):
+        """Esegue (nel thread Tk) le callback dei salvataggi completati e aggiorna lo stato dei salvataggi."""
+        self.persistence_worker.dispatch_completed()
+        n_of_pending = self.persistence_worker.pending_count()
+        if n_of_pending and self._actions_after_saves:
+            self.persistence_status.set(f"Salvataggio in corso... ({n_of_pending} in coda), "
+                                        f"la lettura dello storico riprende al termine")
+        elif n_of_pending:
+            self.persistence_status.set(f"Salvataggio in corso... ({n_of_pending} in coda)")
+        elif self.persistence_worker.last_error is not None:
+            self.persistence_status.set("Ultimo salvataggio non riuscito: modifiche non scritte su disco")
+        else:
+            self.persistence_status.set("Tutte le modifiche sono salvate su disco")
+        self.after(self.PERSISTENCE_POLL_MS, self._poll_persistence)
+
+    def _save_in_background(self, key, save_function, *data, on_saved=None):
+        """Accoda un salvataggio al PersistenceWorker. data deve essere una copia non più modificata dalla GUI.
+        on_saved viene eseguita nel thread Tk a salvataggio riuscito; in caso di errore viene mostrato un messaggio."""
+        def on_completed(error):
+            if error is not None:
+                messagebox.showerror("Errore di Salvataggio", f"Salvataggio non riuscito:\n{error}", parent=self)
+            elif on_saved is not None:
+                on_saved()
+
+        self.persistence_worker.submit(key, save_function, *data, callback=on_completed)
+
+    def _after_pending_saves(self, action):
+        """Esegue action() nel thread Tk dopo i salvataggi in coda, senza bloccare la finestra: subito se non ci sono
+        salvataggi in corso, altrimenti dalla callback PersistenceWorker.when_idle(). Le azioni che leggono lo storico
+        (visualizza, genera, esporta) passano da qui e vengono eseguite nell'ordine di richiesta."""
+        self._actions_after_saves.append(action)
+        if len(self._actions_after_saves) == 1:
+            self._run_actions_after_saves()
+
+    def _run_actions_after_saves(self):
+        while self._actions_after_saves:
+            if self.persistence_worker.pending_count():
+                # Anche un'azione appena eseguita può aver accodato salvataggi: le successive li attendono
+                self.persistence_worker.when_idle(self._run_actions_after_saves)
+                return
+            # L'azione resta in lista durante l'esecuzione: le richieste fatte nel frattempo vengono solo accodate
+            try:
+                self._actions_after_saves[0]()
+            finally:
+                self._actions_after_saves.pop(0)
+
+    @staticmethod
+    def _schedule_snapshot(schedule):
+        """Copia della schedula da salvare: le modifiche manuali successive non interessano il salvataggio in corso."""
+        return {day: {shift_type: list(employees) for shift_type, employees in daily_shifts.items()}
+                for day, daily_shifts in schedule.items()}
+
+    def _save_employees_in_background(self, on_saved=None):
+        """Salva in background una copia della lista impiegati (contatori e ferie degli anni caricati)."""
+        self._save_in_background("employees",
+                                 self.json_manager.save_employees_file,
+                                 [employee.copy() for employee in self.employees_manager.export_employees_list()],
+                                 self.employees_manager.loaded_days_off_years(),
+                                 on_saved=on_saved)
+
     def _command_schedule_view(self):
         """Event handler per il tasto 'Visualizza'"""
+        self._after_pending_saves(self._schedule_view)
+
+    def _schedule_view(self):
+        """Visualizza il mese selezionato leggendolo dallo storico (con i salvataggi in coda già completati)."""
 
         selected_year_str = self.box_year_selection.get()
         selected_month_str = self.box_month_selection.get()
@@ -1111,16 +1366,19 @@ class ShiftManagerGui(tk.Tk):
         # Setta reset di self.generated_schedule per evitare di salvare un mese mentre se ne visualizza un altro
         self.generated_schedule = None
         self.temp_employees_list = None # Clear any temp list from previous unsaved generations
+        self.draft_session = None
         
         # Only clear locked_shifts if we're viewing a DIFFERENT month
         # This preserves manual assignments when viewing the same month
         if (self.current_displayed_year != selected_year_int or 
             self.current_displayed_month != selected_month_int):
-            self.locked_shifts = {} # Reset manual locks when viewing a new schedule
+            self.locked_shifts.clear() # Reset manual locks when viewing a new schedule
+            # Turni bloccati salvati insieme al mese (vedi _command_schedule_save)
+            self.locked_shifts.update(self.json_manager.load_locked_shifts(selected_year_int, selected_month_int))
+        self.employees_manager.load_days_off_years([selected_year_int])  # Ferie mostrate nella tabella
 
-        schedule_database = self.json_manager.load_shifts_file()
-
-        schedule_of_selected_month = schedule_database.get(selected_year_str, {}).get(str(selected_month_int))
+        # Lettura del solo mese selezionato (shard mensile), indipendentemente dalla lunghezza dello storico
+        schedule_of_selected_month = self.json_manager.load_month_shifts(selected_year_int, selected_month_int)
 
         if not schedule_of_selected_month:
             error_message = messagebox.showwarning(
@@ -1140,7 +1398,8 @@ class ShiftManagerGui(tk.Tk):
         self.schedule_table_manager.schedule_populate_table(
             schedule_data=schedule_of_selected_month,
             year=selected_year_int,
-            month=selected_month_int
+            month=selected_month_int,
+            employees_list=self.employees_manager.emp_list
         )
         
         # Track the currently displayed month
@@ -1149,6 +1408,10 @@ class ShiftManagerGui(tk.Tk):
 
     def _command_schedule_generate(self):
         """Generates a new schedule, asking for confirmation if one already exists."""
+        self._after_pending_saves(self._schedule_generate)
+
+    def _schedule_generate(self):
+        """Genera il mese selezionato (con i salvataggi in coda già completati)."""
 
         selected_year_str = self.box_year_selection.get()
         selected_month_str = self.box_month_selection.get()
@@ -1158,15 +1421,9 @@ class ShiftManagerGui(tk.Tk):
         # Conversione mese da formato str a int
         selected_month_int = MONTHS.index(selected_month_str)
 
-        # Caricamento dello storico di tutte le schedule da shift_storage.json
-        schedule_database = self.json_manager.load_shifts_file()
-
-        # Verifica l'esistenza di un turno generato nello stesso periodo
+        # Verifica l'esistenza di un turno generato nello stesso periodo (dal manifest dello storico)
         # Se presente ne richiede la sovrascrizione
-        # str(selected_month_int) perché nel database.json il mese è salvato come numero, ma in formato str
-        schedule_already_exists = False
-        if selected_year_str in schedule_database and str(selected_month_int) in schedule_database[selected_year_str]:
-            schedule_already_exists = True
+        schedule_already_exists = self.json_manager.has_month_shifts(selected_year_int, selected_month_int)
 
         # Se il turno è stato già generato chiede la conferma della sovrascrizione
         if schedule_already_exists:
@@ -1210,14 +1467,20 @@ class ShiftManagerGui(tk.Tk):
         # 2. Incrementare i contatori per i locked shifts.
         # 3. Assegnare il resto.
         
-        # Create a temporary copy of the employee list for this generation session
-        # This prevents the main list from being updated until the user explicitly saves
-        self.temp_employees_list = copy.deepcopy(self.employees_manager.emp_list)
-
-        is_generated = self.schedule_manager.shift_assignator(
+        # Bozza della lista impiegati per questa sessione di generazione: contatori e ferie modificati restano
+        # nella bozza finché l'utente non salva, senza copiare l'intero roster.
+        # Le ferie dell'anno vengono caricate prima della bozza, se l'anno non è tra quelli letti all'avvio
+        self.employees_manager.load_days_off_years([selected_year_int])
+        self.draft_session = library.DraftSession(self.employees_manager.emp_list)
+        self.temp_employees_list = self.draft_session.employees
+
+        # Con "candidates" > 1 vengono generate più programmazioni in parallelo e si tiene la più equa
+        is_generated = self.schedule_manager.best_of_n_shift_assignator(
             selected_year_int,
             selected_month_int,
             self.configuration,
+            n_candidates=self.configuration["shift_settings"].get("candidates", 1),
+            time_budget=self.configuration["shift_settings"].get("time_budget"),
             locked_shifts=self.locked_shifts,
             employees_list=self.temp_employees_list
         )
@@ -1230,6 +1493,7 @@ class ShiftManagerGui(tk.Tk):
                 parent=self
             )
             self.temp_employees_list = None # Clear temp list on failure
+            self.draft_session = None
             return None
 
         # Storage dei turni appena generati
@@ -1256,6 +1520,91 @@ class ShiftManagerGui(tk.Tk):
                             f"{selected_year_str} generata con successo.")
         return None
 
+    def _command_schedule_generate_year(self):
+        """Genera e salva in un'unica operazione la programmazione di tutti i mesi dell'anno selezionato."""
+
+        selected_year_str = self.box_year_selection.get()
+        selected_year_int = int(selected_year_str)
+
+        confirm = messagebox.askyesno(
+            title="Genera Anno",
+            message=f"Generare e salvare la programmazione di tutti i mesi del {selected_year_str}?\n"
+                    f"Le programmazioni già presenti per l'anno verranno sovrascritte.",
+            parent=self
+        )
+        if not confirm:
+            return None
+
+        self._after_pending_saves(lambda: self._schedule_generate_year(selected_year_int))
+        return None
+
+    def _schedule_generate_year(self, selected_year_int):
+        """Genera e salva l'anno dato (con i salvataggi in coda già completati)."""
+        selected_year_str = str(selected_year_int)
+
+        # Bozza della lista impiegati: la lista principale viene aggiornata solo a generazione riuscita
+        self.employees_manager.load_days_off_years([selected_year_int])
+        draft_session = library.DraftSession(self.employees_manager.emp_list)
+        temp_employees_list = draft_session.employees
+        temp_employee_lookup = {emp.id: emp for emp in temp_employees_list}
+
+        # Turni bloccati dell'anno: quelli salvati con ogni mese e, per il mese visualizzato, quelli in memoria
+        year_locks = library.ShiftLocks()
+        for month in range(1, 13):
+            if (selected_year_int, month) != (self.current_displayed_year, self.current_displayed_month):
+                year_locks.update(self.json_manager.load_locked_shifts(selected_year_int, month))
+        year_locks.update(self.locked_shifts)
+
+        # "Pulizia" dei contatori dai mesi dell'anno già salvati, che verranno sovrascritti
+        for month in range(1, 13):
+            month_schedule = self.json_manager.load_month_shifts(selected_year_int, month) or {}
+            for daily_shifts in month_schedule.values():
+                for shift_type, emp_ids in daily_shifts.items():
+                    for emp_id in emp_ids:
+                        emp = temp_employee_lookup.get(emp_id)
+                        if emp and shift_type in emp.shift_count:
+                            emp.shift_count[shift_type] -= 1
+
+        schedules = self.schedule_manager.batch_shift_assignator(
+            selected_year_int,
+            1,
+            12,
+            self.configuration,
+            locked_shifts=year_locks,
+            employees_list=temp_employees_list
+        )
+
+        if not schedules:
+            messagebox.showwarning(
+                title="Attenzione",
+                message="Dipendenti non sufficienti per la creazione della programmazione.\n"
+                        "Aggiungere dipendenti prima di procedere.",
+                parent=self
+            )
+            return None
+
+        # Salvataggio in background: i mesi generati non vengono più modificati, non serve copiarli
+        for month, month_schedule in schedules.items():
+            self._save_in_background(("shifts", selected_year_int, month),
+                                     self.json_manager.save_shifts_file, month_schedule)
+            self._save_in_background(("locks", selected_year_int, month),
+                                     self.json_manager.save_locked_shifts, selected_year_int, month, year_locks)
+
+        # Aggiornamento della lista principale e salvataggio impiegati
+        draft_session.commit()
+        self.temp_employees_list = None
+        self.draft_session = None
+
+        def on_saved():
+            # Visualizza il mese selezionato dalla programmazione appena salvata
+            self._command_schedule_view()
+            messagebox.showinfo("Turni Generati",
+                                f"Programmazione del {selected_year_str} generata e salvata con successo.",
+                                parent=self)
+
+        self._save_employees_in_background(on_saved=on_saved)
+        return None
+
     def _command_schedule_save(self):
         if not self.generated_schedule:
             messagebox.showerror(
@@ -1265,32 +1614,32 @@ class ShiftManagerGui(tk.Tk):
             )
             return
         else:
-            self.json_manager.save_shifts_file(self.generated_schedule)
-            
-            # If we have a temporary employee list (from a generation), update the main list
-            if self.temp_employees_list:
-                # Update shift counts in the main list based on the temp list
-                # We assume the order and IDs match since temp is a deepcopy of main
-                # But to be safe, we can match by ID
-                for temp_emp in self.temp_employees_list:
-                    main_emp = next((e for e in self.employees_manager.emp_list if e.id == temp_emp.id), None)
-                    if main_emp:
-                        main_emp.shift_count = temp_emp.shift_count
-                        main_emp.days_off = temp_emp.days_off
-                
-                # Now save the updated main list
-                self.json_manager.save_employees_file(self.employees_manager.export_employees_list())
+            # Il salvataggio avviene in background su una copia della schedula e degli impiegati
+            first_date = next(iter(self.generated_schedule))
+            self._save_in_background(("shifts", first_date.year, first_date.month),
+                                     self.json_manager.save_shifts_file,
+                                     self._schedule_snapshot(self.generated_schedule))
+            # I turni bloccati del mese vengono salvati con la schedula e ricaricati da "Visualizza"
+            self._save_in_background(("locks", first_date.year, first_date.month),
+                                     self.json_manager.save_locked_shifts, first_date.year, first_date.month,
+                                     dict(self.locked_shifts))
+
+            # If we have a draft session (from a generation), update the main list
+            if self.draft_session:
+                # Solo gli impiegati modificati nella bozza vengono riportati sulla lista principale
+                self.draft_session.commit()
                 
                 # Clear the temp list as changes are now committed
                 self.temp_employees_list = None
-            else:
-                # Fallback if no temp list (shouldn't happen if generated, but safe to keep)
-                self.json_manager.save_employees_file(self.employees_manager.export_employees_list())
-
-        messagebox.showinfo(
-            title="Salvataggio Eseguito",
-            message="Programmazione salvata correttamente.",
-            parent=self)
+                self.draft_session = None
+
+            # Salvataggio della lista principale aggiornata
+            self._save_employees_in_background(
+                on_saved=lambda: messagebox.showinfo(
+                    title="Salvataggio Eseguito",
+                    message="Programmazione salvata correttamente.",
+                    parent=self)
+            )
 
     def _command_employees_add(self):
         """Opens the Add Employee dialog."""
@@ -1376,8 +1725,8 @@ class ShiftManagerGui(tk.Tk):
             message="Vuoi salvare la lista degli impiegati?",
         )
         if check_save:
-            self.json_manager.save_employees_file(self.employees_manager.export_employees_list())
-            messagebox.showinfo("Salvato", "Salvataggio Eseguito.")
+            self._save_employees_in_background(
+                on_saved=lambda: messagebox.showinfo("Salvato", "Salvataggio Eseguito."))
         else:
             return
 
@@ -1460,6 +1809,101 @@ class ShiftManagerGui(tk.Tk):
                 parent=self
             )
 
+    def _command_export_period(self, export_format):
+        """Apre la finestra di scelta dei mesi da esportare dallo storico
+        (XLSX un foglio per mese, CSV unico, un calendario ICS per impiegato)."""
+        export_period_dialog_window = ShiftManagerGui.ExportPeriodDialogWindow(
+            self.frame_master,
+            years=self.box_year_selection.cget("values"),
+            default_year=self.box_year_selection.get(),
+            export_format=export_format,
+            callback_export_period=self._export_period
+        )
+
+    def _export_period(self, months, export_format):
+        """Esporta i mesi dati (coppie (anno, mese)) leggendoli dallo storico salvato.
+        Con export_format "ics" viene scelta una cartella, in cui viene scritto un calendario per impiegato.
+        Ha funzione di callback."""
+
+        (start_year, start_month), (end_year, end_month) = months[0], months[-1]
+        file_types = {
+            "csv": [("CSV file", "*.csv")],
+            "xlsx": [("Excel file", "*.xlsx")]
+        }
+
+        if export_format == "ics":
+            filepath = filedialog.askdirectory(title="Esporta i calendari (.ics) nella cartella", mustexist=True)
+        else:
+            filepath = filedialog.asksaveasfilename(
+                title=f"Esporta come {export_format.upper()}",
+                initialfile=f"{MONTHS[start_month]}_{start_year}-{MONTHS[end_month]}_{end_year}_schedule"
+                            f".{export_format}",
+                filetypes=file_types[export_format],
+                defaultextension=f".{export_format}"
+            )
+
+        # If user cancel the dialog, filepath will be empty
+        if not filepath:
+            return None
+
+        # Lo storico deve includere i salvataggi ancora in coda
+        self._after_pending_saves(lambda: self._write_period_export(months, export_format, filepath))
+        return None
+
+    def _write_period_export(self, months, export_format, filepath):
+        """Scrive l'export del periodo in filepath (file o cartella per "ics")."""
+        try:
+            # Ferie di tutti gli anni del periodo
+            self.employees_manager.load_days_off_years({year for year, _ in months})
+
+            period_exporter = PeriodExporter(
+                file_loader=self.json_manager,
+                employees_list=self.employees_manager.emp_list,
+                months=months,
+                config=self.configuration
+            )
+
+            if export_format == "ics":
+                exported_calendars = period_exporter.export_to_ics(filepath)
+                if not exported_calendars:
+                    messagebox.showwarning(
+                        title="Impossibile Esportare",
+                        message="Nessun turno o giorno di ferie nel periodo selezionato.",
+                        parent=self
+                    )
+                    return None
+                messagebox.showinfo(
+                    title="Esportazione Riuscita",
+                    message=f"{len(exported_calendars)} calendari esportati con successo in\n{filepath}.",
+                    parent=self
+                )
+                return None
+
+            if export_format == "xlsx":
+                exported_months = period_exporter.export_to_xlsx(filepath)
+            else:
+                exported_months = period_exporter.export_to_csv(filepath)
+
+            if not exported_months:
+                messagebox.showwarning(
+                    title="Impossibile Esportare",
+                    message="Nessuna turnazione salvata nel periodo selezionato.",
+                    parent=self
+                )
+                return None
+
+            messagebox.showinfo(
+                title="Esportazione Riuscita",
+                message=f"{len(exported_months)} mesi su {len(months)} esportati con successo in\n{filepath}.",
+                parent=self
+            )
+        except Exception as e:
+            messagebox.showerror(
+                title="Esportazione Non Riuscita",
+                message=f"Si è verificato un errore:\n{e}",
+                parent=self
+            )
+
     def _command_show_info(self):
         """Opens the Info dialog window"""
         info_dialog_window = ShiftManagerGui.InfoDialogWindow(self.frame_master)
@@ -1533,6 +1977,12 @@ class ShiftManagerGui(tk.Tk):
             command=self._command_schedule_generate
         )
 
+        button_generate_year = ttk.Button(
+            self.frame_shift_schedule_bottom,
+            text="Genera Anno",
+            command=self._command_schedule_generate_year
+        )
+
         button_save_shifts = ttk.Button(
             self.frame_shift_schedule_bottom,
             text="Salva",
@@ -1545,12 +1995,17 @@ class ShiftManagerGui(tk.Tk):
             command=self.destroy
         )
 
+        # Stato dei salvataggi in background nella colonna 0 (a sinistra dei pushbutton)
+        label_persistence_status = ttk.Label(self.frame_shift_schedule_bottom, textvariable=self.persistence_status)
+        label_persistence_status.grid(row=0, column=0, sticky="w")
+
         # Colonna iniziale è column=1 perché la colonna 0 utilizzata per l'allineamento a Sud-Est
         # self.frame_shift_schedule_bottom.columnconfigure(0, weight=1)
         button_view_shifts.grid(row=0, column=1, sticky="e")
         button_generate_shifts.grid(row=0, column=2, sticky="e")
-        button_save_shifts.grid(row=0, column=3, sticky="e")
-        button_exit.grid(row=0, column=4, sticky="e")
+        button_generate_year.grid(row=0, column=3, sticky="e")
+        button_save_shifts.grid(row=0, column=4, sticky="e")
+        button_exit.grid(row=0, column=5, sticky="e")
 
     def _build_view_employees(self, frame):
         """Genera l'interfaccia della finestra che mostra la gli impiegati."""
@@ -1585,6 +2040,9 @@ class ShiftManagerGui(tk.Tk):
             command=self.destroy
         )
 
+        label_persistence_status = ttk.Label(self.frame_employees_bottom, textvariable=self.persistence_status)
+        label_persistence_status.grid(row=0, column=0, sticky="w")
+
         # Colonna iniziale è column=1 perché la colonna 0 utilizzata per l'allineamento a Sud-Est
         # self.frame_employees_bottom.columnconfigure(0, weight=1)
         button_add_employee.grid(row=0, column=1, sticky="se")
@@ -1,14 +1,120 @@
 import calendar
 import datetime
+import functools
+import heapq
 import math
+import os
 import random
+import types
+from collections.abc import MutableMapping
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from file_manager import JsonManager
+import matrix_engine
+import solver_engine
 
 WEEKDAYS = ["LUN", "MAR", "MER", "GIO", "VEN", "SAB", "DOM"]
 
+@functools.lru_cache(maxsize=None)
+def _year_start_ordinal(year):
+    """Ordinale (datetime.date.toordinal) del primo giorno dell'anno dato."""
+    return datetime.date(year, 1, 1).toordinal()
+
+
+class DaysOff:
+    """Calendario delle ferie di un impiegato.
+    I giorni sono memorizzati come bitmask per anno ({anno: int}, bit n = giorno n dell'anno), quindi la verifica
+    `data in days_off` è O(1) indipendentemente dallo storico accumulato.
+    Mantiene i metodi di lista usati nel software (append, remove, iterazione, len), l'iterazione è in ordine di data."""
+
+    __slots__ = ("_years",)
+
+    def __init__(self, dates=()):
+        self._years = {}
+
+        for date in dates:
+            self.add(date)
+
+    @staticmethod
+    def _locate(date):
+        """Ritorna (anno, bit) corrispondenti alla data."""
+        return date.year, 1 << (date.toordinal() - _year_start_ordinal(date.year))
+
+    def __contains__(self, date):
+        if not isinstance(date, datetime.date):
+            return False
+        year, bit = self._locate(date)
+        return bool(self._years.get(year, 0) & bit)
+
+    def add(self, date):
+        year, bit = self._locate(date)
+        self._years[year] = self._years.get(year, 0) | bit
+
+    def append(self, date):
+        """Alias di add(), per compatibilità con la precedente lista di date."""
+        self.add(date)
+
+    def discard(self, date):
+        year, bit = self._locate(date)
+        mask = self._years.get(year, 0) & ~bit
+        if mask:
+            self._years[year] = mask
+        else:
+            self._years.pop(year, None)
+
+    def remove(self, date):
+        """Rimuove la data. Come list.remove() solleva ValueError se la data non è presente."""
+        if date not in self:
+            raise ValueError(f"{date} non presente tra i giorni di ferie")
+        self.discard(date)
+
+    def between(self, start_date, end_date):
+        """Itera in ordine le date di ferie comprese tra start_date ed end_date (inclusi),
+        leggendo solo gli anni coinvolti."""
+        for date in self._iter_years(range(start_date.year, end_date.year + 1)):
+            if start_date <= date <= end_date:
+                yield date
+
+    def _iter_years(self, years):
+        for year in years:
+            mask = self._years.get(year, 0)
+            first_ordinal = _year_start_ordinal(year)
+            while mask:
+                lowest_bit = mask & -mask
+                yield datetime.date.fromordinal(first_ordinal + lowest_bit.bit_length() - 1)
+                mask ^= lowest_bit
+
+    def __iter__(self):
+        return self._iter_years(sorted(self._years))
+
+    def __len__(self):
+        return sum(bin(mask).count("1") for mask in self._years.values())
+
+    def __eq__(self, other):
+        if isinstance(other, DaysOff):
+            return self._years == other._years
+        try:
+            return list(self) == sorted(other)
+        except TypeError:
+            return NotImplemented
+
+    def copy(self):
+        """Copia indipendente del calendario (costo proporzionale al numero di anni, non di giorni)."""
+        days_off = DaysOff()
+        days_off._years = dict(self._years)
+        return days_off
+
+    def __repr__(self):
+        return f"DaysOff({list(self)!r})"
+
+
 class Employee:
     """Consente di gestire gli impiegati.
-    Assegna un'identità all'impiegato e tiene il conteggio dei turni effettuati."""
+    Assegna un'identità all'impiegato e tiene il conteggio dei turni effettuati.
+    Con __slots__ l'istanza non ha un __dict__: con decine di migliaia di impiegati si riducono memoria e tempi
+    di caricamento (vedi tests/bench_employee_memory.py)."""
+
+    __slots__ = ("id", "surname", "name", "serial_number", "_days_off", "shift_count")
 
     def __init__(self,
                  emp_id,
@@ -19,7 +125,7 @@ class Employee:
         self.surname = emp_surname
         self.name = emp_name
         self.serial_number = emp_serial_number
-        self.days_off = []
+        self.days_off = DaysOff()
         self.shift_count = {
             "mattina": 0,
             "mattina_rep": 0,
@@ -28,14 +134,343 @@ class Employee:
             "days_off": 0
         }
 
+    @property
+    def days_off(self):
+        return self._days_off
+
+    @days_off.setter
+    def days_off(self, dates):
+        # Qualsiasi iterabile di datetime.date (es. una lista) viene convertito in DaysOff
+        self._days_off = dates if isinstance(dates, DaysOff) else DaysOff(dates)
+
+    def copy(self):
+        """Copia indipendente dell'impiegato (contatori e ferie compresi), es. per i salvataggi in background."""
+        employee = Employee(self.id, self.surname, self.name, self.serial_number)
+        employee.shift_count = dict(self.shift_count)
+        employee.days_off = self._days_off.copy()
+        return employee
+
+
+class _DraftCounters(dict):
+    """Contatori dei turni di un DraftEmployee: notificano la DraftSession alla prima modifica."""
+
+    __slots__ = ("_on_write",)
+
+    def __init__(self, shift_count, on_write):
+        super().__init__(shift_count)
+        self._on_write = on_write
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._on_write()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._on_write()
+
+
+class _DraftDaysOff(DaysOff):
+    """DaysOff copy-on-write: condivide le bitmask dell'impiegato originale finché non viene modificato."""
+
+    __slots__ = ("_shared", "_on_write")
+
+    def __init__(self, days_off, on_write):
+        super().__init__()
+        self._years = days_off._years
+        self._shared = True
+        self._on_write = on_write
+
+    def _own(self):
+        if self._shared:
+            self._years = dict(self._years)
+            self._shared = False
+            self._on_write()
+
+    def add(self, date):
+        self._own()
+        super().add(date)
+
+    def discard(self, date):
+        self._own()
+        super().discard(date)
+
+
+class DraftEmployee:
+    """Vista modificabile di un Employee all'interno di una DraftSession.
+    Anagrafica letta dall'Employee originale; contatori e days_off sono copie locali (copy-on-write per i
+    days_off) riportate sull'originale solo con DraftSession.commit()."""
+
+    __slots__ = ("_base", "_session", "shift_count", "_days_off")
+
+    def __init__(self, employee, session):
+        self._base = employee
+        self._session = session
+        self._reset()
+
+    def _reset(self):
+        self.shift_count = _DraftCounters(self._base.shift_count, self._mark_dirty)
+        self._days_off = _DraftDaysOff(self._base.days_off, self._mark_dirty)
+
+    def _mark_dirty(self):
+        self._session._dirty[self._base.id] = self
+
+    id = property(lambda self: self._base.id)
+    surname = property(lambda self: self._base.surname)
+    name = property(lambda self: self._base.name)
+    serial_number = property(lambda self: self._base.serial_number)
+
+    @property
+    def days_off(self):
+        return self._days_off
+
+    @days_off.setter
+    def days_off(self, dates):
+        self._days_off = _DraftDaysOff(dates if isinstance(dates, DaysOff) else DaysOff(dates), self._mark_dirty)
+        self._days_off._own()
+
+    def to_employee(self):
+        """Employee indipendente con lo stato corrente della bozza."""
+        employee = Employee(self.id, self.surname, self.name, self.serial_number)
+        employee.shift_count = dict(self.shift_count)
+        employee.days_off = self._days_off.copy()
+        return employee
+
+    def __reduce__(self):
+        # Verso i processi worker (best-of-N, batch paralleli) viaggia un Employee semplice, senza la sessione
+        employee = self.to_employee()
+        return object.__new__, (Employee,), (None, {slot: getattr(employee, slot) for slot in Employee.__slots__})
+
+
+class DraftSession:
+    """Sessione di modifica "in bozza" del roster, alternativa a copy.deepcopy(emp_list).
+    La generazione lavora su self.employees (DraftEmployee), che condividono anagrafica e storico ferie con gli
+    impiegati originali: la memoria occupata non dipende dallo storico. Solo gli impiegati effettivamente modificati
+    vengono registrati, quindi commit() e discard() costano O(modifiche)."""
+
+    def __init__(self, employees):
+        self._dirty = {}  # {emp_id: DraftEmployee modificato}
+        self.employees = [DraftEmployee(emp, self) for emp in employees]
+
+    @property
+    def changed_employees(self):
+        return list(self._dirty.values())
+
+    def commit(self):
+        """Riporta contatori e days_off modificati sugli Employee originali. Ritorna il numero di impiegati aggiornati."""
+        n_of_changes = len(self._dirty)
+        for draft in self._dirty.values():
+            draft._base.shift_count = dict(draft.shift_count)
+            draft._base.days_off = draft.days_off.copy()
+            draft._reset()
+        self._dirty.clear()
+        return n_of_changes
+
+    def discard(self):
+        """Annulla le modifiche della bozza riallineando i soli DraftEmployee modificati agli originali."""
+        for draft in self._dirty.values():
+            draft._reset()
+        self._dirty.clear()
+
+
+class ShiftLocks(MutableMapping):
+    """Indice dei turni bloccati manualmente.
+    Si comporta come il dictionary {(data_iso, emp_id): shift_type} usato dalla GUI, ma mantiene in parallelo
+    un indice per data e uno per employee, in modo da leggere i lock di un giorno (o di un impiegato) senza
+    scorrere tutti i lock presenti."""
+
+    def __init__(self, locked_shifts=None):
+        self._locks = {}
+        self._by_date = {}
+        self._by_employee = {}
+
+        if locked_shifts:
+            self.update(locked_shifts)
+
+    def __getitem__(self, key):
+        return self._locks[key]
+
+    def __setitem__(self, key, shift_type):
+        date_iso, emp_id = key
+        self._locks[key] = shift_type
+        self._by_date.setdefault(date_iso, {})[emp_id] = shift_type
+        self._by_employee.setdefault(emp_id, {})[date_iso] = shift_type
+
+    def __delitem__(self, key):
+        del self._locks[key]
+        date_iso, emp_id = key
+
+        # Rimuove il lock dagli indici, eliminando le chiavi rimaste vuote
+        locks_of_date = self._by_date[date_iso]
+        del locks_of_date[emp_id]
+        if not locks_of_date:
+            del self._by_date[date_iso]
+
+        locks_of_employee = self._by_employee[emp_id]
+        del locks_of_employee[date_iso]
+        if not locks_of_employee:
+            del self._by_employee[emp_id]
+
+    def __iter__(self):
+        return iter(self._locks)
+
+    def __len__(self):
+        return len(self._locks)
+
+    def clear(self):
+        self._locks.clear()
+        self._by_date.clear()
+        self._by_employee.clear()
+
+    def for_date(self, date_iso):
+        """Ritorna i lock del giorno dato: {emp_id: shift_type}."""
+        return self._by_date.get(date_iso, {})
+
+    def for_employee(self, emp_id):
+        """Ritorna i lock dell'impiegato dato: {data_iso: shift_type}."""
+        return self._by_employee.get(emp_id, {})
+
+
+class FairnessQueue:
+    """Coda di priorità a bucket per un singolo tipo di turno.
+    Raggruppa gli impiegati in base al numero di turni svolti (shift_count[shift_type]) e viene aggiornata
+    incrementalmente a ogni variazione del contatore, evitando di riordinare tutta la lista ogni giorno.
+    Gli impiegati non assegnabili in un giorno (ferie, lock, turno già ricevuto) vengono tolti dalla coda con
+    exclude() e reinseriti con restore(), così la selezione non li deve scartare uno a uno."""
+
+    def __init__(self, shift_type, employees):
+        self.shift_type = shift_type
+        self._buckets = {}  # {n_turni: [emp, ...]}
+        self._position = {}  # {emp.id: (n_turni, indice nel bucket)}
+        self._excluded = {}  # {emp.id: emp} tolti temporaneamente dalla coda
+
+        for emp in employees:
+            self._insert(emp)
+
+    def _insert(self, emp):
+        count = emp.shift_count[self.shift_type]
+        bucket = self._buckets.setdefault(count, [])
+        self._position[emp.id] = (count, len(bucket))
+        bucket.append(emp)
+
+    def _remove(self, emp):
+        count, index = self._position.pop(emp.id)
+        bucket = self._buckets[count]
+
+        # Swap con l'ultimo elemento per una rimozione in O(1)
+        last_emp = bucket.pop()
+        if last_emp.id != emp.id:
+            bucket[index] = last_emp
+            self._position[last_emp.id] = (count, index)
+
+        if not bucket:
+            del self._buckets[count]
+
+    def update(self, emp):
+        """Riposiziona l'impiegato dopo una variazione del suo contatore.
+        Un impiegato escluso viene riposizionato direttamente da restore()."""
+        if emp.id in self._excluded:
+            return
+        self._remove(emp)
+        self._insert(emp)
+
+    def exclude(self, emp):
+        """Toglie l'impiegato dalla coda in O(1) fino al prossimo restore()."""
+        if emp.id in self._position:
+            self._remove(emp)
+            self._excluded[emp.id] = emp
+
+    def restore(self):
+        """Reinserisce gli impiegati esclusi, nel bucket del loro contatore attuale."""
+        for emp in self._excluded.values():
+            self._insert(emp)
+        self._excluded.clear()
+
+    def least_loaded(self, n_of_employees, is_available=None):
+        """Ritorna fino a n_of_employees impiegati con il minor numero di turni, tra quelli presenti nella coda
+        (e per cui is_available(emp) è True, se indicato).
+        A parità di turni la scelta è casuale, equivalente a random.shuffle() seguito da un sort stabile.
+
+        Costo: O(B log B + k + u), con B numero di bucket (valori distinti del contatore), k impiegati ritornati
+        e u impiegati scartati da is_available. Senza is_available (impiegati non assegnabili tolti con exclude())
+        u è 0 e la selezione si ferma dopo k estrazioni."""
+        selected = []
+        if n_of_employees <= 0:
+            return selected
+
+        for count in sorted(self._buckets):
+            bucket = self._buckets[count]
+            bucket_size = len(bucket)
+
+            # Fisher-Yates parziale: si estraggono candidati casuali dal bucket finché non si raggiunge il numero
+            # richiesto. Gli elementi vengono scambiati sul posto, quindi si aggiornano anche le posizioni
+            for i in range(bucket_size):
+                j = random.randrange(i, bucket_size)
+                bucket[i], bucket[j] = bucket[j], bucket[i]
+                self._position[bucket[i].id] = (count, i)
+                self._position[bucket[j].id] = (count, j)
+
+                if is_available is None or is_available(bucket[i]):
+                    selected.append(bucket[i])
+                    if len(selected) == n_of_employees:
+                        return selected
+
+        return selected
+
+
+class FairnessQueues:
+    """Raccoglie una FairnessQueue per ciascun tipo di turno assegnabile dal generatore."""
+
+    SHIFT_TYPES = ("mattina", "mattina_rep", "pomeriggio", "weekend_rep")
+
+    def __init__(self, employees):
+        self._queues = {shift_type: FairnessQueue(shift_type, employees) for shift_type in self.SHIFT_TYPES}
+
+    def increment(self, emp, shift_type):
+        """Incrementa il contatore shift_type dell'impiegato e aggiorna la relativa coda."""
+        emp.shift_count[shift_type] += 1
+        self._queues[shift_type].update(emp)
+
+    def exclude(self, emp, shift_types):
+        """Toglie l'impiegato dalle code dei tipi di turno dati fino al prossimo restore() (es. fino alla fine
+        del giorno). Basta escluderlo dalle code da cui si deve ancora estrarre."""
+        for shift_type in shift_types:
+            self._queues[shift_type].exclude(emp)
+
+    def restore(self):
+        for queue in self._queues.values():
+            queue.restore()
+
+    def least_loaded(self, shift_type, n_of_employees, is_available=None):
+        return self._queues[shift_type].least_loaded(n_of_employees, is_available)
+
+    @staticmethod
+    def least_loaded_among(shift_type, candidates, n_of_employees):
+        """Come least_loaded(), ma sceglie solo tra i candidati dati (es. chi fa mattina oggi, per mattina_rep):
+        costa O(m log k) sugli m candidati invece di attraversare la coda di tutto il personale."""
+        candidates = list(candidates)
+        random.shuffle(candidates)
+        # heapq.nsmallest è stabile: equivale a sorted(...)[:n_of_employees] dopo lo shuffle
+        return heapq.nsmallest(n_of_employees, candidates, key=lambda emp: emp.shift_count[shift_type])
+
 
 class EmployeesManager:
     """Consente la gestione del file di input degli employees."""
 
-    def __init__(self, config_dict):
+    def __init__(self, config_dict, file_loader=None):
         self.emp_list = []
         self.employees_json = config_dict["files"]["employees_database_file"]
-        self.file_loader = JsonManager()
+        # Gestore di persistenza (JsonManager o SqliteManager, vedi file_manager.create_storage_manager)
+        self.file_loader = file_loader if file_loader is not None else JsonManager()
+
+        # Anni di ferie caricati all'avvio: quelli selezionabili nella GUI (config.json -> date -> year_range).
+        # Gli anni precedenti vengono letti solo se richiesti (load_days_off_years), quindi il costo dell'avvio non
+        # cresce con lo storico delle ferie. None: configurazione senza year_range, ferie di tutti gli anni caricate
+        year_range = config_dict.get("date", {}).get("year_range")
+        if year_range is None:
+            self.days_off_years = None
+        else:
+            current_year = datetime.date.today().year
+            self.days_off_years = set(range(current_year - year_range, current_year + year_range + 1))
 
         self._import_employees_from_json()
 
@@ -85,7 +520,11 @@ class EmployeesManager:
         # 2. Genera l'istanza dell'employee e gli assegna un numero id incrementale.
         # 3. Inserisce nell'array emp_list gli oggetti così creati.
         """
-        imported_employees_from_file = self.file_loader.load_employees_file()  # Creazione/Import di employees.json
+        # Creazione/Import di employees.json
+        if self.days_off_years is None:
+            imported_employees_from_file = self.file_loader.load_employees_file()
+        else:
+            imported_employees_from_file = self.file_loader.load_employees_file(days_off_years=self.days_off_years)
         # L'import si avvia solo se sono presenti impiegati nel file employees.json
         if len(imported_employees_from_file) > 0:
             for employee in imported_employees_from_file:
@@ -97,7 +536,7 @@ class EmployeesManager:
                 )
 
                 # Conversione days_off da stringhe a oggetti datetime.date
-                temp_employee.days_off = [datetime.date.fromisoformat(d) for d in employee["days_off"]]
+                temp_employee.days_off = DaysOff(datetime.date.fromisoformat(d) for d in employee["days_off"])
                 temp_employee.shift_count["mattina"] = employee["shift_count"]["mattina"]
                 temp_employee.shift_count["mattina_rep"] = employee["shift_count"]["mattina_rep"]
                 temp_employee.shift_count["pomeriggio"] = employee["shift_count"]["pomeriggio"]
@@ -106,6 +545,29 @@ class EmployeesManager:
 
         # print(self.emp_list) # DEBUG
 
+    def load_days_off_years(self, years):
+        """Carica nella lista impiegati le ferie degli anni non ancora letti (es. un anno fuori da year_range).
+        Da chiamare prima di lavorare su date di quegli anni, e prima di creare una DraftSession."""
+        if self.days_off_years is None:
+            return None
+        missing_years = sorted(set(years) - self.days_off_years)
+        if not missing_years:
+            return None
+
+        employees_by_id = {employee.id: employee for employee in self.emp_list}
+        for year in missing_years:
+            for emp_id, days in self.file_loader.load_days_off(year).items():
+                employee = employees_by_id.get(emp_id)
+                if employee is not None:
+                    for day in days:
+                        employee.days_off.add(datetime.date.fromisoformat(day))
+            self.days_off_years.add(year)
+        return None
+
+    def loaded_days_off_years(self):
+        """Anni di ferie presenti in memoria (None: tutti), da passare a save_employees_file()."""
+        return None if self.days_off_years is None else frozenset(self.days_off_years)
+
     def add_employee(
             self,
             new_employee_surname,
@@ -196,6 +658,7 @@ class EmployeesManager:
         except ValueError:
             print("ERRORE! Verificare che la data immessa sia corretta.")
             return None
+        self.load_days_off_years([off_duty_year])
 
         # Ricerca employee nella lista e setta il giorno di ferie
         employee_found = False
@@ -223,6 +686,7 @@ class EmployeesManager:
 
         # Genera l'oggetto datetime.data
         off_duty_date = datetime.date(off_duty_year, off_duty_month, off_duty_day)
+        self.load_days_off_years([off_duty_year])
 
         # Ricerca employee nella lista e setta il giorno di ferie
         employee_found = False
@@ -248,16 +712,52 @@ class EmployeesManager:
 
 class ShiftManager:
     def __init__(self, employees_file_manager: EmployeesManager):
+        # Nessun gestore di persistenza: la generazione non legge né scrive file, e i processi worker di
+        # best_of_n_shift_assignator/parallel_batch_shift_assignator non devono aprire lo storico o il journal
         self.emp_list = employees_file_manager.emp_list
-        self.file_loader = JsonManager()
         self.shift_schedule = {}
 
+        # Pool dei processi worker di best_of_n_shift_assignator, creato alla prima richiesta e riusato tra le
+        # generazioni. Va chiuso con close() all'uscita
+        self._process_pool = None
+        self._process_pool_workers = None
+
+    def _get_process_pool(self, max_workers=None):
+        """Ritorna il pool dei processi worker, creandolo se non esiste (o se è cambiato max_workers).
+        Con il metodo spawn (Windows, eseguibile PyInstaller) ogni nuovo processo rilancia l'interprete e
+        reimporta i moduli: riusando il pool questo costo si paga una sola volta e non a ogni generazione."""
+        if self._process_pool is not None and self._process_pool_workers != max_workers:
+            self.close()
+
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=max_workers)
+            self._process_pool_workers = max_workers
+        return self._process_pool
+
+    def start_process_pool(self, n_candidates, max_workers=None):
+        """Avvia in anticipo i processi worker per n_candidates candidati (senza attenderli), così l'avvio non
+        consuma il time_budget della prima generazione. Con n_candidates <= 1 non fa nulla."""
+        if n_candidates <= 1:
+            return
+
+        process_pool = self._get_process_pool(max_workers)
+        for _ in range(min(n_candidates, max_workers or os.cpu_count() or 1)):
+            process_pool.submit(_warm_up_worker)
+
+    def close(self):
+        """Chiude il pool dei processi worker (se creato). I candidati non ancora avviati vengono annullati,
+        quelli in corso vengono attesi."""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True, cancel_futures=True)
+            self._process_pool = None
+            self._process_pool_workers = None
+
     @staticmethod
-    def _calculate_daily_split(available_employees, config_dict):
+    def _calculate_daily_split(n_available_employees, config_dict):
         """Calcola quanti dipendenti sono assegnati al turno mattina e quanti al turno pomeriggio.
         È utile il calcolo giornaliero perché, in caso di ferie di 1+ dipendenti, la divisione sui turni cambia.
         Output: (dipendenti_assegnati_turno_mattina, dipendenti_assegnati_turno_pomeriggio)"""
-        total_employees = len(available_employees)
+        total_employees = n_available_employees
         num_on_mattina = math.ceil(total_employees / 2)
         num_on_mattina_rep = config_dict["shift_settings"]["n_of_employees"]["mattina_rep"]
         num_on_pomeriggio = total_employees - num_on_mattina
@@ -273,11 +773,13 @@ class ShiftManager:
 
         Ritorna la schedula creata."""
         
-        if locked_shifts is None:
-            locked_shifts = {}
+        # L'indice dei lock viene costruito una sola volta per run (se non è già un ShiftLocks)
+        if not isinstance(locked_shifts, ShiftLocks):
+            locked_shifts = ShiftLocks(locked_shifts)
 
         # Use the provided list if available, otherwise use the instance's list
         current_emp_list = employees_list if employees_list is not None else self.emp_list
+        employee_lookup = {emp.id: emp for emp in current_emp_list}
 
         # Dictionary vuoto contenente il calendario e i turni possibili. Devono essere inseriti i turni
         shift_assignment_for_month = monthly_calendar_generator(year, month)
@@ -288,12 +790,47 @@ class ShiftManager:
                   "Inserire ulteriori impiegati.")
             return False
 
+        # Motori alternativi, selezionabili da config.json -> shift_settings -> engine
+        engine = config_dict["shift_settings"].get("engine", "python")
+
+        # Flusso a costo minimo sull'intero mese (pure-Python)
+        if engine == "solver":
+            self.shift_schedule = solver_engine.solver_shift_assignator(
+                shift_assignment_for_month, current_emp_list, locked_shifts, config_dict
+            )
+            return True
+
+        # Motore matriciale opzionale (NumPy)
+        if engine == "numpy":
+            if matrix_engine.numpy_available():
+                self.shift_schedule = matrix_engine.matrix_shift_assignator(
+                    shift_assignment_for_month, current_emp_list, locked_shifts, config_dict
+                )
+                return True
+            print("NumPy non installato: generazione con il motore standard.")
+
+        # Code di priorità per tipo di turno, costruite una sola volta per run e aggiornate a ogni assegnazione
+        fairness_queues = FairnessQueues(current_emp_list)
+
+        # Impiegati in ferie per ciascun giorno del mese, indicizzati una sola volta per run: ogni giorno si
+        # escludono dalle code solo questi, senza riscorrere tutto il personale
+        first_day, last_day = min(shift_assignment_for_month), max(shift_assignment_for_month)
+        employees_off_by_day = {}
+        for emp in current_emp_list:
+            for date in emp.days_off.between(first_day, last_day):
+                employees_off_by_day.setdefault(date, []).append(emp)
+
         # +++ Inizio assegnazione turni giorno per giorno dato un certo mese e anno +++
         for day_date in shift_assignment_for_month:
             # print(f"\nAssigning shift for date {day_date}") # DEBUG
 
-            # Copia della lista dei dipendenti per lavorare giorno per giorno
-            employees_available_for_today = [emp for emp in current_emp_list if day_date not in emp.days_off]
+            # Code da cui si estrae oggi: chi è in ferie o ha un lock viene tolto da queste fino a fine giornata
+            is_weekend = day_date.weekday() in config_dict["shift_settings"]["weekend_days"]
+            drawn_shift_types = ("weekend_rep",) if is_weekend else ("mattina", "pomeriggio")
+
+            employees_off_today = employees_off_by_day.get(day_date, ())
+            for emp in employees_off_today:
+                fairness_queues.exclude(emp, drawn_shift_types)
 
             # Calcolo split impiegati
             (
@@ -301,31 +838,25 @@ class ShiftManager:
                 n_employees_on_mattina_rep,
                 n_employees_on_pomeriggio,
                 n_employees_on_weekend_rep
-            ) = self._calculate_daily_split(employees_available_for_today, config_dict)
-            
-            assigned_today = []  # Tiene conto delle persone assegnate per evitare doppi turni
+            ) = self._calculate_daily_split(len(current_emp_list) - len(employees_off_today), config_dict)
+
+            # Chi riceve un turno viene escluso dalle code successive fino a fine giornata per evitare doppi turni
             
             # +++ GESTIONE LOCKED SHIFTS +++
             # Assegna i turni bloccati manualmente e rimuove gli impiegati dalla disponibilità
             day_iso = day_date.isoformat()
             
-            # Identifica i lock per oggi
-            locks_today = []
-            for (l_date, l_emp_id), l_shift in locked_shifts.items():
-                if l_date == day_iso:
-                    locks_today.append((l_emp_id, l_shift))
-            
-            for emp_id, shift_type in locks_today:
+            # Identifica i lock per oggi tramite l'indice per data
+            for emp_id, shift_type in locked_shifts.for_date(day_iso).items():
                 # Trova l'oggetto employee
-                emp_obj = next((e for e in current_emp_list if e.id == emp_id), None)
+                emp_obj = employee_lookup.get(emp_id)
                 if emp_obj:
                     if shift_type in shift_assignment_for_month[day_date]:
                          shift_assignment_for_month[day_date][shift_type].append(emp_obj)
-                         assigned_today.append(emp_obj)
+                         fairness_queues.exclude(emp_obj, drawn_shift_types)
                          
                          # Incrementa contatore
-                         if shift_type in emp_obj.shift_count:
-                             emp_obj.shift_count[shift_type] += 1
+                         fairness_queues.increment(emp_obj, shift_type)
                          
                          # Riduciamo il numero di posti disponibili per quel turno
                          if shift_type == "mattina":
@@ -336,9 +867,6 @@ class ShiftManager:
                              n_employees_on_pomeriggio -= 1
                          elif shift_type == "weekend_rep":
                              n_employees_on_weekend_rep -= 1
-            
-            # Rimuovi gli assegnati dalla lista dei disponibili
-            employees_available_for_today = [e for e in employees_available_for_today if e not in assigned_today]
 
             # Assicuriamoci che non siano negativi
             n_employees_on_mattina = max(0, n_employees_on_mattina)
@@ -346,71 +874,273 @@ class ShiftManager:
             n_employees_on_pomeriggio = max(0, n_employees_on_pomeriggio)
             n_employees_on_weekend_rep = max(0, n_employees_on_weekend_rep)
 
-            random.shuffle(employees_available_for_today)  # Randomness in caso di stesso numero di turni
-            
-
             # +++ ASSEGNAZIONU TURNI WEEKEND +++
-            if day_date.weekday() in config_dict["shift_settings"]["weekend_days"]:
+            if is_weekend:
                 # print(f"{day_date} - WEEKEND {day_date.weekday()}") # For DEBUG
 
-                # Ordina la lista dei dipendenti in base ai weekend fatti
-                employees_available_for_today.sort(key=lambda emp: emp.shift_count["weekend_rep"])
-
-                for i in range(n_employees_on_weekend_rep):
-                    if i < len(employees_available_for_today):
-                        employee_to_assign = employees_available_for_today[i]
-                        shift_assignment_for_month[day_date]["weekend_rep"].append(employee_to_assign)
-                        employee_to_assign.shift_count["weekend_rep"] += 1
-                        assigned_today.append(employee_to_assign)
+                # Seleziona i dipendenti con meno weekend fatti (a parità di turni la scelta è casuale)
+                for employee_to_assign in fairness_queues.least_loaded("weekend_rep", n_employees_on_weekend_rep):
+                    shift_assignment_for_month[day_date]["weekend_rep"].append(employee_to_assign)
+                    fairness_queues.increment(employee_to_assign, "weekend_rep")
 
             else:
                 # print(f"{day_date} - WEEKDAY {day_date.weekday()}") # For DEBUG
 
                 # +++ Assegnazione turni mattina +++
-                # Ordina la lista dei dipendenti in base alle mattine fatte
-                employees_available_for_today.sort(key=lambda emp: emp.shift_count["mattina"])
-
-                for i in range(n_employees_on_mattina):
-                    if i < len(employees_available_for_today):
-                        employee_to_assign = employees_available_for_today[i]
-                        shift_assignment_for_month[day_date]["mattina"].append(employee_to_assign)
-                        employee_to_assign.shift_count["mattina"] += 1
-                        assigned_today.append(employee_to_assign)
+                # Seleziona i dipendenti con meno mattine fatte
+                for employee_to_assign in fairness_queues.least_loaded("mattina", n_employees_on_mattina):
+                    shift_assignment_for_month[day_date]["mattina"].append(employee_to_assign)
+                    fairness_queues.exclude(employee_to_assign, ("pomeriggio",))
+                    fairness_queues.increment(employee_to_assign, "mattina")
                 
                 # +++ Assegnazione mattina + rep +++
-                # Recuperiamo TUTTI quelli che fanno mattina oggi
-                all_mattina_today = shift_assignment_for_month[day_date]["mattina"]
-                # Filtriamo quelli che non hanno già mattina_rep
-                candidates_for_rep = [e for e in all_mattina_today if e not in shift_assignment_for_month[day_date]["mattina_rep"]]
-                
-                random.shuffle(candidates_for_rep)
-                candidates_for_rep.sort(key=lambda emp: emp.shift_count["mattina_rep"])
-                
-                for i in range(n_employees_on_mattina_rep):
-                    if i < len(candidates_for_rep):
-                        employee_to_assign = candidates_for_rep[i]
-                        shift_assignment_for_month[day_date]["mattina_rep"].append(employee_to_assign)
-                        employee_to_assign.shift_count["mattina_rep"] += 1
+                # Recuperiamo TUTTI quelli che fanno mattina oggi e filtriamo quelli che non hanno già mattina_rep.
+                # La scelta avviene solo tra loro, senza attraversare la coda di tutto il personale
+                already_on_rep_ids = {e.id for e in shift_assignment_for_month[day_date]["mattina_rep"]}
+                candidates_for_rep = [
+                    e for e in shift_assignment_for_month[day_date]["mattina"] if e.id not in already_on_rep_ids
+                ]
+
+                for employee_to_assign in fairness_queues.least_loaded_among(
+                        "mattina_rep", candidates_for_rep, n_employees_on_mattina_rep):
+                    shift_assignment_for_month[day_date]["mattina_rep"].append(employee_to_assign)
+                    fairness_queues.increment(employee_to_assign, "mattina_rep")
 
                 # +++ Assegnazione turni pomeriggio +++
-                employees_available_for_pomeriggio = [
-                    emp for emp in employees_available_for_today 
-                    if emp not in assigned_today
-                ]
-                
-                if n_employees_on_pomeriggio > 0:
-                    random.shuffle(employees_available_for_pomeriggio)
-                    employees_available_for_pomeriggio.sort(key=lambda emp: emp.shift_count["pomeriggio"])
+                # I disponibili rimasti sono quelli non assegnati al turno di mattina
+                for employee_to_assign in fairness_queues.least_loaded("pomeriggio", n_employees_on_pomeriggio):
+                    shift_assignment_for_month[day_date]["pomeriggio"].append(employee_to_assign)
+                    fairness_queues.increment(employee_to_assign, "pomeriggio")
 
-                    for i in range(n_employees_on_pomeriggio):
-                        if i < len(employees_available_for_pomeriggio):
-                            employee_to_assign = employees_available_for_pomeriggio[i]
-                            shift_assignment_for_month[day_date]["pomeriggio"].append(employee_to_assign)
-                            employee_to_assign.shift_count["pomeriggio"] += 1
+            # Fine giornata: gli esclusi tornano nelle code con i contatori aggiornati
+            fairness_queues.restore()
 
         self.shift_schedule = shift_assignment_for_month
         return True
 
+    def repair_schedule(self, schedule, day_date, config_dict, locked_shifts=None, employees_list=None):
+        """Ripianifica in modo incrementale il solo giorno day_date di una schedule già generata, dopo una modifica
+        manuale (nuovo lock, ferie aggiunte o rimosse). Le assegnazioni ancora valide vengono mantenute: si tolgono
+        gli impiegati non più disponibili o in contrasto con i lock, si aggiungono i lock mancanti e si riempiono
+        (o riducono) i posti di ciascun turno scegliendo i meno (o più) carichi. Il resto del mese non viene toccato.
+
+        Aggiorna schedule e contatori sul posto e ritorna il set degli IDs degli impiegati la cui assegnazione
+        del giorno è cambiata."""
+
+        if not isinstance(locked_shifts, ShiftLocks):
+            locked_shifts = ShiftLocks(locked_shifts)
+
+        current_emp_list = employees_list if employees_list is not None else self.emp_list
+        employee_lookup = {emp.id: emp for emp in current_emp_list}
+        locks_today = locked_shifts.for_date(day_date.isoformat())
+        daily_shifts = schedule[day_date]
+        before = {shift_type: {emp.id for emp in emps} for shift_type, emps in daily_shifts.items()}
+
+        available_ids = {emp.id for emp in current_emp_list if day_date not in emp.days_off}
+        (
+            n_employees_on_mattina,
+            n_employees_on_mattina_rep,
+            n_employees_on_pomeriggio,
+            n_employees_on_weekend_rep
+        ) = self._calculate_daily_split(len(available_ids), config_dict)
+
+        if day_date.weekday() in config_dict["shift_settings"]["weekend_days"]:
+            targets = {"mattina": 0, "mattina_rep": 0, "pomeriggio": 0, "weekend_rep": n_employees_on_weekend_rep}
+        else:
+            targets = {
+                "mattina": n_employees_on_mattina,
+                "mattina_rep": n_employees_on_mattina_rep,
+                "pomeriggio": n_employees_on_pomeriggio,
+                "weekend_rep": 0
+            }
+
+        def assign(emp, shift_type):
+            daily_shifts[shift_type].append(emp)
+            emp.shift_count[shift_type] += 1
+
+        def unassign(emp, shift_type):
+            daily_shifts[shift_type] = [e for e in daily_shifts[shift_type] if e.id != emp.id]
+            emp.shift_count[shift_type] -= 1
+
+        def is_locked(emp, shift_type):
+            return locks_today.get(emp.id) == shift_type
+
+        def pick(candidates, shift_type, most_loaded=False):
+            """Sceglie il meno (o più) carico per shift_type, a parità di turni in modo casuale."""
+            sign = -1 if most_loaded else 1
+            return min(candidates, key=lambda emp: (sign * emp.shift_count[shift_type], random.random()))
+
+        # 1. Rimuove chi non è disponibile o è assegnato a un turno diverso da quello bloccato
+        for shift_type in daily_shifts:
+            for emp in list(daily_shifts[shift_type]):
+                lock = locks_today.get(emp.id)
+                if lock in daily_shifts:
+                    keep = shift_type == lock or (shift_type == "mattina_rep" and lock == "mattina")
+                else:
+                    keep = emp.id in available_ids and (targets[shift_type] > 0 or shift_type == "mattina_rep")
+                if not keep:
+                    unassign(emp, shift_type)
+
+        # 2. Aggiunge i lock mancanti
+        for emp_id, shift_type in locks_today.items():
+            emp = employee_lookup.get(emp_id)
+            if emp and shift_type in daily_shifts and all(e.id != emp_id for e in daily_shifts[shift_type]):
+                assign(emp, shift_type)
+
+        # 3. Riduce i turni in eccesso (solo impiegati non bloccati, a partire dai più carichi)
+        for shift_type in ("mattina", "pomeriggio", "weekend_rep"):
+            while len(daily_shifts[shift_type]) > targets[shift_type]:
+                victims = [emp for emp in daily_shifts[shift_type] if not is_locked(emp, shift_type)]
+                if not victims:
+                    break
+                unassign(pick(victims, shift_type, most_loaded=True), shift_type)
+
+        # 4. Riempie i posti vacanti con i disponibili senza turno e senza lock
+        assigned_ids = {emp.id for shift_type in ("mattina", "pomeriggio", "weekend_rep")
+                        for emp in daily_shifts[shift_type]}
+        free_employees = [employee_lookup[emp_id] for emp_id in available_ids
+                          if emp_id not in assigned_ids and emp_id not in locks_today]
+        for shift_type in ("mattina", "pomeriggio", "weekend_rep"):
+            while len(daily_shifts[shift_type]) < targets[shift_type] and free_employees:
+                emp = pick(free_employees, shift_type)
+                free_employees.remove(emp)
+                assign(emp, shift_type)
+
+        # 5. Mattina_rep: solo tra chi fa mattina (salvo lock), nel numero previsto
+        mattina_ids = {emp.id for emp in daily_shifts["mattina"]}
+        for emp in list(daily_shifts["mattina_rep"]):
+            if emp.id not in mattina_ids and not is_locked(emp, "mattina_rep"):
+                unassign(emp, "mattina_rep")
+        while len(daily_shifts["mattina_rep"]) > targets["mattina_rep"]:
+            victims = [emp for emp in daily_shifts["mattina_rep"] if not is_locked(emp, "mattina_rep")]
+            if not victims:
+                break
+            unassign(pick(victims, "mattina_rep", most_loaded=True), "mattina_rep")
+        rep_ids = {emp.id for emp in daily_shifts["mattina_rep"]}
+        candidates_for_rep = [emp for emp in daily_shifts["mattina"] if emp.id not in rep_ids]
+        while len(daily_shifts["mattina_rep"]) < targets["mattina_rep"] and candidates_for_rep:
+            emp = pick(candidates_for_rep, "mattina_rep")
+            candidates_for_rep.remove(emp)
+            assign(emp, "mattina_rep")
+
+        changed_ids = set()
+        for shift_type, emps in daily_shifts.items():
+            changed_ids |= before[shift_type] ^ {emp.id for emp in emps}
+        return changed_ids
+
+    def batch_shift_assignator(self, start_year, start_month, n_of_months, config_dict, locked_shifts=None,
+                               employees_list=None):
+        """Genera in una sola chiamata la programmazione di n_of_months mesi consecutivi a partire da
+        start_month/start_year (es. un anno intero con start_month=1, n_of_months=12).
+        I contatori dei turni si accumulano mese per mese, come in generazioni successive.
+
+        Ritorna {(anno, mese): schedule} oppure False se la generazione non è possibile."""
+
+        # L'indice dei lock viene costruito una sola volta per tutto il batch
+        if not isinstance(locked_shifts, ShiftLocks):
+            locked_shifts = ShiftLocks(locked_shifts)
+
+        schedules = {}
+        for year, month in months_range(start_year, start_month, n_of_months):
+            if not self.shift_assignator(year, month, config_dict, locked_shifts, employees_list):
+                return False
+            schedules[(year, month)] = self.shift_schedule
+
+        return schedules
+
+    @staticmethod
+    def parallel_batch_shift_assignator(rosters, start_year, start_month, n_of_months, config_dict,
+                                        max_workers=None):
+        """Esegue batch_shift_assignator su più roster indipendenti (es. team separati o varianti what-if),
+        ciascuno in un processo separato.
+            - rosters: {nome: employees_list} oppure {nome: (employees_list, locked_shifts)}.
+              Per le varianti what-if di uno stesso roster passare bozze distinte (DraftSession(...).employees).
+
+        Al termine i contatori degli Employee di ciascun roster vengono aggiornati e le schedule fanno riferimento
+        agli stessi oggetti Employee passati in input.
+        Ritorna {nome: {(anno, mese): schedule}} (False per i roster con impiegati insufficienti)."""
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for name, roster in rosters.items():
+                employees, locked_shifts = roster if isinstance(roster, tuple) else (roster, None)
+                futures[name] = executor.submit(
+                    _batch_worker, employees, locked_shifts, start_year, start_month, n_of_months, config_dict
+                )
+
+            results = {}
+            for name, future in futures.items():
+                schedules_with_only_ids, shift_counts = future.result()
+                employees = rosters[name][0] if isinstance(rosters[name], tuple) else rosters[name]
+                results[name] = _merge_batch_result(employees, schedules_with_only_ids, shift_counts)
+
+        return results
+
+    def best_of_n_shift_assignator(self, year, month, config_dict, n_candidates=1, time_budget=None,
+                                   locked_shifts=None, employees_list=None, max_workers=None):
+        """Genera n_candidates programmazioni candidate con seed indipendenti in processi paralleli e tiene la più
+        equa secondo fairness_score(). Con n_candidates <= 1 equivale a shift_assignator.
+            - time_budget: secondi massimi di attesa dei candidati. Allo scadere si sceglie il migliore tra quelli
+              completati (almeno uno viene sempre atteso).
+
+        Come shift_assignator aggiorna i contatori degli impiegati e self.shift_schedule. Ritorna True/False."""
+
+        if n_candidates <= 1:
+            return self.shift_assignator(year, month, config_dict, locked_shifts, employees_list)
+
+        current_emp_list = employees_list if employees_list is not None else self.emp_list
+        if len(current_emp_list) < 2:
+            print("Non sono presenti abbastanza impiegati per la generazione dei turni.\n"
+                  "Inserire ulteriori impiegati.")
+            return False
+
+        if not isinstance(locked_shifts, ShiftLocks):
+            locked_shifts = ShiftLocks(locked_shifts)
+
+        # Seed derivati dal generatore principale: un random.seed() del chiamante rende il risultato riproducibile
+        seeds = [random.randrange(2 ** 32) for _ in range(n_candidates)]
+
+        def submit_candidates(process_pool):
+            return [
+                process_pool.submit(_candidate_worker, current_emp_list, locked_shifts, year, month, config_dict, seed)
+                for seed in seeds
+            ]
+
+        try:
+            futures = submit_candidates(self._get_process_pool(max_workers))
+        except BrokenProcessPool:
+            # Un worker terminato in modo anomalo rende inutilizzabile il pool: se ne crea uno nuovo
+            self.close()
+            futures = submit_candidates(self._get_process_pool(max_workers))
+
+        try:
+            done, not_done = wait(futures, timeout=time_budget)
+            if not done:
+                done, not_done = wait(futures, return_when=FIRST_COMPLETED)
+        finally:
+            # I candidati non ancora avviati vengono annullati senza bloccare il chiamante. Quelli già in corso
+            # terminano in background e il loro risultato viene ignorato
+            for future in futures:
+                future.cancel()
+
+        best_candidate = None
+        for future in done:
+            schedule_with_only_ids, shift_counts, score = future.result()
+            if schedule_with_only_ids and (best_candidate is None or score < best_candidate[2]):
+                best_candidate = (schedule_with_only_ids, shift_counts, score)
+
+        if best_candidate is None:
+            return False
+
+        schedule_with_only_ids, shift_counts, score = best_candidate
+        employee_lookup = {emp.id: emp for emp in current_emp_list}
+        for emp_id, shift_count in shift_counts.items():
+            employee_lookup[emp_id].shift_count.update(shift_count)
+
+        self.shift_schedule = _schedule_from_ids(schedule_with_only_ids, employee_lookup)
+        print(f"Scelto il migliore tra {len(done)} candidati (punteggio equità {score[0]}, {score[1]:.2f})")
+        return True
+
     def export_schedule(self):
         """Esporta la programmazione generata per un certo mese.
         Il formato sarà:
@@ -473,25 +1203,124 @@ class ShiftGeneratorTest:
             print(f"{employee.surname}: {employee.shift_count}")
         print("\n")
 
-    def test_shift_assignation(self, employees_file_manager_class, config_dict):
+    def test_shift_assignation(self, employees_file_manager_class, config_dict, n_of_run=None):
         """FAIRNESS TEST.
         Consente di assegnare turni su un lungo periodo e verificare quanti turni sono stati assegnati
-        a ciascun employee."""
-        n_of_run = int(input("Inserire il numero run da voler simulare: "))
+        a ciascun employee. Se n_of_run non è indicato viene richiesto da tastiera."""
+        if n_of_run is None:
+            n_of_run = int(input("Inserire il numero run da voler simulare: "))
         shift_calendar_for_test = ShiftManager(employees_file_manager_class)
-        year = 2025
-        month = 1
-        for run in range(n_of_run):
-            shift_calendar_for_test.shift_assignator(year, month, config_dict)
-            month += 1
-            if month == 13:
-                year += 1
-                month = 1
+        shift_calendar_for_test.batch_shift_assignator(2025, 1, n_of_run, config_dict)
 
         for employee in self.emp_list:
             print(f"{employee.surname}: {employee.shift_count}")
 
 
+def seed_random_generators(seed=None):
+    """Inizializza i generatori casuali usati dai motori di generazione (random e, se presente, NumPy).
+    Con seed=None si usa l'entropia del sistema operativo."""
+    random.seed(seed)
+    matrix_engine.seed(seed)
+
+
+def _schedule_to_ids(schedule):
+    """Sostituisce gli oggetti Employee di una schedule con i loro IDs (per lo scambio tra processi)."""
+    return {
+        date_obj: {shift_type: [emp.id for emp in emps] for shift_type, emps in daily_shifts.items()}
+        for date_obj, daily_shifts in schedule.items()
+    }
+
+
+def _schedule_from_ids(schedule_with_only_ids, employee_lookup):
+    """Operazione inversa di _schedule_to_ids, dato il lookup {emp_id: Employee}."""
+    return {
+        date_obj: {shift_type: [employee_lookup[emp_id] for emp_id in emp_ids]
+                   for shift_type, emp_ids in daily_shifts.items()}
+        for date_obj, daily_shifts in schedule_with_only_ids.items()
+    }
+
+
+def _batch_worker(employees, locked_shifts, start_year, start_month, n_of_months, config_dict, seed=None):
+    """Funzione eseguita nei processi worker di ShiftManager.parallel_batch_shift_assignator.
+    Ritorna le schedule con i soli IDs degli impiegati e i contatori finali: {emp_id: shift_count}."""
+
+    # I processi creati via fork ereditano lo stato dei generatori casuali: va reinizializzato
+    seed_random_generators(seed)
+
+    shift_manager = ShiftManager(types.SimpleNamespace(emp_list=employees))
+    schedules = shift_manager.batch_shift_assignator(
+        start_year, start_month, n_of_months, config_dict, locked_shifts=locked_shifts
+    )
+
+    shift_counts = {emp.id: emp.shift_count for emp in employees}
+    if not schedules:
+        return False, shift_counts
+
+    schedules_with_only_ids = {year_month: _schedule_to_ids(schedule) for year_month, schedule in schedules.items()}
+    return schedules_with_only_ids, shift_counts
+
+
+def _merge_batch_result(employees, schedules_with_only_ids, shift_counts):
+    """Riporta il risultato di un worker sugli oggetti Employee del processo principale:
+    aggiorna i contatori e sostituisce gli IDs delle schedule con gli oggetti Employee."""
+    employee_lookup = {emp.id: emp for emp in employees}
+
+    for emp_id, shift_count in shift_counts.items():
+        employee_lookup[emp_id].shift_count.update(shift_count)
+
+    if not schedules_with_only_ids:
+        return False
+
+    return {
+        year_month: _schedule_from_ids(schedule, employee_lookup)
+        for year_month, schedule in schedules_with_only_ids.items()
+    }
+
+
+def _warm_up_worker():
+    """Funzione vuota eseguita da ShiftManager.start_process_pool: avvia un processo worker e gli fa importare
+    i moduli del generatore prima della prima generazione."""
+    return None
+
+
+def _candidate_worker(employees, locked_shifts, year, month, config_dict, seed):
+    """Funzione eseguita nei processi worker di ShiftManager.best_of_n_shift_assignator.
+    Genera un candidato con il seed dato e ritorna (schedule con soli IDs, contatori finali, punteggio di equità)."""
+    seed_random_generators(seed)
+
+    shift_manager = ShiftManager(types.SimpleNamespace(emp_list=employees))
+    if not shift_manager.shift_assignator(year, month, config_dict, locked_shifts):
+        return False, None, None
+
+    shift_counts = {emp.id: emp.shift_count for emp in employees}
+    return _schedule_to_ids(shift_manager.shift_schedule), shift_counts, fairness_score(employees)
+
+
+def fairness_score(employees):
+    """Punteggio di equità della distribuzione dei turni (più basso = più equo).
+    Ritorna la tupla (somma degli scarti max-min, somma delle varianze) calcolata sui contatori di ciascun tipo
+    di turno. Le tuple si confrontano in ordine: a parità di scarto vince la varianza minore."""
+    total_spread = 0
+    total_variance = 0.0
+    if not employees:
+        return total_spread, total_variance
+
+    for shift_type in FairnessQueues.SHIFT_TYPES:
+        values = [emp.shift_count[shift_type] for emp in employees]
+        mean = sum(values) / len(values)
+        total_spread += max(values) - min(values)
+        total_variance += sum((value - mean) ** 2 for value in values) / len(values)
+
+    return total_spread, total_variance
+
+
+def months_range(start_year: int, start_month: int, n_of_months: int):
+    """Itera le coppie (anno, mese) di n_of_months mesi consecutivi a partire da start_month/start_year."""
+    for offset in range(n_of_months):
+        year, month_index = divmod(start_month - 1 + offset, 12)
+        yield start_year + year, month_index + 1
+
+
 def monthly_calendar_generator(selected_year: int, selected_month: int):
     """Dati in input un certo anno e un certo mese, genera un dictionary con tutti i giorni del mese.
     Associa, inoltre, a ogni giorno del mese i possibili turni.
@@ -1,11 +1,19 @@
+import multiprocessing
 import library
+import file_manager as storage
 from interface import GUI
 
 if __name__ == "__main__":
+    # Nell'eseguibile PyInstaller i processi worker della generazione (candidates > 1) rilanciano l'eseguibile:
+    # freeze_support() li fa terminare qui invece di avviare una nuova GUI
+    multiprocessing.freeze_support()
+
     # Caricamento gestori
-    file_manager = library.JsonManager()
-    configuration = file_manager.load_config_file()
-    employees_manager = library.EmployeesManager(configuration)
+    # config.json viene letto dalla base comune: lo storico JSON viene aperto solo se è il backend scelto
+    configuration = storage.StorageManager().load_config_file()
+    # Backend di persistenza scelto in config.json (files -> storage_backend)
+    file_manager = storage.create_storage_manager(configuration)
+    employees_manager = library.EmployeesManager(configuration, file_loader=file_manager)
     shift_manager = library.ShiftManager(employees_manager)
     gui = GUI.ShiftManagerGui(employees_manager,
                               shift_manager,
@@ -14,5 +22,20 @@ if __name__ == "__main__":
 
     gui.mainloop()
 
+    # Chiusura dei processi worker della generazione (candidates > 1)
+    shift_manager.close()
+
+    # Completamento dei salvataggi ancora in coda prima della chiusura
+    gui.persistence_worker.close()
+
+    # Manutenzione dei soli file JSON: il backend SQLite non ha journal né anni da archiviare
+    if isinstance(file_manager, storage.JsonManager):
+        # Alla chiusura le modifiche registrate nel journal vengono consolidate negli snapshot
+        file_manager.compact_journal()
+        # Gli anni conclusi vengono compressi in un segmento per anno (letto solo se si consulta un loro mese)
+        file_manager.archive_closed_years()
+    else:
+        file_manager.close()
+
     # +++ TESTING +++
     # test_machine = library.ShiftGeneratorTest(employees_manager)
@@ -0,0 +1,137 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy è una dipendenza opzionale: senza di essa si usa il motore pure-Python
+    np = None
+
+# Colonne della matrice dei contatori (impiegati x tipi di turno)
+SHIFT_TYPES = ("mattina", "mattina_rep", "pomeriggio", "weekend_rep")
+SHIFT_COLUMN = {shift_type: column for column, shift_type in enumerate(SHIFT_TYPES)}
+
+
+def numpy_available():
+    """Ritorna True se NumPy è installato e il motore matriciale è utilizzabile."""
+    return np is not None
+
+
+def seed(value=None):
+    """Inizializza il generatore casuale di NumPy (se installato). Con value=None usa l'entropia di sistema."""
+    if np is not None:
+        np.random.seed(None if value is None else value % 2 ** 32)
+
+
+def _least_loaded(counts, column, mask, n_of_employees):
+    """Ritorna gli indici (ordinati per carico) dei n_of_employees impiegati con meno turni di tipo column
+    tra quelli per cui mask è True. A parità di turni la scelta è casuale: al contatore intero si somma un
+    valore uniforme in [0, 1), che ordina casualmente solo gli impiegati con lo stesso numero di turni."""
+    n_candidates = int(mask.sum())
+    n_of_employees = min(n_of_employees, n_candidates)
+    if n_of_employees <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    keys = counts[:, column] + np.random.random_sample(counts.shape[0])
+    keys[~mask] = np.inf
+
+    if n_of_employees < counts.shape[0]:
+        selected = np.argpartition(keys, n_of_employees - 1)[:n_of_employees]
+    else:
+        selected = np.arange(counts.shape[0])
+
+    return selected[np.argsort(keys[selected])]
+
+
+def matrix_shift_assignator(shift_assignment_for_month, employees, locked_shifts, config_dict):
+    """Variante vettorizzata di ShiftManager.shift_assignator.
+    I contatori di tutti gli impiegati sono tenuti in una matrice NumPy (impiegati x tipi di turno) e la selezione
+    giornaliera usa maschere booleane per disponibilità e lock e argpartition al posto del sort.
+    I contatori vengono riscritti negli oggetti Employee solo a fine generazione.
+
+    - shift_assignment_for_month: calendario vuoto generato da monthly_calendar_generator().
+    - employees: lista degli Employee da considerare.
+    - locked_shifts: ShiftLocks con i turni bloccati manualmente.
+
+    Ritorna shift_assignment_for_month popolato con gli oggetti Employee."""
+
+    n_employees = len(employees)
+    index_of_id = {emp.id: index for index, emp in enumerate(employees)}
+    weekend_days = config_dict["shift_settings"]["weekend_days"]
+    n_on_mattina_rep = config_dict["shift_settings"]["n_of_employees"]["mattina_rep"]
+    n_on_weekend_rep = config_dict["shift_settings"]["n_of_employees"]["weekend_rep"]
+
+    counts = np.array(
+        [[emp.shift_count[shift_type] for shift_type in SHIFT_TYPES] for emp in employees],
+        dtype=np.int64
+    ).reshape(n_employees, len(SHIFT_TYPES))
+
+    # Matrice giorni x impiegati delle ferie del mese, costruita con una sola passata sui days_off
+    days_of_month = list(shift_assignment_for_month)
+    day_index = {day_date: index for index, day_date in enumerate(days_of_month)}
+    off_duty = np.zeros((len(days_of_month), n_employees), dtype=bool)
+    for emp_index, emp in enumerate(employees):
+        for day_off in emp.days_off.between(days_of_month[0], days_of_month[-1]):
+            off_duty[day_index[day_off], emp_index] = True
+
+    for day_number, day_date in enumerate(days_of_month):
+        daily_shifts = shift_assignment_for_month[day_date]
+        available = ~off_duty[day_number]
+
+        # Split giornaliero calcolato sui presenti (come _calculate_daily_split)
+        n_available = int(available.sum())
+        n_on_mattina = -(-n_available // 2)
+        remaining = {
+            "mattina": n_on_mattina,
+            "mattina_rep": n_on_mattina_rep,
+            "pomeriggio": n_available - n_on_mattina,
+            "weekend_rep": n_on_weekend_rep
+        }
+
+        # +++ GESTIONE LOCKED SHIFTS +++
+        locked_mattina = []
+        locked_mattina_rep = []
+        for emp_id, shift_type in locked_shifts.for_date(day_date.isoformat()).items():
+            emp_index = index_of_id.get(emp_id)
+            if emp_index is None or shift_type not in SHIFT_COLUMN:
+                continue
+            daily_shifts[shift_type].append(employees[emp_index])
+            counts[emp_index, SHIFT_COLUMN[shift_type]] += 1
+            remaining[shift_type] -= 1
+            available[emp_index] = False
+
+            if shift_type == "mattina":
+                locked_mattina.append(emp_index)
+            elif shift_type == "mattina_rep":
+                locked_mattina_rep.append(emp_index)
+
+        if day_date.weekday() in weekend_days:
+            selected = _least_loaded(counts, SHIFT_COLUMN["weekend_rep"], available, remaining["weekend_rep"])
+            counts[selected, SHIFT_COLUMN["weekend_rep"]] += 1
+            daily_shifts["weekend_rep"].extend(employees[i] for i in selected)
+            continue
+
+        # +++ Assegnazione turni mattina +++
+        selected_mattina = _least_loaded(counts, SHIFT_COLUMN["mattina"], available, remaining["mattina"])
+        counts[selected_mattina, SHIFT_COLUMN["mattina"]] += 1
+        daily_shifts["mattina"].extend(employees[i] for i in selected_mattina)
+        available[selected_mattina] = False
+
+        # +++ Assegnazione mattina + rep +++
+        # Candidati: tutti quelli di mattina oggi (anche bloccati) che non hanno già mattina_rep
+        candidates_for_rep = np.zeros(n_employees, dtype=bool)
+        candidates_for_rep[selected_mattina] = True
+        candidates_for_rep[locked_mattina] = True
+        candidates_for_rep[locked_mattina_rep] = False
+        selected_rep = _least_loaded(counts, SHIFT_COLUMN["mattina_rep"], candidates_for_rep,
+                                     remaining["mattina_rep"])
+        counts[selected_rep, SHIFT_COLUMN["mattina_rep"]] += 1
+        daily_shifts["mattina_rep"].extend(employees[i] for i in selected_rep)
+
+        # +++ Assegnazione turni pomeriggio +++
+        selected_pomeriggio = _least_loaded(counts, SHIFT_COLUMN["pomeriggio"], available, remaining["pomeriggio"])
+        counts[selected_pomeriggio, SHIFT_COLUMN["pomeriggio"]] += 1
+        daily_shifts["pomeriggio"].extend(employees[i] for i in selected_pomeriggio)
+
+    # Riscrittura dei contatori negli oggetti Employee
+    for emp_index, emp in enumerate(employees):
+        for shift_type, column in SHIFT_COLUMN.items():
+            emp.shift_count[shift_type] = int(counts[emp_index, column])
+
+    return shift_assignment_for_month
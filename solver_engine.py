@@ -0,0 +1,222 @@
+import heapq
+import math
+import random
+from collections import deque
+
+# Motore di generazione "ottimo" (pure-Python, nessuna dipendenza esterna).
+# Il mese viene modellato come una sequenza di problemi di flusso a costo minimo:
+#   sorgente -> giorno (capacità = posti del turno) -> impiegato (capacità 1 se disponibile) -> pozzo
+# dove il costo sull'arco impiegato -> pozzo è una funzione convessa (quadratica) dei contatori cumulativi.
+# Minimizzare la somma dei quadrati dei contatori equivale a bilanciarli sull'intero mese, non giorno per giorno.
+# Ogni problema è risolto in modo esatto con la cancellazione dei cicli negativi, partendo da un flusso ammissibile
+# greedy: un ciclo negativo è un cammino alternato che sposta un turno dall'impiegato a all'impiegato b
+# (eventualmente passando per scambi intermedi) quando il costo marginale di b è minore del risparmio su a.
+
+
+def _balance(days, eligible, slots, cost, n_employees):
+    """Risolve un singolo problema di flusso a costo minimo.
+        - eligible: {giorno: set(indici impiegati assegnabili)}
+        - slots: {giorno: numero di impiegati da assegnare}
+        - cost: cost(emp_index, n_turni) -> costo convesso dei turni assegnati in questo problema
+    Ritorna {giorno: set(indici impiegati assegnati)}."""
+
+    load = [0] * n_employees
+    days_of = [set() for _ in range(n_employees)]
+    assigned = {}
+
+    def add_cost(e):
+        return cost(e, load[e] + 1) - cost(e, load[e])
+
+    def remove_saving(e):
+        return cost(e, load[e]) - cost(e, load[e] - 1)
+
+    # Flusso iniziale ammissibile: per ogni giorno gli impiegati con costo marginale minore (greedy)
+    for day in days:
+        chosen = heapq.nsmallest(slots[day], eligible[day], key=lambda e: (add_cost(e), random.random()))
+        assigned[day] = set(chosen)
+        for e in chosen:
+            load[e] += 1
+            days_of[e].add(day)
+
+    def cancel_cycle(donor):
+        """Cerca (BFS sul grafo residuo) un cammino alternato che sposti un turno da donor a un impiegato con costo
+        marginale minore del risparmio. Se lo trova lo applica e ritorna True."""
+        saving = remove_saving(donor)
+        parent = {donor: None}
+        expanded_days = set()
+        queue = deque([donor])
+
+        while queue:
+            x = queue.popleft()
+            for day in days_of[x]:
+                # Da un giorno si raggiungono sempre gli stessi impiegati: basta espanderlo una volta
+                if day in expanded_days:
+                    continue
+                expanded_days.add(day)
+
+                for y in eligible[day]:
+                    if y in parent or y in assigned[day]:
+                        continue
+                    parent[y] = (x, day)
+
+                    if add_cost(y) < saving:
+                        # Applica il cammino: ogni impiegato cede il giorno al successivo
+                        load[donor] -= 1
+                        load[y] += 1
+                        node = y
+                        while parent[node] is not None:
+                            giver, swap_day = parent[node]
+                            assigned[swap_day].remove(giver)
+                            assigned[swap_day].add(node)
+                            days_of[giver].remove(swap_day)
+                            days_of[node].add(swap_day)
+                            node = giver
+                        return True
+
+                    queue.append(y)
+        return False
+
+    improved = True
+    while improved:
+        improved = False
+        # Può cedere un turno solo chi ha un risparmio maggiore del minimo costo marginale di aggiunta
+        min_add_cost = min(add_cost(e) for e in range(n_employees))
+        donors = [e for e in range(n_employees) if load[e] > 0 and remove_saving(e) > min_add_cost]
+        donors.sort(key=remove_saving, reverse=True)
+
+        for donor in donors:
+            while load[donor] > 0 and cancel_cycle(donor):
+                improved = True
+
+    return assigned
+
+
+def solver_shift_assignator(shift_assignment_for_month, employees, locked_shifts, config_dict):
+    """Motore di generazione basato su flusso a costo minimo (config.json -> shift_settings -> engine = "solver").
+    Rispetta locked_shifts, days_off e n_of_employees come ShiftManager.shift_assignator, ma bilancia i contatori
+    sull'intero mese. I problemi risolti, in ordine, sono:
+        1. mattina nei giorni feriali (costo su mattina e, di conseguenza, pomeriggio)
+        2. pomeriggio tra i restanti disponibili
+        3. weekend_rep (costo su weekend_rep e sul totale delle reperibilità)
+        4. mattina_rep tra chi fa mattina (costo su mattina_rep e sul totale delle reperibilità)
+
+    Ritorna shift_assignment_for_month popolato con gli oggetti Employee e aggiorna i contatori degli impiegati."""
+
+    n_employees = len(employees)
+    index_of_id = {emp.id: index for index, emp in enumerate(employees)}
+    weekend_days = config_dict["shift_settings"]["weekend_days"]
+    n_on_mattina_rep = config_dict["shift_settings"]["n_of_employees"]["mattina_rep"]
+    n_on_weekend_rep = config_dict["shift_settings"]["n_of_employees"]["weekend_rep"]
+
+    weekdays = []
+    weekends = []
+    free = {}  # {giorno: impiegati presenti e senza turno bloccato}
+    locked_mattina = {}
+    locked_mattina_rep = {}
+    remaining = {}
+
+    # +++ GESTIONE LOCKED SHIFTS E POSTI DISPONIBILI +++
+    for day_date, daily_shifts in shift_assignment_for_month.items():
+        available = {index for index, emp in enumerate(employees) if day_date not in emp.days_off}
+        n_on_mattina = math.ceil(len(available) / 2)
+        remaining[day_date] = {
+            "mattina": n_on_mattina,
+            "mattina_rep": n_on_mattina_rep,
+            "pomeriggio": len(available) - n_on_mattina,
+            "weekend_rep": n_on_weekend_rep
+        }
+        locked_mattina[day_date] = set()
+        locked_mattina_rep[day_date] = set()
+
+        for emp_id, shift_type in locked_shifts.for_date(day_date.isoformat()).items():
+            emp_index = index_of_id.get(emp_id)
+            if emp_index is None or shift_type not in daily_shifts:
+                continue
+            daily_shifts[shift_type].append(employees[emp_index])
+            employees[emp_index].shift_count[shift_type] += 1
+            remaining[day_date][shift_type] -= 1
+            available.discard(emp_index)
+
+            if shift_type == "mattina":
+                locked_mattina[day_date].add(emp_index)
+            elif shift_type == "mattina_rep":
+                locked_mattina_rep[day_date].add(emp_index)
+
+        free[day_date] = available
+        if day_date.weekday() in weekend_days:
+            weekends.append(day_date)
+        else:
+            weekdays.append(day_date)
+
+    base = {
+        shift_type: [emp.shift_count[shift_type] for emp in employees]
+        for shift_type in ("mattina", "mattina_rep", "pomeriggio", "weekend_rep")
+    }
+
+    # 1. Mattina: chi non fa mattina fa pomeriggio, quindi il costo considera entrambi i contatori
+    free_weekdays = [0] * n_employees
+    for day_date in weekdays:
+        for e in free[day_date]:
+            free_weekdays[e] += 1
+
+    def mattina_cost(e, m):
+        return (base["mattina"][e] + m) ** 2 + (base["pomeriggio"][e] + free_weekdays[e] - m) ** 2
+
+    mattina = _balance(
+        weekdays,
+        free,
+        {d: min(max(0, remaining[d]["mattina"]), len(free[d])) for d in weekdays},
+        mattina_cost,
+        n_employees
+    )
+
+    # 2. Pomeriggio tra i restanti disponibili
+    eligible_pomeriggio = {d: free[d] - mattina[d] for d in weekdays}
+    pomeriggio = _balance(
+        weekdays,
+        eligible_pomeriggio,
+        {d: min(max(0, remaining[d]["pomeriggio"]), len(eligible_pomeriggio[d])) for d in weekdays},
+        lambda e, p: (base["pomeriggio"][e] + p) ** 2,
+        n_employees
+    )
+
+    # 3. Weekend_rep: bilancia anche il totale delle reperibilità (weekend + mattina)
+    def weekend_rep_cost(e, w):
+        return (base["weekend_rep"][e] + w) ** 2 + (base["weekend_rep"][e] + base["mattina_rep"][e] + w) ** 2
+
+    weekend_rep = _balance(
+        weekends,
+        free,
+        {d: min(max(0, remaining[d]["weekend_rep"]), len(free[d])) for d in weekends},
+        weekend_rep_cost,
+        n_employees
+    )
+    weekend_rep_assigned = [0] * n_employees
+    for assigned in weekend_rep.values():
+        for e in assigned:
+            weekend_rep_assigned[e] += 1
+
+    # 4. Mattina_rep tra chi fa mattina (anche bloccato) e non ha già mattina_rep
+    eligible_rep = {d: (mattina[d] | locked_mattina[d]) - locked_mattina_rep[d] for d in weekdays}
+
+    def mattina_rep_cost(e, r):
+        total_rep = base["weekend_rep"][e] + weekend_rep_assigned[e] + base["mattina_rep"][e] + r
+        return (base["mattina_rep"][e] + r) ** 2 + total_rep ** 2
+
+    mattina_rep = _balance(
+        weekdays,
+        eligible_rep,
+        {d: min(max(0, remaining[d]["mattina_rep"]), len(eligible_rep[d])) for d in weekdays},
+        mattina_rep_cost,
+        n_employees
+    )
+
+    # Scrittura della schedule e dei contatori
+    for shift_type, assignment in (("mattina", mattina), ("pomeriggio", pomeriggio),
+                                   ("weekend_rep", weekend_rep), ("mattina_rep", mattina_rep)):
+        for day_date, assigned in assignment.items():
+            for e in sorted(assigned):
+                shift_assignment_for_month[day_date][shift_type].append(employees[e])
+                employees[e].shift_count[shift_type] += 1
+
+    return shift_assignment_for_month
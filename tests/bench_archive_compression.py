@@ -0,0 +1,62 @@
+"""Benchmark: dimensione della directory dello storico turni (10 anni chiusi + anno corrente) prima e dopo
+l'archiviazione degli anni conclusi, per ogni algoritmo di compressione (config.json -> files -> archive_compression),
+e latenza di lettura di un mese archiviato (prima lettura con decompressione del segmento, poi dalla cache) e di un
+mese dell'anno corrente. Il benchmark lavora in una directory temporanea."""
+import sys
+import os
+import time
+import tempfile
+
+# Add parent directory to path to import file_manager
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import ARCHIVE_CODECS, JsonManager
+from bench_fixtures import month_schedule, stub_roster
+
+N_EMPLOYEES = 60
+N_YEARS = 10
+CURRENT_YEAR = 2000 + N_YEARS
+EMPLOYEES = stub_roster(N_EMPLOYEES)
+
+
+def directory_size(directory):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def run(archive_compression):
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            json_manager = JsonManager(archive_compression=archive_compression)
+            for year in range(2000, CURRENT_YEAR + 1):
+                for month in range(1, 13):
+                    json_manager.save_shifts_file(month_schedule(EMPLOYEES, year, month))
+            size_before = directory_size(json_manager.directory_shifts_storage)
+
+            archive_time = timed(lambda: json_manager.archive_closed_years(before_year=CURRENT_YEAR))
+            size_after = directory_size(json_manager.directory_shifts_storage)
+
+            reader = JsonManager(archive_compression=archive_compression)
+            first_read = timed(lambda: reader.load_month_shifts(2003, 6))
+            cached_read = timed(lambda: reader.load_month_shifts(2003, 7))
+            current_read = timed(lambda: reader.load_month_shifts(CURRENT_YEAR, 6))
+        finally:
+            os.chdir(previous_cwd)
+    return size_before, size_after, archive_time, first_read, cached_read, current_read
+
+
+if __name__ == "__main__":
+    print(f"{'algoritmo':>9} {'prima (KB)':>11} {'dopo (KB)':>10} {'archiviazione (ms)':>19} "
+          f"{'mese archiviato (ms)':>21} {'da cache (ms)':>14} {'anno corrente (ms)':>19}")
+    for archive_compression in ARCHIVE_CODECS:
+        size_before, size_after, archive_time, first_read, cached_read, current_read = run(archive_compression)
+        print(f"{archive_compression:>9} {size_before / 1024:>11.0f} {size_after / 1024:>10.0f} "
+              f"{archive_time * 1000:>19.1f} {first_read * 1000:>21.2f} {cached_read * 1000:>14.3f} "
+              f"{current_read * 1000:>19.2f}")
@@ -0,0 +1,76 @@
+"""Benchmark: scritture atomiche di JsonManager (file temporaneo + fsync + rinomina).
+Confronta il salvataggio di 10 anni di shard uno alla volta e in un unico write_batch() (fsync raggruppati), e il
+salvataggio ripetuto di un mese non modificato (scrittura saltata grazie all'hash del contenuto).
+Il benchmark lavora in una directory temporanea."""
+import sys
+import os
+import time
+import datetime
+import tempfile
+
+# Add parent directory to path to import file_manager
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import JsonManager
+
+N_EMPLOYEES = 60
+N_YEARS = 10
+REPEAT = 20
+
+
+def month_schedule_json(year, month):
+    half = N_EMPLOYEES // 2
+    day = datetime.date(year, month, 1)
+    schedule = {}
+    while day.month == month:
+        schedule[day.isoformat()] = {
+            "mattina": list(range(1, half + 1)),
+            "mattina_rep": [1],
+            "pomeriggio": list(range(half + 1, N_EMPLOYEES + 1)),
+            "weekend_rep": []
+        }
+        day += datetime.timedelta(days=1)
+    return schedule
+
+
+def write_history(json_manager, first_year):
+    for year in range(first_year, first_year + N_YEARS):
+        for month in range(1, 13):
+            json_manager._write_month_shard(str(year), str(month), month_schedule_json(year, month))
+
+
+if __name__ == "__main__":
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            json_manager = JsonManager()
+
+            start = time.perf_counter()
+            write_history(json_manager, 2000)
+            single_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with json_manager.write_batch():
+                write_history(json_manager, 3000)
+            batch_time = time.perf_counter() - start
+
+            schedule = month_schedule_json(2000, 6)
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                json_manager._write_month_shard("2000", "6", schedule)
+            unchanged_time = (time.perf_counter() - start) / REPEAT
+
+            start = time.perf_counter()
+            for i in range(REPEAT):
+                schedule["2000-06-01"]["mattina_rep"] = [i + 2]
+                json_manager._write_month_shard("2000", "6", schedule)
+            changed_time = (time.perf_counter() - start) / REPEAT
+        finally:
+            os.chdir(previous_cwd)
+
+    print(f"{N_YEARS * 12} shard, un fsync per file: {single_time * 1000:.1f} ms")
+    print(f"{N_YEARS * 12} shard, write_batch():     {batch_time * 1000:.1f} ms")
+    print(f"Salvataggio di un mese modificato:     {changed_time * 1000:.2f} ms")
+    print(f"Salvataggio di un mese non modificato: {unchanged_time * 1000:.2f} ms")
+    print(f"Scritture: {json_manager.write_stats()}")
@@ -0,0 +1,54 @@
+"""Benchmark: dimensione su disco e tempo di lettura dello storico turni (10 anni) nel formato JSON e in quello
+binario (config.json -> files -> shift_storage_format). Il benchmark lavora in una directory temporanea."""
+import sys
+import os
+import time
+import tempfile
+
+# Add parent directory to path to import file_manager
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import JsonManager
+from bench_fixtures import month_schedule, stub_roster
+
+N_EMPLOYEES = 60
+N_YEARS = 10
+EMPLOYEES = stub_roster(N_EMPLOYEES)
+
+
+def storage_size(directory):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(directory) for name in names if name != "manifest.json")
+
+
+def run(shift_storage_format):
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            json_manager = JsonManager(shift_storage_format=shift_storage_format)
+            for year in range(2000, 2000 + N_YEARS):
+                for month in range(1, 13):
+                    json_manager.save_shifts_file(
+                        month_schedule(EMPLOYEES, year, month, rotate=False, weekend_rep_on_weekends=True))
+            size = storage_size(json_manager.directory_shifts_storage)
+
+            # Lettura dell'intero storico con una nuova istanza (cache vuota)
+            best = None
+            for _ in range(3):
+                reader = JsonManager(shift_storage_format=shift_storage_format)
+                start = time.perf_counter()
+                reader.load_shifts_file()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+        finally:
+            os.chdir(previous_cwd)
+    return size, best
+
+
+if __name__ == "__main__":
+    results = [(shift_storage_format, *run(shift_storage_format)) for shift_storage_format in ("json", "binary")]
+
+    print(f"{'formato':>8} {'dimensione (KB)':>16} {'lettura storico (ms)':>21}")
+    for shift_storage_format, size, elapsed in results:
+        print(f"{shift_storage_format:>8} {size / 1024:>16.1f} {elapsed * 1000:>21.1f}")
@@ -0,0 +1,58 @@
+"""Benchmark: tempo di avvio (EmployeesManager) e memoria della lista impiegati al crescere dello storico delle ferie.
+Con le ferie partizionate per anno vengono lette solo quelle degli anni di year_range: il costo resta costante.
+Il benchmark lavora in una directory temporanea."""
+import sys
+import os
+import time
+import datetime
+import tempfile
+import tracemalloc
+
+# Add parent directory to path to import library
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+from file_manager import JsonManager
+
+N_EMPLOYEES = 2000
+DAYS_OFF_PER_YEAR = 25
+YEARS_OF_HISTORY = [1, 10, 20]
+CONFIG = {"files": {"employees_database_file": "data/employees.json"}, "date": {"year_range": 1}}
+
+
+def build_roster(n_years):
+    current_year = datetime.date.today().year
+    roster = []
+    for i in range(1, N_EMPLOYEES + 1):
+        emp = library.Employee(i, f"Surname{i}", f"Name{i}", f"S{i:06d}")
+        for year in range(current_year - n_years + 1, current_year + 1):
+            for n in range(DAYS_OFF_PER_YEAR):
+                emp.days_off.add(datetime.date(year, 1, 1) + datetime.timedelta(days=(i + n * 13) % 365))
+        roster.append(emp)
+    return roster
+
+
+def measure_startup():
+    tracemalloc.start()
+    start = time.perf_counter()
+    employees_manager = library.EmployeesManager(CONFIG, file_loader=JsonManager())
+    elapsed = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, memory, sum(len(emp.days_off) for emp in employees_manager.emp_list)
+
+
+if __name__ == "__main__":
+    print(f"{'anni di ferie':>14} {'avvio (ms)':>11} {'memoria (MB)':>13} {'giorni caricati':>16}")
+    previous_cwd = os.getcwd()
+    for n_years in YEARS_OF_HISTORY:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.chdir(tmp_dir)
+            try:
+                json_manager = JsonManager()
+                json_manager.save_employees_file(build_roster(n_years))
+                json_manager.compact_journal()
+                elapsed, memory, n_of_days = measure_startup()
+            finally:
+                os.chdir(previous_cwd)
+        print(f"{n_years:>14} {elapsed * 1000:>11.1f} {memory / 2 ** 20:>13.2f} {n_of_days:>16}")
@@ -0,0 +1,90 @@
+"""Benchmark: memoria e throughput della classe Employee con __slots__ rispetto alla precedente classe con __dict__.
+Misura la memoria allocata per il roster (tracemalloc), il tempo di creazione, un'iterazione sui contatori
+(come EmployeeTable / save_employees_file) e la generazione di un mese."""
+import sys
+import os
+import time
+import types
+import datetime
+import tracemalloc
+
+# Add parent directory to path to import library
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+
+CONFIG = {
+    "shift_settings": {
+        "n_of_employees": {"mattina_rep": 1, "weekend_rep": 1},
+        "weekend_days": [5, 6]
+    }
+}
+ROSTER_SIZES = [10000, 50000]
+GENERATION_SIZE = 2000
+
+
+class LegacyEmployee:
+    """Employee come definito prima di __slots__ (istanza con __dict__)."""
+
+    def __init__(self, emp_id, emp_surname, emp_name, emp_serial_number):
+        self.id = emp_id
+        self.surname = emp_surname
+        self.name = emp_name
+        self.serial_number = emp_serial_number
+        self.days_off = library.DaysOff()
+        self.shift_count = {
+            "mattina": 0,
+            "mattina_rep": 0,
+            "pomeriggio": 0,
+            "weekend_rep": 0,
+            "days_off": 0
+        }
+
+
+def build_roster(employee_class, n):
+    roster = []
+    for i in range(1, n + 1):
+        emp = employee_class(i, f"Surname{i}", f"Name{i}", f"S{i:06d}")
+        # Qualche giorno di ferie per impiegato, come in un roster reale
+        emp.days_off.add(datetime.date(2025, 1 + i % 12, 1 + i % 28))
+        roster.append(emp)
+    return roster
+
+
+def measure_roster(employee_class, n):
+    tracemalloc.start()
+    start = time.perf_counter()
+    roster = build_roster(employee_class, n)
+    build_time = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(10):
+        total = sum(emp.shift_count["mattina"] + len(emp.days_off) for emp in roster)
+    iteration_time = (time.perf_counter() - start) / 10
+
+    return memory, build_time, iteration_time, total
+
+
+def measure_generation(employee_class, n):
+    roster = build_roster(employee_class, n)
+    manager = library.ShiftManager(types.SimpleNamespace(emp_list=roster))
+    start = time.perf_counter()
+    manager.shift_assignator(2025, 3, CONFIG)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print(f"{'impiegati':>10} {'classe':>8} {'memoria (MB)':>13} {'byte/imp.':>10} "
+          f"{'creazione (ms)':>15} {'iterazione (ms)':>16}")
+    for n in ROSTER_SIZES:
+        for label, employee_class in (("dict", LegacyEmployee), ("slots", library.Employee)):
+            memory, build_time, iteration_time, _ = measure_roster(employee_class, n)
+            print(f"{n:>10} {label:>8} {memory / 2 ** 20:>13.2f} {memory / n:>10.0f} "
+                  f"{build_time * 1000:>15.1f} {iteration_time * 1000:>16.2f}")
+
+    print(f"\nGenerazione di un mese con {GENERATION_SIZE} impiegati")
+    for label, employee_class in (("dict", LegacyEmployee), ("slots", library.Employee)):
+        elapsed = min(measure_generation(employee_class, GENERATION_SIZE) for _ in range(3))
+        print(f"{label:>8}: {elapsed * 1000:.1f} ms")
@@ -0,0 +1,96 @@
+"""Benchmark: costruzione della griglia di export (Exporter._prepare_data_grid) per un mese con 2000 impiegati,
+con l'indice dei turni costruito in una passata rispetto alla precedente ricerca nelle liste dei turni per ogni
+impiegato e giorno. Verifica anche che le due griglie coincidano."""
+import sys
+import os
+import time
+import types
+import datetime
+import calendar
+
+# Add parent directory to path to import library and exporter
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+import exporter
+
+N_EMPLOYEES = 2000
+YEAR = 2025
+MONTH = 3
+CONFIG = {
+    "shift_settings": {
+        "shift_representation": {"mattina": "M", "mattina_rep": "M+R", "pomeriggio": "P", "weekend_rep": "R",
+                                 "off_duty": "X"},
+        "n_of_employees": {"mattina_rep": 1, "weekend_rep": 1},
+        "weekend_days": [5, 6]
+    }
+}
+
+
+def legacy_prepare_data_grid(self):
+    """_prepare_data_grid prima dell'indice dei turni."""
+    grid = []
+    num_days = calendar.monthrange(self.year, self.month)[1]
+
+    headers = ["Matricola", "Cognome", "Nome"]
+    for day in range(1, num_days + 1):
+        day_name = exporter.WEEKDAYS[datetime.date(self.year, self.month, day).weekday()]
+        headers.append(f"{day_name} {day}")
+    grid.append(headers)
+
+    for employee in self.employee_list:
+        row_values = [employee.serial_number, employee.surname, employee.name]
+        for day in range(1, num_days + 1):
+            current_date = datetime.date(self.year, self.month, day)
+            shift_text = ""
+
+            if current_date in employee.days_off:
+                shift_text = self.SHIFT_CORRISPONDANCE["off_duty"]
+            elif self.schedule_data and current_date in self.schedule_data:
+                daily_shifts = self.schedule_data[current_date]
+                employee_ids_in_mattina_rep = [emp.id for emp in daily_shifts["mattina_rep"]]
+                if employee.id in employee_ids_in_mattina_rep:
+                    shift_text = self.SHIFT_CORRISPONDANCE["mattina_rep"]
+                else:
+                    for shift_type, emp_assigned_to_shift in daily_shifts.items():
+                        employee_ids_in_shift = [emp.id for emp in emp_assigned_to_shift]
+                        if employee.id in employee_ids_in_shift:
+                            shift_text = self.SHIFT_CORRISPONDANCE.get(shift_type, "?")
+                            break
+
+            row_values.append(shift_text)
+        grid.append(row_values)
+    return grid
+
+
+def build_schedule():
+    roster = []
+    for i in range(1, N_EMPLOYEES + 1):
+        emp = library.Employee(i, f"Surname{i}", f"Name{i}", f"S{i:06d}")
+        emp.days_off.add(datetime.date(YEAR, MONTH, 1 + i % 28))
+        roster.append(emp)
+    manager = library.ShiftManager(types.SimpleNamespace(emp_list=roster))
+    manager.shift_assignator(YEAR, MONTH, CONFIG)
+    return roster, manager.export_schedule()
+
+
+def measure(prepare_data_grid, roster, schedule):
+    original = exporter.Exporter._prepare_data_grid
+    exporter.Exporter._prepare_data_grid = prepare_data_grid
+    try:
+        start = time.perf_counter()
+        data_grid = exporter.Exporter(schedule, roster, YEAR, MONTH, CONFIG).data_grid
+        return time.perf_counter() - start, data_grid
+    finally:
+        exporter.Exporter._prepare_data_grid = original
+
+
+if __name__ == "__main__":
+    roster, schedule = build_schedule()
+    legacy_time, legacy_grid = measure(legacy_prepare_data_grid, roster, schedule)
+    index_time, index_grid = measure(exporter.Exporter._prepare_data_grid, roster, schedule)
+
+    print(f"Griglia di export, {N_EMPLOYEES} impiegati, {MONTH}/{YEAR}")
+    print(f"  ricerca nelle liste: {legacy_time * 1000:>9.1f} ms")
+    print(f"  indice dei turni:    {index_time * 1000:>9.1f} ms")
+    print(f"  griglie identiche:   {legacy_grid == index_grid}")
@@ -0,0 +1,34 @@
+"""Dati comuni ai benchmark dello storico turni (tests/bench_*.py): non è un benchmark, viene importato dagli altri.
+Le programmazioni sono nel formato di ShiftManager.export_schedule(): {datetime.date: {shift_type: [impiegati]}}."""
+import datetime
+
+
+class StubEmployee:
+    """Impiegato minimo: per salvare lo storico basta l'id."""
+
+    def __init__(self, emp_id):
+        self.id = emp_id
+
+
+def stub_roster(n_employees):
+    """Impiegati con id da 1 a n_employees."""
+    return [StubEmployee(i) for i in range(1, n_employees + 1)]
+
+
+def month_schedule(roster, year, month, rotate=True, weekend_rep_on_weekends=False):
+    """Schedule di un mese con metà degli impiegati di mattina e metà di pomeriggio.
+        - rotate: gli impiegati ruotano di giorno in giorno (altrimenti ogni giorno ha le stesse assegnazioni).
+        - weekend_rep_on_weekends: il sabato e la domenica c'è solo la reperibilità weekend del primo impiegato."""
+    half = len(roster) // 2
+    day = datetime.date(year, month, 1)
+    schedule = {}
+    while day.month == month:
+        if weekend_rep_on_weekends and day.weekday() >= 5:
+            schedule[day] = {"mattina": [], "mattina_rep": [], "pomeriggio": [], "weekend_rep": roster[:1]}
+        else:
+            offset = day.toordinal() % len(roster) if rotate else 0
+            rotation = roster[offset:] + roster[:offset]
+            schedule[day] = {"mattina": rotation[:half], "mattina_rep": rotation[:1], "pomeriggio": rotation[half:],
+                             "weekend_rep": []}
+        day += datetime.timedelta(days=1)
+    return schedule
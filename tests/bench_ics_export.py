@@ -0,0 +1,80 @@
+"""Benchmark: export dei calendari iCalendar (un file .ics per impiegato) di un anno di storico al crescere degli
+impiegati. Confronta la raccolta dei turni con una passata sullo storico per ogni impiegato (misurata solo sui
+roster piccoli) con la passata unica di PeriodExporter.export_to_ics, e la scrittura dei file da un solo thread o
+dal pool di thread. Il benchmark lavora in una directory temporanea."""
+import sys
+import os
+import time
+import datetime
+import tempfile
+import contextlib
+
+# Add parent directory to path to import library, exporter and file_manager
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+from exporter import PeriodExporter
+from file_manager import JsonManager
+from bench_fixtures import month_schedule
+
+YEAR = 2025
+ROSTER_SIZES = [200, 1000, 5000]
+PER_EMPLOYEE_MAX_ROSTER = 1000
+CONFIG = {
+    "shift_settings": {
+        "shift_representation": {"mattina": "M", "mattina_rep": "M+R", "pomeriggio": "P", "weekend_rep": "R",
+                                 "off_duty": "X"}
+    }
+}
+
+
+class PerEmployeeExporter(PeriodExporter):
+    """export_to_ics con i turni di ogni impiegato cercati nello storico con una passata per impiegato."""
+
+    def _iter_loaded_months(self, prepare):
+        month_schedules = [self.file_loader.load_month_shifts(year, month) for year, month in self.months]
+        for employee in self.employee_list:
+            days = {}
+            for schedule_with_only_ids in month_schedules:
+                for date_str, daily_shifts in schedule_with_only_ids.items():
+                    day = datetime.date.fromisoformat(date_str)
+                    for shift_type, emp_ids in daily_shifts.items():
+                        if employee.id in emp_ids and (shift_type == "mattina_rep" or day not in days):
+                            days[day] = shift_type
+            yield {employee.id: days}
+
+
+def timed(exporter_class, roster, directory, max_workers):
+    period_exporter = exporter_class(JsonManager(), roster, [(YEAR, month) for month in range(1, 13)], CONFIG,
+                                     max_workers=max_workers)
+    start = time.perf_counter()
+    paths = period_exporter.export_to_ics(directory)
+    return time.perf_counter() - start, len(paths)
+
+
+if __name__ == "__main__":
+    print(f"{'impiegati':>10} {'passata per impiegato (ms)':>27} {'passata unica (ms)':>19} "
+          f"{'passata unica, pool (ms)':>25} {'file':>6}")
+    previous_cwd = os.getcwd()
+    for n_employees in ROSTER_SIZES:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.chdir(tmp_dir)
+            try:
+                roster = [library.Employee(i, f"Surname{i}", f"Name{i}", f"S{i:06d}")
+                          for i in range(1, n_employees + 1)]
+                with contextlib.redirect_stdout(None):
+                    json_manager = JsonManager()
+                    for month in range(1, 13):
+                        json_manager.save_shifts_file(month_schedule(roster, YEAR, month))
+
+                if n_employees <= PER_EMPLOYEE_MAX_ROSTER:
+                    per_employee_time, _ = timed(PerEmployeeExporter, roster, "per_impiegato", 1)
+                    per_employee = f"{per_employee_time * 1000:>27.0f}"
+                else:
+                    per_employee = f"{'-':>27}"
+                serial_time, n_of_files = timed(PeriodExporter, roster, "passata_unica", 1)
+                pool_time, _ = timed(PeriodExporter, roster, "pool", None)
+            finally:
+                os.chdir(previous_cwd)
+        print(f"{n_employees:>10} {per_employee} {serial_time * 1000:>19.0f} {pool_time * 1000:>25.0f} "
+              f"{n_of_files:>6}")
@@ -0,0 +1,60 @@
+"""Benchmark: tempo di generazione di un mese al crescere del numero di turni bloccati (locked_shifts).
+Con l'indice per data (ShiftLocks) il tempo deve restare costante rispetto al numero di lock."""
+import sys
+import os
+import time
+import types
+import random
+import datetime
+
+# Add parent directory to path to import library
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+
+CONFIG = {
+    "shift_settings": {
+        "n_of_employees": {"mattina_rep": 1, "weekend_rep": 1},
+        "weekend_days": [5, 6]
+    }
+}
+N_EMPLOYEES = 500
+YEAR = 2025
+MONTH = 3
+
+
+def build_employees(n):
+    return [library.Employee(i, f"Surname{i}", f"Name{i}", f"S{i:05d}") for i in range(1, n + 1)]
+
+
+def build_locks(n_locks, employees):
+    """Genera n_locks turni bloccati casuali sul mese di test (un solo lock per coppia giorno/impiegato)."""
+    days = list(library.monthly_calendar_generator(YEAR, MONTH))
+    locks = {}
+    while len(locks) < n_locks:
+        day = random.choice(days)
+        emp = random.choice(employees)
+        shift = "weekend_rep" if day.weekday() in CONFIG["shift_settings"]["weekend_days"] else "mattina"
+        locks[(day.isoformat(), emp.id)] = shift
+    return locks
+
+
+def run(n_locks, repeat=3):
+    best = None
+    for _ in range(repeat):
+        employees = build_employees(N_EMPLOYEES)
+        locks = build_locks(n_locks, employees)
+        manager = library.ShiftManager(types.SimpleNamespace(emp_list=employees))
+
+        start = time.perf_counter()
+        manager.shift_assignator(YEAR, MONTH, CONFIG, locked_shifts=locks)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    print(f"{N_EMPLOYEES} impiegati, {datetime.date(YEAR, MONTH, 1):%m/%Y}")
+    for n_locks in (0, 100, 1000, 5000, 10000):
+        print(f"locks={n_locks:>6}  generazione={run(n_locks) * 1000:8.1f} ms")
@@ -0,0 +1,52 @@
+"""Benchmark: motore pure-Python contro motore matriciale NumPy (config -> shift_settings -> engine)
+sulla generazione di un mese con 100, 1.000 e 10.000 impiegati."""
+import sys
+import os
+import time
+import types
+import random
+
+# Add parent directory to path to import library
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+import matrix_engine
+
+YEAR = 2025
+MONTH = 3
+
+
+def build_config(engine):
+    return {
+        "shift_settings": {
+            "n_of_employees": {"mattina_rep": 1, "weekend_rep": 1},
+            "weekend_days": [5, 6],
+            "engine": engine
+        }
+    }
+
+
+def run(engine, n_employees, repeat=3):
+    best = None
+    for _ in range(repeat):
+        employees = [library.Employee(i, f"Surname{i}", f"Name{i}", f"S{i:05d}") for i in range(1, n_employees + 1)]
+        for emp in employees:
+            emp.shift_count["mattina"] = random.randint(0, 50)
+        manager = library.ShiftManager(types.SimpleNamespace(emp_list=employees))
+
+        start = time.perf_counter()
+        manager.shift_assignator(YEAR, MONTH, build_config(engine))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    engines = ["python"] + (["numpy"] if matrix_engine.numpy_available() else [])
+    if len(engines) == 1:
+        print("NumPy non installato: viene misurato solo il motore pure-Python.")
+
+    for n_employees in (100, 1000, 10000):
+        results = "  ".join(f"{engine}={run(engine, n_employees) * 1000:8.1f} ms" for engine in engines)
+        print(f"impiegati={n_employees:>6}  {results}")
@@ -0,0 +1,88 @@
+"""Benchmark: export di un anno di storico (12 mesi, un anno archiviato e uno corrente) con dodici export mensili
+(un file per mese, come dal menu Esporta) e con PeriodExporter (un foglio per mese o un CSV unico), con i mesi
+letti e preparati da un solo thread o dal pool di thread. Il benchmark lavora in una directory temporanea."""
+import sys
+import os
+import time
+import datetime
+import tempfile
+import contextlib
+
+# Add parent directory to path to import library, exporter and file_manager
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+from exporter import Exporter, PeriodExporter
+from file_manager import JsonManager
+from bench_fixtures import month_schedule
+
+N_EMPLOYEES = 1000
+ARCHIVED_YEAR = 2024
+CURRENT_YEAR = 2025
+CONFIG = {
+    "shift_settings": {
+        "shift_representation": {"mattina": "M", "mattina_rep": "M+R", "pomeriggio": "P", "weekend_rep": "R",
+                                 "off_duty": "X"}
+    }
+}
+
+
+def monthly_exports(json_manager, roster, year, export_format):
+    """Dodici export mensili: lettura dello storico e Exporter del mese, un file per mese."""
+    employee_lookup = {emp.id: emp for emp in roster}
+    for month in range(1, 13):
+        schedule_data = {
+            datetime.date.fromisoformat(date_str): {
+                shift_type: [employee_lookup[emp_id] for emp_id in emp_ids]
+                for shift_type, emp_ids in daily_shifts.items()
+            }
+            for date_str, daily_shifts in json_manager.load_month_shifts(year, month).items()
+        }
+        exporter = Exporter(schedule_data, roster, year, month, CONFIG)
+        filepath = f"{month}.{export_format}"
+        if export_format == "xlsx":
+            exporter.export_to_xlsx(filepath)
+        else:
+            exporter.export_to_csv(filepath)
+
+
+def period_export(json_manager, roster, year, export_format, max_workers):
+    period_exporter = PeriodExporter(json_manager, roster, [(year, month) for month in range(1, 13)], CONFIG,
+                                     max_workers=max_workers)
+    if export_format == "xlsx":
+        period_exporter.export_to_xlsx(f"anno.{export_format}")
+    else:
+        period_exporter.export_to_csv(f"anno.{export_format}")
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    roster = [library.Employee(i, f"Surname{i}", f"Name{i}", f"S{i:06d}") for i in range(1, N_EMPLOYEES + 1)]
+    print(f"{'anno':>13} {'formato':>8} {'12 export (ms)':>15} {'periodo, 1 thread (ms)':>23} "
+          f"{'periodo, pool (ms)':>19}")
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            json_manager = JsonManager()
+            with contextlib.redirect_stdout(None):
+                for year in (ARCHIVED_YEAR, CURRENT_YEAR):
+                    for month in range(1, 13):
+                        json_manager.save_shifts_file(month_schedule(roster, year, month))
+            json_manager.archive_closed_years(before_year=CURRENT_YEAR)
+
+            for year, label in ((ARCHIVED_YEAR, "archiviato"), (CURRENT_YEAR, "corrente")):
+                for export_format in ("csv", "xlsx"):
+                    # Lettore nuovo per ogni misura: il segmento archiviato non è ancora in cache
+                    monthly_time = timed(lambda: monthly_exports(JsonManager(), roster, year, export_format))
+                    serial_time = timed(lambda: period_export(JsonManager(), roster, year, export_format, 1))
+                    pool_time = timed(lambda: period_export(JsonManager(), roster, year, export_format, None))
+                    print(f"{year} {label:>8} {export_format:>8} {monthly_time * 1000:>15.0f} "
+                          f"{serial_time * 1000:>23.0f} {pool_time * 1000:>19.0f}")
+        finally:
+            os.chdir(previous_cwd)
@@ -0,0 +1,65 @@
+"""Benchmark: latenza di salvataggio e visualizzazione di un mese al crescere dello storico turni (fino a 10 anni),
+per il backend JSON (shard mensili) e per quello SQLite. Per entrambi le latenze devono restare costanti rispetto
+al numero di anni salvati. Il benchmark lavora in una directory temporanea."""
+import sys
+import os
+import time
+import tempfile
+
+# Add parent directory to path to import file_manager
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import JsonManager, SqliteManager
+from bench_fixtures import month_schedule, stub_roster
+
+N_EMPLOYEES = 60
+YEARS_OF_HISTORY = [1, 5, 10]
+EMPLOYEES = stub_roster(N_EMPLOYEES)
+
+
+def measure(storage_manager, year, repeat=5):
+    schedule = month_schedule(EMPLOYEES, year, 6, rotate=False)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        storage_manager.save_shifts_file(schedule)
+    save_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        storage_manager.load_month_shifts(year, 6)
+    view_time = (time.perf_counter() - start) / repeat
+
+    return save_time, view_time
+
+
+def run(storage_manager_class):
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            storage_manager = storage_manager_class()
+            results = []
+            saved_years = 0
+            for n_years in YEARS_OF_HISTORY:
+                # Riempimento dello storico fino a n_years anni
+                for year in range(2000 + saved_years, 2000 + n_years):
+                    for month in range(1, 13):
+                        storage_manager.save_shifts_file(month_schedule(EMPLOYEES, year, month, rotate=False))
+                saved_years = n_years
+                results.append((n_years, *measure(storage_manager, 2000 + n_years - 1)))
+            if hasattr(storage_manager, "close"):
+                storage_manager.close()
+        finally:
+            os.chdir(previous_cwd)
+    return results
+
+
+if __name__ == "__main__":
+    all_results = [(label, run(storage_manager_class))
+                   for label, storage_manager_class in (("json", JsonManager), ("sqlite", SqliteManager))]
+
+    print(f"{'backend':>8} {'anni di storico':>16} {'salvataggio (ms)':>17} {'visualizzazione (ms)':>21}")
+    for label, results in all_results:
+        for n_years, save_time, view_time in results:
+            print(f"{label:>8} {n_years:>16} {save_time * 1000:>17.2f} {view_time * 1000:>21.2f}")
@@ -0,0 +1,61 @@
+"""Benchmark: motore greedy ("python") contro motore a flusso di costo minimo ("solver").
+Riporta il tempo di generazione di un mese e il punteggio di equità (library.fairness_score: somma degli scarti
+max-min dei contatori, somma delle varianze) partendo da contatori storici sbilanciati e ferie casuali."""
+import sys
+import os
+import copy
+import time
+import types
+import random
+import datetime
+
+# Add parent directory to path to import library
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+
+YEAR = 2025
+MONTH = 3
+
+
+def build_config(engine):
+    return {
+        "shift_settings": {
+            "n_of_employees": {"mattina_rep": 1, "weekend_rep": 1},
+            "weekend_days": [5, 6],
+            "engine": engine
+        }
+    }
+
+
+def build_employees(n_employees):
+    employees = []
+    for i in range(1, n_employees + 1):
+        emp = library.Employee(i, f"Surname{i}", f"Name{i}", f"S{i:05d}")
+        for shift_type, max_count in (("mattina", 12), ("pomeriggio", 12), ("mattina_rep", 4), ("weekend_rep", 4)):
+            emp.shift_count[shift_type] = random.randint(0, max_count)
+        emp.days_off = [datetime.date(YEAR, MONTH, random.randint(1, 31)) for _ in range(random.randint(0, 3))]
+        employees.append(emp)
+    return employees
+
+
+def run(engine, employees):
+    employees = copy.deepcopy(employees)
+    manager = library.ShiftManager(types.SimpleNamespace(emp_list=employees))
+
+    start = time.perf_counter()
+    manager.shift_assignator(YEAR, MONTH, build_config(engine))
+    elapsed = time.perf_counter() - start
+    return elapsed, library.fairness_score(employees)
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    for n_employees in (10, 50, 200, 500):
+        employees = build_employees(n_employees)
+        greedy_time, greedy_score = run("python", employees)
+        solver_time, solver_score = run("solver", employees)
+        print(f"impiegati={n_employees:>4}  "
+              f"greedy={greedy_time * 1000:8.1f} ms spread={greedy_score[0]:>3} var={greedy_score[1]:7.2f}  "
+              f"solver={solver_time * 1000:8.1f} ms spread={solver_score[0]:>3} var={solver_score[1]:7.2f}  "
+              f"gap var={greedy_score[1] - solver_score[1]:6.2f}")
@@ -0,0 +1,120 @@
+"""Benchmark: export TXT e CSV di un mese al crescere degli impiegati, con la griglia completa costruita in memoria
+(implementazione precedente: data_grid materializzato nel costruttore e file TXT unito in un'unica stringa) e con le
+righe generate da Exporter.iter_rows() e scritte una alla volta. Misura tempo e picco di memoria (tracemalloc) e
+verifica che i file prodotti coincidano. Il benchmark lavora in una directory temporanea."""
+import sys
+import os
+import csv
+import time
+import datetime
+import tempfile
+import tracemalloc
+
+# Add parent directory to path to import library and exporter
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+import exporter
+
+YEAR = 2025
+MONTH = 3
+ROSTER_SIZES = [2000, 20000, 100000]
+CONFIG = {
+    "shift_settings": {
+        "shift_representation": {"mattina": "M", "mattina_rep": "M+R", "pomeriggio": "P", "weekend_rep": "R",
+                                 "off_duty": "X"}
+    }
+}
+
+
+def legacy_export_to_txt(self, filepath):
+    """export_to_txt prima della pipeline a righe."""
+    data_grid = self.data_grid
+    num_of_columns = len(data_grid[0])
+    columns_width = [0] * num_of_columns
+
+    for row in data_grid:
+        for i, cell in enumerate(row):
+            cell_width = max(len(line) for line in cell.split("\n"))
+            if cell_width > columns_width[i]:
+                columns_width[i] = cell_width
+
+    lines = []
+    header_cells = []
+    for i, header in enumerate(data_grid[0]):
+        header_cells.append(header.replace("\n", " ").center(columns_width[i] + 2))
+    lines.append(" | ".join(header_cells))
+
+    separator_cells = ["-" * (w + 2) for w in columns_width]
+    lines.append("-+-".join(separator_cells))
+
+    for row in data_grid[1:]:
+        data_cells = []
+        for i, cell in enumerate(row):
+            data_cells.append(cell.center(columns_width[i] + 2))
+        lines.append(" | ".join(data_cells))
+
+    file_content = "\n".join(lines)
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write(file_content)
+
+
+def legacy_export_to_csv(self, filepath):
+    """export_to_csv prima della pipeline a righe."""
+    data_grid = self.data_grid
+    with open(filepath, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        header = [h.replace('\n', ' ') for h in data_grid[0]]
+        writer.writerow(header)
+        writer.writerows(data_grid[1:])
+
+
+def build_month(n_employees):
+    """Impiegati e schedule di un mese con una rotazione semplice dei turni e qualche giorno di ferie."""
+    roster = []
+    for i in range(1, n_employees + 1):
+        emp = library.Employee(i, f"Surname{i}", f"Name{i}", f"S{i:06d}")
+        emp.days_off.add(datetime.date(YEAR, MONTH, 1 + i % 28))
+        roster.append(emp)
+    schedule = {}
+    day = datetime.date(YEAR, MONTH, 1)
+    while day.month == MONTH:
+        half = n_employees // 2
+        schedule[day] = {"mattina": roster[:half], "mattina_rep": roster[:1], "pomeriggio": roster[half:],
+                         "weekend_rep": []}
+        day += datetime.timedelta(days=1)
+    return roster, schedule
+
+
+def measure(export_function, roster, schedule, filepath):
+    """Tempo e picco di memoria (in due esecuzioni distinte) di costruzione dell'Exporter + export."""
+    def run():
+        export_function(exporter.Exporter(schedule, roster, YEAR, MONTH, CONFIG), filepath)
+
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    with open(filepath, "rb") as f:
+        content = f.read()
+    return elapsed, peak, content
+
+
+if __name__ == "__main__":
+    formats = [("txt", legacy_export_to_txt, exporter.Exporter.export_to_txt),
+               ("csv", legacy_export_to_csv, exporter.Exporter.export_to_csv)]
+    print(f"{'formato':>7} {'impiegati':>10} {'griglia (ms)':>13} {'picco (MB)':>11} "
+          f"{'righe (ms)':>11} {'picco (MB)':>11} {'identici':>9}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_employees in ROSTER_SIZES:
+            roster, schedule = build_month(n_employees)
+            for export_format, legacy_function, streaming_function in formats:
+                filepath = os.path.join(tmp_dir, f"turni.{export_format}")
+                legacy_time, legacy_peak, legacy_content = measure(legacy_function, roster, schedule, filepath)
+                new_time, new_peak, new_content = measure(streaming_function, roster, schedule, filepath)
+                print(f"{export_format:>7} {n_employees:>10} {legacy_time * 1000:>13.0f} "
+                      f"{legacy_peak / 2 ** 20:>11.1f} {new_time * 1000:>11.0f} {new_peak / 2 ** 20:>11.1f} "
+                      f"{str(legacy_content == new_content):>9}")
@@ -0,0 +1,74 @@
+"""Benchmark: lettura di un mese da uno storico monolitico (shift_storage.json) con json.load dell'intero file e con
+StorageFileReader (streaming: prima lettura con scansione del file, letture successive tramite l'indice in memoria).
+Misura tempo e picco di memoria (tracemalloc) al crescere degli anni di storico.
+Il benchmark lavora in una directory temporanea."""
+import sys
+import os
+import json
+import time
+import datetime
+import tempfile
+import tracemalloc
+
+# Add parent directory to path to import file_manager
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import StorageFileReader
+
+N_EMPLOYEES = 60
+YEARS_OF_HISTORY = [1, 5, 10]
+
+
+def month_schedule_json(year, month):
+    half = N_EMPLOYEES // 2
+    day = datetime.date(year, month, 1)
+    schedule = {}
+    while day.month == month:
+        schedule[day.isoformat()] = {
+            "mattina": list(range(1, half + 1)),
+            "mattina_rep": [1],
+            "pomeriggio": list(range(half + 1, N_EMPLOYEES + 1)),
+            "weekend_rep": []
+        }
+        day += datetime.timedelta(days=1)
+    return schedule
+
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def full_load(file_path, year, month):
+    with open(file_path, "r") as f:
+        return json.load(f).get(str(year), {}).get(str(month))
+
+
+if __name__ == "__main__":
+    print(f"{'anni':>5} {'file (MB)':>10} {'json.load (ms)':>15} {'picco (MB)':>11} "
+          f"{'streaming (ms)':>15} {'picco (MB)':>11} {'indice (ms)':>12} {'picco (MB)':>11}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "shift_storage.json")
+        for n_years in YEARS_OF_HISTORY:
+            storage = {
+                str(year): {str(month): month_schedule_json(year, month) for month in range(1, 13)}
+                for year in range(2000, 2000 + n_years)
+            }
+            with open(file_path, "w") as f:
+                json.dump(storage, f, indent=4)
+            del storage
+
+            # Si legge un mese a metà dello storico
+            target_year = 2000 + n_years // 2
+            reader = StorageFileReader(file_path)
+            full_time, full_peak = measure(lambda: full_load(file_path, target_year, 6))
+            stream_time, stream_peak = measure(lambda: reader.load_month(target_year, 6))
+            index_time, index_peak = measure(lambda: reader.load_month(target_year, 7))
+            print(f"{n_years:>5} {os.path.getsize(file_path) / 2 ** 20:>10.1f} {full_time * 1000:>15.1f} "
+                  f"{full_peak / 2 ** 20:>11.2f} {stream_time * 1000:>15.1f} {stream_peak / 2 ** 20:>11.2f} "
+                  f"{index_time * 1000:>12.2f} {index_peak / 2 ** 20:>11.2f}")
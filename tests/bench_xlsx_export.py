@@ -0,0 +1,97 @@
+"""Benchmark: export XLSX di un mese al crescere degli impiegati, con il workbook in memoria salvato a ogni riga
+(implementazione precedente) e con il workbook write-only salvato una volta. Misura tempo e picco di memoria
+(tracemalloc). Il costo del salvataggio a ogni riga e' quadratico: oltre LEGACY_MAX_ROSTER impiegati non viene misurato.
+Il benchmark lavora in una directory temporanea."""
+import sys
+import os
+import time
+import datetime
+import tempfile
+import tracemalloc
+
+from openpyxl import Workbook
+from openpyxl.styles import Font, Alignment
+
+# Add parent directory to path to import library and exporter
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+import exporter
+
+YEAR = 2025
+MONTH = 3
+ROSTER_SIZES = [50, 100, 2000, 10000]
+LEGACY_MAX_ROSTER = 100
+CONFIG = {
+    "shift_settings": {
+        "shift_representation": {"mattina": "M", "mattina_rep": "M+R", "pomeriggio": "P", "weekend_rep": "R",
+                                 "off_duty": "X"}
+    }
+}
+
+
+def legacy_export_to_xlsx(self, filepath):
+    """export_to_xlsx prima del workbook write-only."""
+    number_of_rows = len(self.data_grid)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = f"Turni {exporter.MONTHS[self.month]} {self.year}"
+
+    for row_data in self.data_grid:
+        ws.append(row_data)
+
+    header_font = Font(bold=True)
+    center_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+    for cell in ws[1]:
+        cell.font = header_font
+
+    for row in range(1, number_of_rows + 1):
+        for cell in ws[row]:
+            cell.alignment = center_alignment
+
+        ws.column_dimensions["A"].width = 20
+        ws.column_dimensions["B"].width = 20
+        ws.column_dimensions["C"].width = 20
+
+        wb.save(filepath)
+
+
+def build_exporter(n_employees):
+    """Exporter di un mese con una rotazione semplice dei turni (la generazione non fa parte della misura)."""
+    roster = [library.Employee(i, f"Surname{i}", f"Name{i}", f"S{i:06d}") for i in range(1, n_employees + 1)]
+    schedule = {}
+    day = datetime.date(YEAR, MONTH, 1)
+    while day.month == MONTH:
+        half = n_employees // 2
+        schedule[day] = {"mattina": roster[:half], "mattina_rep": roster[:1], "pomeriggio": roster[half:],
+                         "weekend_rep": []}
+        day += datetime.timedelta(days=1)
+    return exporter.Exporter(schedule, roster, YEAR, MONTH, CONFIG)
+
+
+def measure(export_function, export, filepath):
+    """Tempo e picco di memoria in due esecuzioni distinte: tracemalloc rallenta molto la serializzazione."""
+    start = time.perf_counter()
+    export_function(export, filepath)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    export_function(export, filepath)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == "__main__":
+    print(f"{'impiegati':>10} {'precedente (ms)':>16} {'picco (MB)':>11} {'write-only (ms)':>16} {'picco (MB)':>11}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = os.path.join(tmp_dir, "turni.xlsx")
+        for n_employees in ROSTER_SIZES:
+            export = build_exporter(n_employees)
+            if n_employees <= LEGACY_MAX_ROSTER:
+                legacy_time, legacy_peak = measure(legacy_export_to_xlsx, export, filepath)
+                legacy = f"{legacy_time * 1000:>16.0f} {legacy_peak / 2 ** 20:>11.1f}"
+            else:
+                legacy = f"{'-':>16} {'-':>11}"
+            new_time, new_peak = measure(exporter.Exporter.export_to_xlsx, export, filepath)
+            print(f"{n_employees:>10} {legacy} {new_time * 1000:>16.0f} {new_peak / 2 ** 20:>11.1f}")
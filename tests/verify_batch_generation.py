@@ -0,0 +1,150 @@
+import sys
+import os
+import copy
+import types
+import tempfile
+import unittest
+
+# Add parent directory to path to import library
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+
+CONFIG = {
+    "shift_settings": {
+        "n_of_employees": {"mattina_rep": 1, "weekend_rep": 1},
+        "weekend_days": [5, 6]
+    }
+}
+
+
+def build_employees(first_id, n):
+    return [library.Employee(i, f"S{i}", f"N{i}", f"{i:03d}") for i in range(first_id, first_id + n)]
+
+
+def count_assignments(schedules):
+    counts = {}
+    for schedule in schedules.values():
+        for daily_shifts in schedule.values():
+            for shift_type, emps in daily_shifts.items():
+                for emp in emps:
+                    counts.setdefault(emp.id, dict.fromkeys(daily_shifts, 0))[shift_type] += 1
+    return counts
+
+
+class TemporaryDirectoryTestCase(unittest.TestCase):
+    """La generazione (anche nei processi worker) non deve toccare lo storico: i test girano in una directory
+    temporanea, che deve restare vuota."""
+
+    def setUp(self):
+        self.previous_cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.previous_cwd)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+        self.tmp_dir.cleanup()
+
+
+class TestBatchGeneration(TemporaryDirectoryTestCase):
+    def test_months_range(self):
+        self.assertEqual(list(library.months_range(2025, 11, 4)), [(2025, 11), (2025, 12), (2026, 1), (2026, 2)])
+
+    def test_whole_year_carries_counters_forward(self):
+        employees = build_employees(1, 7)
+        shift_manager = library.ShiftManager(types.SimpleNamespace(emp_list=employees))
+
+        schedules = shift_manager.batch_shift_assignator(2025, 1, 12, CONFIG)
+
+        self.assertEqual(list(schedules), [(2025, month) for month in range(1, 13)])
+        counts = count_assignments(schedules)
+        for emp in employees:
+            for shift_type, n_assigned in counts[emp.id].items():
+                self.assertEqual(emp.shift_count[shift_type], n_assigned)
+
+    def test_not_enough_employees(self):
+        shift_manager = library.ShiftManager(types.SimpleNamespace(emp_list=build_employees(1, 1)))
+        self.assertFalse(shift_manager.batch_shift_assignator(2025, 1, 3, CONFIG))
+
+    def test_parallel_independent_rosters(self):
+        team_a = build_employees(1, 5)
+        team_b = build_employees(100, 6)
+        what_if = copy.deepcopy(team_a)
+        locks = {("2025-01-02", 1): "pomeriggio"}
+
+        results = library.ShiftManager.parallel_batch_shift_assignator(
+            {"team_a": team_a, "team_b": team_b, "what_if": (what_if, locks)}, 2025, 1, 3, CONFIG, max_workers=2
+        )
+
+        for name, employees in (("team_a", team_a), ("team_b", team_b), ("what_if", what_if)):
+            schedules = results[name]
+            self.assertEqual(len(schedules), 3)
+
+            # Le schedule fanno riferimento agli Employee del roster e i contatori sono aggiornati
+            roster_ids = {id(emp) for emp in employees}
+            counts = count_assignments(schedules)
+            for schedule in schedules.values():
+                for daily_shifts in schedule.values():
+                    for emps in daily_shifts.values():
+                        self.assertTrue(all(id(emp) in roster_ids for emp in emps))
+            for emp in employees:
+                self.assertEqual(emp.shift_count["mattina"], counts[emp.id]["mattina"])
+
+        pomeriggio_ids = [emp.id for emp in results["what_if"][(2025, 1)][library.datetime.date(2025, 1, 2)]["pomeriggio"]]
+        self.assertIn(1, pomeriggio_ids)
+
+
+class TestBestOfN(TemporaryDirectoryTestCase):
+    def test_fairness_score(self):
+        employees = build_employees(1, 2)
+        employees[0].shift_count["mattina"] = 4
+        self.assertEqual(library.fairness_score(employees), (4, 4.0))
+
+    def test_best_candidate_is_applied(self):
+        employees = build_employees(1, 7)
+        shift_manager = library.ShiftManager(types.SimpleNamespace(emp_list=employees))
+        locks = {("2025-02-03", 2): "pomeriggio"}
+
+        success = shift_manager.best_of_n_shift_assignator(
+            2025, 2, CONFIG, n_candidates=4, time_budget=10, locked_shifts=locks, max_workers=2
+        )
+        shift_manager.close()
+
+        self.assertTrue(success)
+        counts = count_assignments({(2025, 2): shift_manager.shift_schedule})
+        for emp in employees:
+            self.assertEqual(emp.shift_count["pomeriggio"], counts[emp.id]["pomeriggio"])
+        day = shift_manager.shift_schedule[library.datetime.date(2025, 2, 3)]
+        self.assertIn(employees[1], day["pomeriggio"])
+
+    def test_generation_does_not_touch_storage(self):
+        # I processi worker non devono creare o aprire file dello storico (es. il journal della GUI)
+        shift_manager = library.ShiftManager(types.SimpleNamespace(emp_list=build_employees(1, 5)))
+        self.assertTrue(shift_manager.best_of_n_shift_assignator(2025, 2, CONFIG, n_candidates=2))
+        shift_manager.close()
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_zero_time_budget_waits_for_one_candidate(self):
+        employees = build_employees(1, 5)
+        shift_manager = library.ShiftManager(types.SimpleNamespace(emp_list=employees))
+        self.assertTrue(shift_manager.best_of_n_shift_assignator(2025, 2, CONFIG, n_candidates=3, time_budget=0))
+        shift_manager.close()
+        self.assertEqual(len(shift_manager.shift_schedule), 28)
+
+    def test_process_pool_is_reused_across_generations(self):
+        shift_manager = library.ShiftManager(types.SimpleNamespace(emp_list=build_employees(1, 5)))
+        shift_manager.start_process_pool(2, max_workers=2)
+        process_pool = shift_manager._process_pool
+
+        for month in (2, 3):
+            self.assertTrue(shift_manager.best_of_n_shift_assignator(2025, month, CONFIG, n_candidates=2,
+                                                                     max_workers=2))
+            self.assertIs(shift_manager._process_pool, process_pool)
+
+        shift_manager.close()
+        self.assertIsNone(shift_manager._process_pool)
+
+
+if __name__ == '__main__':
+    unittest.main()
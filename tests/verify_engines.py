@@ -0,0 +1,126 @@
+import sys
+import os
+import copy
+import math
+import types
+import datetime
+import tempfile
+import unittest
+
+# Add parent directory to path to import library
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+import matrix_engine
+
+
+def build_config(engine):
+    return {
+        "shift_settings": {
+            "n_of_employees": {"mattina_rep": 1, "weekend_rep": 1},
+            "weekend_days": [5, 6],
+            "engine": engine
+        }
+    }
+
+
+class ScheduleInvariantsMixin:
+    """Verifica le proprietà che ogni motore di generazione deve rispettare."""
+    engine = "python"
+
+    def setUp(self):
+        # La generazione non deve toccare lo storico: i test girano in una directory temporanea, che resta vuota
+        self.previous_cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+
+        self.config = build_config(self.engine)
+        self.employees = [library.Employee(i, f"S{i}", f"N{i}", f"{i:03d}") for i in range(1, 12)]
+        self.employees[0].days_off = [datetime.date(2025, 1, d) for d in range(1, 8)]
+        self.employees[1].days_off = [datetime.date(2025, 1, 15)]
+        self.locks = library.ShiftLocks({
+            ("2025-01-02", 3): "mattina",
+            ("2025-01-02", 4): "pomeriggio",
+            ("2025-01-04", 5): "weekend_rep",
+            ("2025-01-08", 6): "mattina_rep"
+        })
+        self.shift_manager = library.ShiftManager(types.SimpleNamespace(emp_list=self.employees))
+
+    def tearDown(self):
+        os.chdir(self.previous_cwd)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+        self.tmp_dir.cleanup()
+
+    def _generate(self, month=1):
+        self.assertTrue(self.shift_manager.shift_assignator(2025, month, self.config, locked_shifts=self.locks))
+        return self.shift_manager.shift_schedule
+
+    def test_schedule_invariants(self):
+        starting_counts = copy.deepcopy({emp.id: emp.shift_count for emp in self.employees})
+        schedule = self._generate()
+        assigned_counts = {emp.id: dict.fromkeys(matrix_engine.SHIFT_TYPES, 0) for emp in self.employees}
+
+        for day_date, daily_shifts in schedule.items():
+            ids = {shift_type: [emp.id for emp in emps] for shift_type, emps in daily_shifts.items()}
+            for shift_type, emp_ids in ids.items():
+                for emp_id in emp_ids:
+                    assigned_counts[emp_id][shift_type] += 1
+
+            # Nessun impiegato in ferie viene assegnato
+            off_today = {emp.id for emp in self.employees if day_date in emp.days_off}
+            all_ids = ids["mattina"] + ids["pomeriggio"] + ids["weekend_rep"]
+            self.assertFalse(off_today & set(all_ids + ids["mattina_rep"]))
+
+            # Nessun doppio turno e mattina_rep solo tra chi fa mattina (salvo lock)
+            self.assertEqual(len(all_ids), len(set(all_ids)))
+            locked_rep = {emp_id for emp_id, shift in self.locks.for_date(day_date.isoformat()).items()
+                          if shift == "mattina_rep"}
+            self.assertTrue(set(ids["mattina_rep"]) - locked_rep <= set(ids["mattina"]))
+
+            # Numero di impiegati per turno
+            n_available = len(self.employees) - len(off_today)
+            if day_date.weekday() in self.config["shift_settings"]["weekend_days"]:
+                self.assertEqual(len(ids["weekend_rep"]), 1)
+                self.assertFalse(ids["mattina"] or ids["pomeriggio"])
+            else:
+                self.assertEqual(len(ids["mattina"]), math.ceil(n_available / 2))
+                # Chi è bloccato solo su mattina_rep non occupa posti di mattina/pomeriggio
+                self.assertEqual(len(ids["mattina"]) + len(ids["pomeriggio"]), n_available - len(locked_rep))
+
+            # I lock vengono rispettati
+            for emp_id, shift_type in self.locks.for_date(day_date.isoformat()).items():
+                self.assertIn(emp_id, ids[shift_type])
+
+        # I contatori corrispondono ai turni assegnati
+        for emp in self.employees:
+            for shift_type in matrix_engine.SHIFT_TYPES:
+                self.assertEqual(emp.shift_count[shift_type],
+                                 starting_counts[emp.id][shift_type] + assigned_counts[emp.id][shift_type])
+
+    def test_fairness_over_a_year(self):
+        self.locks = library.ShiftLocks()
+        for emp in self.employees:
+            emp.days_off = []
+        for month in range(1, 13):
+            self._generate(month)
+
+        for shift_type in matrix_engine.SHIFT_TYPES:
+            values = [emp.shift_count[shift_type] for emp in self.employees]
+            self.assertLessEqual(max(values) - min(values), 2, shift_type)
+
+
+class PythonEngineTest(ScheduleInvariantsMixin, unittest.TestCase):
+    engine = "python"
+
+
+class SolverEngineTest(ScheduleInvariantsMixin, unittest.TestCase):
+    engine = "solver"
+
+
+@unittest.skipUnless(matrix_engine.numpy_available(), "NumPy non installato")
+class NumpyEngineTest(ScheduleInvariantsMixin, unittest.TestCase):
+    engine = "numpy"
+
+
+if __name__ == '__main__':
+    unittest.main()
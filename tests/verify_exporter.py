@@ -0,0 +1,213 @@
+import sys
+import csv
+import os
+import datetime
+import tempfile
+import unittest
+
+from openpyxl import load_workbook
+
+# Add parent directory to path to import library and exporter
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+from exporter import Exporter, PeriodExporter
+from file_manager import JsonManager
+
+CONFIG = {
+    "shift_settings": {
+        "shift_representation": {"mattina": "M", "mattina_rep": "M+R", "pomeriggio": "P", "weekend_rep": "R",
+                                 "off_duty": "X"}
+    }
+}
+
+
+class TestExporter(unittest.TestCase):
+    def setUp(self):
+        self.employees = [library.Employee(i, f"S{i}", f"N{i}", f"{i:03d}") for i in range(1, 4)]
+        self.employees[2].days_off = [datetime.date(2025, 2, 1), datetime.date(2025, 3, 1)]
+        rossi, verdi, bianchi = self.employees
+        self.schedule = {
+            datetime.date(2025, 2, 1): {"mattina": [rossi], "mattina_rep": [rossi], "pomeriggio": [verdi],
+                                        "weekend_rep": []},
+            datetime.date(2025, 2, 2): {"mattina": [], "mattina_rep": [], "pomeriggio": [],
+                                        "weekend_rep": [bianchi]}
+        }
+
+    def test_data_grid(self):
+        grid = Exporter(self.schedule, self.employees, 2025, 2, CONFIG).data_grid
+
+        self.assertEqual(grid[0][:5], ["Matricola", "Cognome", "Nome", "Sab 1", "Dom 2"])
+        self.assertEqual(len(grid[0]), 3 + 28)
+        # mattina_rep ha la precedenza su mattina; le ferie su qualsiasi turno
+        self.assertEqual(grid[1][3:6], ["M+R", "", ""])
+        self.assertEqual(grid[2][3:6], ["P", "", ""])
+        self.assertEqual(grid[3][:6], ["003", "S3", "N3", "X", "R", ""])
+
+    def test_iter_rows(self):
+        export = Exporter(self.schedule, self.employees, 2025, 2, CONFIG)
+        rows = export.iter_rows()
+
+        self.assertEqual(next(rows), export.header_row())
+        self.assertEqual(next(rows)[:4], ["001", "S1", "N1", "M+R"])
+        self.assertEqual(len(list(rows)), 2)
+
+    def test_export_to_txt_and_csv(self):
+        # I turni nascosti dalle ferie o da mattina_rep non contano nella larghezza della colonna
+        self.schedule[datetime.date(2025, 2, 1)]["mattina"].append(self.employees[2])
+        representation = dict(CONFIG["shift_settings"]["shift_representation"], mattina="Mattina lunga")
+        config = {"shift_settings": {"shift_representation": representation}}
+        export = Exporter(self.schedule, self.employees, 2025, 2, config)
+        grid = export.data_grid
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            txt_path = os.path.join(tmp_dir, "turni.txt")
+            csv_path = os.path.join(tmp_dir, "turni.csv")
+            export.export_to_txt(txt_path)
+            export.export_to_csv(csv_path)
+            with open(txt_path, encoding="utf-8") as f:
+                lines = f.read().split("\n")
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                csv_rows = list(csv.reader(f))
+
+        self.assertEqual(csv_rows, grid)
+
+        columns_width = [max(len(row[i]) for row in grid) for i in range(len(grid[0]))]
+        self.assertEqual(columns_width[3], len("Sab 1"))
+        self.assertEqual(len(lines), 2 + 3)
+        self.assertEqual(lines[1], "-+-".join("-" * (w + 2) for w in columns_width))
+        for line, row in zip(lines[2:], grid[1:]):
+            self.assertEqual(line, " | ".join(cell.center(w + 2) for cell, w in zip(row, columns_width)))
+
+    def test_export_to_xlsx(self):
+        export = Exporter(self.schedule, self.employees, 2025, 2, CONFIG)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filepath = os.path.join(tmp_dir, "turni.xlsx")
+            export.export_to_xlsx(filepath)
+            wb = load_workbook(filepath)
+
+        ws = wb.active
+        self.assertEqual(ws.title, "Turni Febbraio 2025")
+        self.assertEqual([list(row) for row in ws.iter_rows(values_only=True)],
+                         [[value if value != "" else None for value in row] for row in export.data_grid])
+        self.assertTrue(ws["A1"].font.bold)
+        self.assertFalse(ws["D2"].font.bold)
+        self.assertEqual(ws["D2"].alignment.horizontal, "center")
+        self.assertEqual(ws.column_dimensions["C"].width, 20)
+
+
+
+class TestPeriodExporter(unittest.TestCase):
+    def setUp(self):
+        # JsonManager lavora con percorsi relativi alla directory corrente
+        self.previous_cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+
+        self.employees = [library.Employee(i, f"S{i}", f"N{i}", f"{i:03d}") for i in range(1, 3)]
+        self.employees[1].days_off = [datetime.date(2025, 3, 2)]
+        rossi, verdi = self.employees
+        self.json_manager = JsonManager()
+        self.json_manager.save_shifts_file({
+            datetime.date(2025, 2, 1): {"mattina": [rossi], "mattina_rep": [], "pomeriggio": [verdi],
+                                        "weekend_rep": []}
+        })
+        self.json_manager.save_shifts_file({
+            datetime.date(2025, 3, 1): {"mattina": [verdi], "mattina_rep": [], "pomeriggio": [rossi],
+                                        "weekend_rep": []}
+        })
+        # Gennaio e aprile non sono salvati: vengono saltati
+        self.months = [(2025, month) for month in range(1, 5)]
+
+    def tearDown(self):
+        os.chdir(self.previous_cwd)
+        self.tmp_dir.cleanup()
+
+    def test_export_to_xlsx(self):
+        period_exporter = PeriodExporter(self.json_manager, self.employees, self.months, CONFIG, max_workers=2)
+
+        self.assertEqual(period_exporter.export_to_xlsx("periodo.xlsx"), [(2025, 2), (2025, 3)])
+        wb = load_workbook("periodo.xlsx")
+        self.assertEqual(wb.sheetnames, ["Turni Febbraio 2025", "Turni Marzo 2025"])
+        self.assertEqual(wb["Turni Marzo 2025"]["C3"].value, "N2")
+        self.assertEqual([wb["Turni Marzo 2025"].cell(row, 4).value for row in (2, 3)], ["P", "M"])
+        self.assertEqual(wb["Turni Marzo 2025"]["E3"].value, "X")
+
+    def test_export_to_csv(self):
+        period_exporter = PeriodExporter(self.json_manager, self.employees, self.months, CONFIG)
+
+        self.assertEqual(period_exporter.export_to_csv("periodo.csv"), [(2025, 2), (2025, 3)])
+        with open("periodo.csv", newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], PeriodExporter.CSV_HEADER)
+        self.assertEqual(len(rows), 1 + 2 * 2)
+        self.assertTrue(all(len(row) == len(PeriodExporter.CSV_HEADER) for row in rows))
+        self.assertEqual(rows[1][:6], ["2025", "Febbraio", "001", "S1", "N1", "M"])
+        self.assertEqual(rows[4][:7], ["2025", "Marzo", "002", "S2", "N2", "M", "X"])
+        # Febbraio ha 28 giorni: le colonne 29-31 restano vuote
+        self.assertEqual(rows[1][-3:], ["", "", ""])
+
+    def test_export_to_ics(self):
+        config = {"shift_settings": dict(CONFIG["shift_settings"], shift_times={"pomeriggio": ["20:00", "06:00"]}),
+                  "employees_view": {"mattina": "Mattina"}}
+        period_exporter = PeriodExporter(self.json_manager, self.employees, self.months, config, max_workers=2)
+
+        paths = period_exporter.export_to_ics("calendari")
+        self.assertEqual(sorted(os.path.basename(path) for path in paths), ["001_S1_N1_1.ics", "002_S2_N2_2.ics"])
+        with open(os.path.join("calendari", "002_S2_N2_2.ics"), newline="", encoding="utf-8") as f:
+            content = f.read()
+
+        self.assertTrue(content.startswith("BEGIN:VCALENDAR\r\n") and content.endswith("END:VCALENDAR\r\n"))
+        events = [event.split("\r\n") for event in content.split("BEGIN:VEVENT\r\n")[1:]]
+        # Febbraio: pomeriggio (orario da config.json, termina il giorno dopo); marzo: mattina (orario di default)
+        # e ferie per l'intera giornata
+        self.assertEqual(len(events), 3)
+        self.assertIn("DTSTART:20250201T200000", events[0])
+        self.assertIn("DTEND:20250202T060000", events[0])
+        self.assertIn("SUMMARY:P", events[0])
+        self.assertIn("DTSTART:20250301T070000", events[1])
+        self.assertIn("DESCRIPTION:Mattina", events[1])
+        self.assertIn("DTSTART;VALUE=DATE:20250302", events[2])
+        self.assertIn("SUMMARY:X", events[2])
+        self.assertIn("UID:20250302-2@shiftmanager", events[2])
+
+    def test_export_to_ics_uid_survives_shift_change(self):
+        def uid_of_first_event(directory):
+            PeriodExporter(self.json_manager, self.employees, self.months, CONFIG).export_to_ics(directory)
+            with open(os.path.join(directory, "001_S1_N1_1.ics"), newline="", encoding="utf-8") as f:
+                event = f.read().split("BEGIN:VEVENT\r\n")[1]
+            return [line for line in event.split("\r\n") if line.startswith(("UID:", "SUMMARY:"))]
+
+        before = uid_of_first_event("prima")
+        # Il 1 febbraio l'impiegato 1 passa dalla mattina al pomeriggio
+        rossi, verdi = self.employees
+        self.json_manager.save_shifts_file({
+            datetime.date(2025, 2, 1): {"mattina": [verdi], "mattina_rep": [], "pomeriggio": [rossi],
+                                        "weekend_rep": []}
+        })
+        after = uid_of_first_event("dopo")
+
+        self.assertEqual(before, ["UID:20250201-1@shiftmanager", "SUMMARY:M"])
+        self.assertEqual(after, ["UID:20250201-1@shiftmanager", "SUMMARY:P"])
+
+    def test_export_to_ics_with_homonyms(self):
+        # Stessa matricola e stesso nominativo: ogni impiegato mantiene il proprio calendario
+        homonym = library.Employee(3, "S1", "N1", "001")
+        homonym.days_off = [datetime.date(2025, 3, 5)]
+        period_exporter = PeriodExporter(self.json_manager, self.employees + [homonym], self.months, CONFIG)
+
+        paths = period_exporter.export_to_ics("calendari")
+        self.assertEqual(len(set(paths)), 3)
+        with open(os.path.join("calendari", "001_S1_N1_3.ics"), newline="", encoding="utf-8") as f:
+            self.assertIn("DTSTART;VALUE=DATE:20250305", f.read())
+
+    def test_no_saved_months(self):
+        period_exporter = PeriodExporter(self.json_manager, self.employees, [(2024, 1)], CONFIG)
+
+        self.assertEqual(period_exporter.export_to_csv("vuoto.csv"), [])
+        self.assertEqual(period_exporter.export_to_xlsx("vuoto.xlsx"), [])
+        self.assertFalse(os.path.exists("vuoto.csv") or os.path.exists("vuoto.xlsx"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,578 @@
+import sys
+import os
+import json
+import datetime
+import struct
+import tempfile
+import threading
+import unittest
+
+# Add parent directory to path to import file_manager
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import library
+from file_manager import (JsonManager, PersistenceWorker, SqliteManager, StorageFileReader, create_storage_manager,
+                          decode_month_shard, encode_month_shard)
+
+
+class StubEmployee:
+    def __init__(self, emp_id):
+        self.id = emp_id
+
+
+def month_schedule(year, month, emp_ids):
+    """Schedule di un mese nel formato di ShiftManager.export_schedule()."""
+    day = datetime.date(year, month, 1)
+    schedule = {}
+    while day.month == month:
+        schedule[day] = {
+            "mattina": [StubEmployee(emp_ids[0])],
+            "mattina_rep": [StubEmployee(emp_ids[0])],
+            "pomeriggio": [StubEmployee(emp_ids[1])],
+            "weekend_rep": []
+        }
+        day += datetime.timedelta(days=1)
+    return schedule
+
+
+class TestShardedShiftStorage(unittest.TestCase):
+    def setUp(self):
+        # JsonManager lavora con percorsi relativi alla directory corrente
+        self.previous_cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.previous_cwd)
+        self.tmp_dir.cleanup()
+
+    def test_failed_save_is_reported_to_the_persistence_worker(self):
+        json_manager = JsonManager()
+        # Un file al posto della cartella dell'anno rende impossibile scrivere lo shard
+        os.makedirs(os.path.join("data", "shifts"), exist_ok=True)
+        open(os.path.join("data", "shifts", "2025"), "w").close()
+
+        worker = PersistenceWorker()
+        errors = []
+        worker.submit(("shifts", 2025, 3), json_manager.save_shifts_file, month_schedule(2025, 3, [1, 2]),
+                      callback=errors.append)
+        worker.close(timeout=5)
+        worker.dispatch_completed()
+
+        self.assertIsInstance(worker.last_error, OSError)
+        self.assertIsInstance(errors[0], OSError)
+        self.assertFalse(json_manager.has_month_shifts(2025, 3))
+
+    def test_migration_from_monolithic_file(self):
+        legacy_storage = {
+            "2024": {"12": {"2024-12-01": {"mattina": [1], "mattina_rep": [1], "pomeriggio": [2], "weekend_rep": []}}},
+            "2025": {"1": {"2025-01-01": {"mattina": [2], "mattina_rep": [2], "pomeriggio": [1], "weekend_rep": []}}}
+        }
+        os.makedirs("data")
+        with open(os.path.join("data", "shift_storage.json"), "w") as f:
+            json.dump(legacy_storage, f)
+
+        json_manager = JsonManager()
+
+        self.assertEqual(json_manager.load_shifts_manifest()["months"], {"2024": [12], "2025": [1]})
+        # Nessun indice lasciato accanto allo storico migrato
+        self.assertFalse(os.path.exists(os.path.join("data", "shift_storage.json.idx")))
+        self.assertEqual(json_manager.load_month_shifts(2024, 12), legacy_storage["2024"]["12"])
+        self.assertEqual(json_manager.load_shifts_file(), legacy_storage)
+        self.assertTrue(json_manager.has_month_shifts(2025, 1))
+        self.assertFalse(json_manager.has_month_shifts(2025, 2))
+        self.assertIsNone(json_manager.load_month_shifts(2025, 2))
+
+        # La migrazione avviene una sola volta
+        os.remove(os.path.join("data", "shift_storage.json"))
+        self.assertEqual(JsonManager().load_shifts_file(), legacy_storage)
+
+    def test_save_touches_only_its_month(self):
+        json_manager = JsonManager()
+        json_manager.save_shifts_file(month_schedule(2025, 1, [1, 2]))
+        january_shard = json_manager._month_shard_path("2025", "1")
+        january_mtime = os.stat(january_shard).st_mtime_ns
+
+        json_manager.save_shifts_file(month_schedule(2025, 2, [2, 1]))
+        json_manager.save_shifts_file(month_schedule(2025, 2, [1, 2]))  # Sovrascrittura dello stesso mese
+
+        self.assertEqual(os.stat(january_shard).st_mtime_ns, january_mtime)
+        self.assertEqual(json_manager.load_shifts_manifest()["months"], {"2025": [1, 2]})
+        february = json_manager.load_month_shifts(2025, 2)
+        self.assertEqual(len(february), 28)
+        self.assertEqual(february["2025-02-01"]["mattina"], [1])
+
+    def test_streaming_reader(self):
+        legacy_storage = {
+            "2024": {"11": {"2024-11-01": {"mattina": [1], "note": "graffe } { e \\\"virgolette\\\""}},
+                     "12": {"2024-12-01": {"mattina": [2], "pomeriggio": []}}},
+            "2025": {}
+        }
+        with open("storage.json", "w") as f:
+            json.dump(legacy_storage, f, indent=4)
+        reader = StorageFileReader("storage.json")
+
+        self.assertEqual(reader.load_month(2024, 12), legacy_storage["2024"]["12"])
+        self.assertEqual(reader.load_month("2024", "11"), legacy_storage["2024"]["11"])
+        self.assertIsNone(reader.load_month(2025, 1))
+        self.assertEqual([(y, m) for y, m, _ in reader.iter_months()], [("2024", "11"), ("2024", "12")])
+        # Le letture successive usano l'indice dei mesi, tenuto in memoria; una modifica del file lo invalida
+        self.assertEqual(os.listdir("."), ["storage.json"])
+        legacy_storage["2025"]["1"] = {"2025-01-02": {"mattina": [3]}}
+        with open("storage.json", "w") as f:
+            json.dump(legacy_storage, f)
+        self.assertEqual(reader.load_month(2025, 1), legacy_storage["2025"]["1"])
+
+        # Storico troncato: la migrazione non viene completata e sarà ritentata
+        os.makedirs("data")
+        with open(os.path.join("data", "shift_storage.json"), "w") as f:
+            f.write(json.dumps(legacy_storage)[:-10])
+        json_manager = JsonManager()
+        self.assertFalse(os.path.exists(json_manager.file_path_shifts_manifest))
+
+    def test_atomic_writes_skip_unchanged_content(self):
+        json_manager = JsonManager()
+        written = json_manager.write_stats()["written"]  # Manifest creato all'avvio
+        schedule = month_schedule(2025, 2, [1, 2])
+        json_manager.save_shifts_file(schedule)
+        self.assertEqual(json_manager.write_stats(), {"written": written + 1, "skipped": 0})
+
+        # Stesso contenuto: nessuna scrittura, né da questa istanza (hash) né da una nuova (confronto col disco)
+        json_manager.save_shifts_file(schedule)
+        self.assertEqual(json_manager.write_stats(), {"written": written + 1, "skipped": 1})
+        other_manager = JsonManager()
+        other_manager.save_shifts_file(schedule)
+        self.assertEqual(other_manager.write_stats(), {"written": 0, "skipped": 1})
+
+        json_manager.save_shifts_file(month_schedule(2025, 2, [2, 1]))
+        self.assertEqual(json_manager.write_stats()["written"], written + 2)
+        self.assertEqual(json_manager.load_month_shifts(2025, 2)["2025-02-01"]["mattina"], [2])
+
+        # Nel batch i file vengono rinominati solo all'uscita; nessun file temporaneo resta su disco
+        with json_manager.write_batch():
+            json_manager._write_month_shard("2025", "3", {"2025-03-01": {"mattina": [1]}})
+            self.assertFalse(json_manager.has_month_shifts(2025, 3))
+            self.assertFalse(os.path.exists(json_manager._month_shard_path(2025, 3)))
+        self.assertEqual(json_manager.load_month_shifts(2025, 3), {"2025-03-01": {"mattina": [1]}})
+        leftovers = [name for _, _, names in os.walk("data") for name in names if name.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+
+    def test_archive_closed_years(self):
+        json_manager = JsonManager()
+        for month in range(1, 13):
+            json_manager.save_shifts_file(month_schedule(2023, month, [1, 2]))
+        json_manager.save_shifts_file(month_schedule(2024, 1, [1, 2]))
+        june = json_manager.load_month_shifts(2023, 6)
+
+        self.assertEqual(json_manager.archive_closed_years(before_year=2024), [2023])
+        self.assertEqual(sorted(os.listdir(json_manager.directory_shifts_storage)),
+                         ["2023.json.xz", "2024", "manifest.json"])
+        self.assertTrue(os.path.exists(json_manager._month_shard_path(2024, 1)))
+
+        # Il segmento viene decompresso alla prima lettura di un mese archiviato
+        reloaded = JsonManager(archive_compression="gzip")
+        self.assertEqual(reloaded.load_month_shifts(2023, 6), june)
+        self.assertTrue(reloaded.has_month_shifts(2023, 12))
+        self.assertEqual(reloaded.archive_closed_years(before_year=2024), [2023])  # Conversione in gzip
+        self.assertTrue(os.path.exists(reloaded._archive_path(2023)))
+        self.assertFalse(os.path.exists(json_manager._archive_path(2023)))
+
+        # Un mese archiviato salvato di nuovo torna in uno shard, che ha la precedenza fino alla nuova archiviazione
+        reloaded.save_shifts_file(month_schedule(2023, 6, [2, 1]))
+        self.assertEqual(reloaded.load_month_shifts(2023, 6)["2023-06-01"]["mattina"], [2])
+        self.assertEqual(reloaded.archive_year(2023), 12)
+        self.assertFalse(os.path.isdir(os.path.join(reloaded.directory_shifts_storage, "2023")))
+        self.assertEqual(JsonManager().load_month_shifts(2023, 6)["2023-06-01"]["mattina"], [2])
+
+    def test_binary_format(self):
+        json_manager = JsonManager()
+        json_manager.save_shifts_file(month_schedule(2025, 1, [1, 2]))
+        january_json = json_manager.load_month_shifts(2025, 1)
+
+        binary_manager = create_storage_manager({"files": {"shift_storage_format": "binary"}}, json_manager)
+        self.assertEqual(binary_manager.shift_storage_format, "binary")
+        # I mesi salvati in JSON restano leggibili e vengono convertiti al salvataggio successivo
+        self.assertEqual(binary_manager.load_month_shifts(2025, 1), january_json)
+        binary_manager.save_shifts_file(month_schedule(2025, 1, [1, 2]))
+        self.assertTrue(os.path.exists(binary_manager._month_shard_path(2025, 1)))
+        self.assertFalse(os.path.exists(binary_manager._month_shard_path(2025, 1, "json")))
+        self.assertEqual(JsonManager(shift_storage_format="binary").load_month_shifts(2025, 1), january_json)
+
+        # IDs oltre 65535 e giorni senza turni
+        month_schedule_json = {"2025-02-01": {"mattina": [70000, 3], "mattina_rep": [], "pomeriggio": [1],
+                                              "weekend_rep": []}}
+        self.assertEqual(decode_month_shard(encode_month_shard(2025, 2, month_schedule_json)), month_schedule_json)
+
+        # Più di 65535 impiegati nello stesso turno
+        crowded_json = {"2025-03-01": {"mattina": list(range(1, 70001)), "pomeriggio": [70001]}}
+        self.assertEqual(decode_month_shard(encode_month_shard(2025, 3, crowded_json)), crowded_json)
+
+        # Shard della versione precedente (numero di impiegati per turno a 16 bit)
+        legacy_shard = struct.pack("<4sHBBc", b"SMB1", 2025, 4, 1, b"H") + struct.pack("<BB", 1, 1) + \
+            struct.pack("<BH", 2, 2) + struct.pack("<HH", 5, 6)
+        self.assertEqual(decode_month_shard(legacy_shard), {"2025-04-01": {"pomeriggio": [5, 6]}})
+
+
+class TestLoadCache(unittest.TestCase):
+    def setUp(self):
+        self.previous_cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.previous_cwd)
+        self.tmp_dir.cleanup()
+
+    def test_repeated_loads_hit_the_cache(self):
+        json_manager = JsonManager()
+        json_manager.save_shifts_file(month_schedule(2025, 3, [1, 2]))
+        stats_after_save = json_manager.cache_stats()
+
+        # Le letture dopo il proprio salvataggio e quelle ripetute non rileggono il file
+        first_view = json_manager.load_month_shifts(2025, 3)
+        json_manager.load_month_shifts(2025, 3)
+        self.assertTrue(json_manager.has_month_shifts(2025, 3))
+        self.assertEqual(json_manager.cache_stats()["misses"], stats_after_save["misses"])
+        self.assertEqual(json_manager.cache_stats()["hits"], stats_after_save["hits"] + 2)
+
+        # Una modifica esterna (mtime/dimensione diversi) invalida la cache
+        shard_path = json_manager._month_shard_path(2025, 3)
+        modified = dict(first_view, extra={})
+        with open(shard_path, "w") as f:
+            json.dump(modified, f)
+        os.utime(shard_path, ns=(0, os.stat(shard_path).st_mtime_ns + 1))
+        self.assertIn("extra", json_manager.load_month_shifts(2025, 3))
+        self.assertEqual(json_manager.cache_stats()["misses"], stats_after_save["misses"] + 1)
+
+
+class StubRosterEmployee:
+    def __init__(self, emp_id, surname):
+        self.id = emp_id
+        self.surname = surname
+        self.name = "Nome"
+        self.serial_number = f"{emp_id:03d}"
+        self.days_off = []
+        self.shift_count = {"mattina": 0, "mattina_rep": 0, "pomeriggio": 0, "weekend_rep": 0, "days_off": 0}
+
+
+class TestEditJournal(unittest.TestCase):
+    def setUp(self):
+        self.previous_cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+        self.roster = [StubRosterEmployee(1, "Rossi"), StubRosterEmployee(2, "Verdi")]
+
+    def tearDown(self):
+        os.chdir(self.previous_cwd)
+        self.tmp_dir.cleanup()
+
+    def read_journal(self, json_manager):
+        with open(json_manager.file_path_journal) as f:
+            return [json.loads(line) for line in f]
+
+    def test_saves_append_only_changes(self):
+        json_manager = JsonManager()
+        json_manager.save_employees_file(self.roster)
+        self.assertEqual([entry["op"] for entry in self.read_journal(json_manager)], ["employee_set"] * 2)
+
+        self.roster[0].shift_count["mattina"] += 3
+        self.roster[0].days_off.append(datetime.date(2025, 5, 2))
+        json_manager.save_employees_file(self.roster)
+        json_manager.save_locked_shifts(2025, 5, {("2025-05-06", 2): "pomeriggio"})
+        json_manager.save_shifts_file(month_schedule(2025, 5, [1, 2]))
+
+        self.assertEqual([entry["op"] for entry in self.read_journal(json_manager)][2:],
+                         ["counter_delta", "day_off_added", "lock_set", "month_committed"])
+        with open(json_manager.file_path_employees) as f:
+            self.assertEqual(json.load(f), [])  # Lo snapshot non è stato ancora riscritto
+
+        # Un nuovo avvio ricostruisce lo stato dal journal
+        reloaded = JsonManager()
+        rossi = reloaded.load_employees_file()[0]
+        self.assertEqual(rossi["shift_count"]["mattina"], 3)
+        self.assertEqual(rossi["days_off"], ["2025-05-02"])
+        self.assertEqual(reloaded.load_locked_shifts(2025, 5), {("2025-05-06", 2): "pomeriggio"})
+        self.assertTrue(reloaded.has_month_shifts(2025, 5))
+
+    def test_saves_without_readable_employees_file(self):
+        # employees.json assente: turni e lock vengono registrati comunque
+        json_manager = JsonManager()
+        self.assertFalse(os.path.exists(json_manager.file_path_employees))
+        json_manager.save_locked_shifts(2025, 5, {("2025-05-06", 2): "pomeriggio"})
+        json_manager.save_shifts_file(month_schedule(2025, 5, [1, 2]))
+        self.assertTrue(JsonManager().has_month_shifts(2025, 5))
+
+        # employees.json corrotto (stato del journal non disponibile): nessun TypeError, turni e lock restano
+        # leggibili e vengono applicati quando il file torna leggibile
+        with open(json_manager.file_path_employees, "w") as f:
+            f.write("[{")
+        json_manager = JsonManager()
+        json_manager.save_locked_shifts(2025, 6, {("2025-06-02", 1): "mattina"})
+        json_manager.save_shifts_file(month_schedule(2025, 6, [1, 2]))
+        self.assertTrue(json_manager.has_month_shifts(2025, 6))
+        self.assertEqual(json_manager.load_locked_shifts(2025, 6), {("2025-06-02", 1): "mattina"})
+        json_manager.save_locked_shifts(2025, 6, {})
+        self.assertEqual(json_manager.load_locked_shifts(2025, 6), {})
+
+        with open(json_manager.file_path_employees, "w") as f:
+            f.write("[]")
+        reloaded = JsonManager()
+        self.assertEqual(reloaded.load_shifts_manifest()["months"], {"2025": [5, 6]})
+        self.assertEqual(reloaded.load_locked_shifts(2025, 5), {("2025-05-06", 2): "pomeriggio"})
+
+    def test_compaction_at_exit_waits_for_the_background_one(self):
+        json_manager = JsonManager()
+        json_manager.save_employees_file(self.roster)
+
+        # Compattazione in background ancora in corso quando ne viene richiesta una all'uscita
+        release = threading.Event()
+        json_manager._compaction_thread = threading.Thread(target=release.wait, args=(5,))
+        json_manager._compaction_thread.start()
+        threading.Timer(0.1, release.set).start()
+        json_manager.compact_journal()
+
+        self.assertEqual(json_manager.journal.entries, [])
+        self.assertEqual(self.read_journal(json_manager), [])
+        self.assertEqual([record["surname"] for record in JsonManager().load_employees_file()], ["Rossi", "Verdi"])
+
+    def test_compaction_and_replay_are_idempotent(self):
+        json_manager = JsonManager()
+        json_manager.save_employees_file(self.roster)
+        self.roster[1].shift_count["pomeriggio"] += 2
+        json_manager.save_employees_file(self.roster)
+        json_manager.save_shifts_file(month_schedule(2025, 6, [1, 2]))
+        journal_before_compaction = self.read_journal(json_manager)
+
+        json_manager.compact_journal()
+        self.assertEqual(self.read_journal(json_manager), [])
+        with open(json_manager.file_path_employees) as f:
+            self.assertEqual(json.load(f)[1]["shift_count"]["pomeriggio"], 2)
+        self.assertEqual(json_manager._load_manifest_snapshot()["months"], {"2025": [6]})
+
+        # Interruzione tra la scrittura degli snapshot e lo svuotamento del journal: i delta non vengono riapplicati
+        with open(json_manager.file_path_journal, "w") as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in journal_before_compaction))
+            f.write('{"op": "counter_del')  # Ultima riga troncata
+        reloaded = JsonManager()
+        self.assertEqual(reloaded.load_employees_file()[1]["shift_count"]["pomeriggio"], 2)
+        self.assertEqual(self.read_journal(reloaded), journal_before_compaction)
+
+        # Dopo la compattazione la numerazione continua: le nuove modifiche vengono applicate
+        reloaded.compact_journal()
+        restarted = JsonManager()
+        self.roster[1].shift_count["pomeriggio"] += 1
+        restarted.save_employees_file(self.roster)
+        self.assertEqual(JsonManager().load_employees_file()[1]["shift_count"]["pomeriggio"], 3)
+
+    def test_days_off_partitioned_by_year(self):
+        # employees.json nel formato precedente: le ferie di tutti gli anni nei record
+        os.makedirs("data")
+        with open(os.path.join("data", "employees.json"), "w") as f:
+            json.dump([{"id": 1, "surname": "Rossi", "name": "Nome", "serial_number": "001",
+                        "days_off": ["2015-08-10", "2024-12-24", "2025-01-02"],
+                        "shift_count": {"mattina": 0, "mattina_rep": 0, "pomeriggio": 0, "weekend_rep": 0}}], f)
+        json_manager = JsonManager()
+        self.assertEqual(json_manager.load_employees_file(days_off_years=[2025])[0]["days_off"], ["2025-01-02"])
+        json_manager.compact_journal()
+        self.assertEqual(sorted(os.listdir(json_manager.directory_days_off)), ["2015.json", "2024.json", "2025.json"])
+        with open(json_manager.file_path_employees) as f:
+            self.assertNotIn("days_off", json.load(f)[0])
+
+        # Avvio successivo: solo gli anni richiesti vengono letti, gli altri su richiesta
+        reloaded = JsonManager()
+        self.assertEqual(reloaded.load_employees_file(days_off_years=[2024, 2025])[0]["days_off"],
+                         ["2024-12-24", "2025-01-02"])
+        self.assertEqual(set(reloaded._load_journal_state()["days_off"]), {2024, 2025})
+        self.assertEqual(reloaded.load_days_off(2015), {1: ["2015-08-10"]})
+        self.assertEqual(reloaded.list_days_off_years(), [2015, 2024, 2025])
+
+        # Il salvataggio confronta solo gli anni caricati: il 2015 non viene rimosso
+        rossi = StubRosterEmployee(1, "Rossi")
+        rossi.days_off = [datetime.date(2025, 1, 2), datetime.date(2025, 3, 3)]
+        reloaded.save_employees_file([rossi], days_off_years=[2024, 2025])
+        self.assertEqual([entry["op"] for entry in self.read_journal(reloaded)], ["day_off_added", "day_off_removed"])
+        reloaded.compact_journal()
+        self.assertEqual(JsonManager().load_employees_file()[0]["days_off"], ["2015-08-10", "2025-01-02", "2025-03-03"])
+
+        # La lista impiegati carica all'avvio solo gli anni di year_range, gli altri su richiesta
+        current_year = datetime.date.today().year
+        reloaded.save_employees_file([rossi], days_off_years=[current_year])
+        rossi.days_off = [datetime.date(current_year, 2, 1)]
+        reloaded.save_employees_file([rossi], days_off_years=[current_year])
+        config = {"files": {"employees_database_file": "data/employees.json"}, "date": {"year_range": 0}}
+        employees_manager = library.EmployeesManager(config, file_loader=JsonManager())
+        employee = employees_manager.emp_list[0]
+        self.assertEqual(list(employee.days_off), [datetime.date(current_year, 2, 1)])
+        employees_manager.load_days_off_years([2015])
+        self.assertIn(datetime.date(2015, 8, 10), employee.days_off)
+        self.assertIn(2015, employees_manager.loaded_days_off_years())
+
+
+class TestSqliteStorage(unittest.TestCase):
+    def setUp(self):
+        self.previous_cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+
+        # Dati JSON esistenti, importati alla creazione del database
+        self.employees_json = [
+            {"id": 1, "surname": "Rossi", "name": "Mario", "serial_number": "001", "days_off": ["2025-01-02"],
+             "shift_count": {"mattina": 3, "mattina_rep": 1, "pomeriggio": 2, "weekend_rep": 1, "days_off": 1}},
+            {"id": 2, "surname": "Verdi", "name": "Luigi", "serial_number": "002", "days_off": [],
+             "shift_count": {"mattina": 2, "mattina_rep": 0, "pomeriggio": 3, "weekend_rep": 0, "days_off": 0}}
+        ]
+        json_manager = JsonManager()
+        with open(json_manager.file_path_employees, "w") as f:
+            json.dump(self.employees_json, f)
+        json_manager.save_shifts_file(month_schedule(2024, 12, [1, 2]))
+
+        self.sqlite_manager = create_storage_manager(
+            {"files": {"storage_backend": "sqlite", "sqlite_database_file": os.path.join("data", "test.db")}}
+        )
+
+    def tearDown(self):
+        self.sqlite_manager.close()
+        os.chdir(self.previous_cwd)
+        self.tmp_dir.cleanup()
+
+    def test_reads_wait_for_the_transaction_of_the_worker(self):
+        # La scrittura del mese si ferma a metà transazione (righe del mese già cancellate)
+        in_transaction = threading.Event()
+        release = threading.Event()
+        write_month = self.sqlite_manager._write_month
+
+        def paused_write_month(year, month, month_schedule_json):
+            write_month(year, month, month_schedule_json)
+            in_transaction.set()
+            release.wait(5)
+
+        self.sqlite_manager._write_month = paused_write_month
+        worker = PersistenceWorker()
+        worker.submit("shifts", self.sqlite_manager.save_shifts_file, month_schedule(2024, 12, [2, 1]))
+        self.assertTrue(in_transaction.wait(5))
+
+        # Lettura dal thread principale (come il caricamento delle ferie dalla GUI) durante la transazione
+        results = []
+        reader = threading.Thread(target=lambda: results.append(
+            (self.sqlite_manager.load_month_shifts(2024, 12), self.sqlite_manager.load_days_off(2025))))
+        reader.start()
+        reader.join(0.2)
+        self.assertTrue(reader.is_alive())  # In attesa del lock della connessione
+
+        release.set()
+        reader.join(5)
+        worker.close(timeout=5)
+        self.assertIsNone(worker.last_error)
+        # La lettura vede la transazione completata, non le modifiche parziali
+        december, days_off = results[0]
+        self.assertEqual(len(december), 31)
+        self.assertEqual(december["2024-12-01"]["mattina"], [2])
+        self.assertEqual(days_off, {1: ["2025-01-02"]})
+
+    def test_does_not_open_json_storage(self):
+        self.assertNotIsInstance(self.sqlite_manager, JsonManager)
+        self.assertFalse(hasattr(self.sqlite_manager, "journal"))
+
+    def test_employees_upsert_touches_only_changed_rows(self):
+        employees = [library.Employee(emp["id"], emp["surname"], emp["name"], emp["serial_number"])
+                     for emp in self.employees_json]
+        for employee, emp in zip(employees, self.employees_json):
+            employee.shift_count = dict(emp["shift_count"])
+        connection = self.sqlite_manager.connection
+
+        # Senza anni di ferie da sostituire: cambiano solo le righe di employees
+        changes = connection.total_changes
+        self.sqlite_manager.save_employees_file(employees, days_off_years=[])
+        self.assertEqual(connection.total_changes - changes, 0)
+
+        employees[0].shift_count["mattina"] += 1
+        changes = connection.total_changes
+        self.sqlite_manager.save_employees_file(employees, days_off_years=[])
+        self.assertEqual(connection.total_changes - changes, 1)
+
+        # Impiegato rimosso: spariscono la sua riga e le sue ferie
+        self.sqlite_manager.save_employees_file(employees[1:], days_off_years=[])
+        self.assertEqual([emp["id"] for emp in self.sqlite_manager.load_employees_file()], [2])
+        self.assertEqual(self.sqlite_manager.load_days_off(2025), {})
+
+    def test_import_and_round_trip(self):
+        self.assertIsInstance(self.sqlite_manager, SqliteManager)
+        self.assertEqual(self.sqlite_manager.connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(self.sqlite_manager.load_employees_file(), self.employees_json)
+        self.assertEqual(self.sqlite_manager.load_shifts_file(), JsonManager().load_shifts_file())
+
+        self.sqlite_manager.save_shifts_file(month_schedule(2025, 2, [2, 1]))
+        self.assertTrue(self.sqlite_manager.has_month_shifts(2025, 2))
+        self.assertFalse(self.sqlite_manager.has_month_shifts(2025, 3))
+        self.assertEqual(self.sqlite_manager.load_shifts_manifest()["months"], {"2024": [12], "2025": [2]})
+        february = self.sqlite_manager.load_month_shifts(2025, 2)
+        self.assertEqual(february["2025-02-10"], {"mattina": [2], "mattina_rep": [2], "pomeriggio": [1],
+                                                  "weekend_rep": []})
+
+    def test_queries_and_locks(self):
+        self.assertEqual(self.sqlite_manager.load_employee_shifts(2, 2024, "pomeriggio"),
+                         [f"2024-12-{day:02d}" for day in range(1, 32)])
+        self.assertEqual(self.sqlite_manager.load_employee_shifts(2, 2025), [])
+
+        locks = {("2025-03-04", 1): "mattina", ("2025-03-05", 2): "off_duty", ("2025-04-01", 1): "pomeriggio"}
+        self.sqlite_manager.save_locked_shifts(2025, 3, locks)
+        self.assertEqual(self.sqlite_manager.load_locked_shifts(2025, 3),
+                         {("2025-03-04", 1): "mattina", ("2025-03-05", 2): "off_duty"})
+        self.assertEqual(self.sqlite_manager.load_locked_shifts(2025, 4), {})
+
+
+
+class TestPersistenceWorker(unittest.TestCase):
+    def test_coalescing_callbacks_and_errors(self):
+        worker = PersistenceWorker()
+        release = threading.Event()
+        saved = []
+        completed = []
+
+        # Il primo lavoro blocca il thread: i successivi con la stessa chiave restano in coda e vengono accorpati
+        worker.submit("block", release.wait)
+        for version in range(5):
+            worker.submit("employees", saved.append, version, callback=completed.append)
+        worker.submit("shifts", saved.append, "shifts")
+        self.assertEqual(worker.pending_count(), 3)
+        self.assertEqual(worker.coalesced, 4)
+
+        release.set()
+        self.assertTrue(worker.flush(timeout=5))
+        self.assertEqual(saved, [4, "shifts"])  # Solo l'ultima versione, nell'ordine di invio
+        # Le callback vengono eseguite solo da dispatch_completed (nel thread dell'interfaccia)
+        self.assertEqual(completed, [])
+        self.assertEqual(worker.dispatch_completed(), 5)
+        self.assertEqual(completed, [None] * 5)
+
+        worker.submit("employees", lambda: 1 / 0, callback=completed.append)
+        worker.flush(timeout=5)
+        worker.dispatch_completed()
+        self.assertIsInstance(completed[-1], ZeroDivisionError)
+        self.assertIsInstance(worker.last_error, ZeroDivisionError)
+        worker.close(timeout=5)
+
+    def test_when_idle_runs_after_queued_saves(self):
+        worker = PersistenceWorker()
+        release = threading.Event()
+        events = []
+
+        worker.submit("block", release.wait)
+        worker.submit("employees", events.append, "saved", callback=lambda error: events.append("callback"))
+        worker.when_idle(lambda: events.append("idle"))
+        self.assertEqual(events, [])  # Non blocca il chiamante
+
+        release.set()
+        self.assertTrue(worker.flush(timeout=5))
+        worker.dispatch_completed()
+        self.assertEqual(events, ["saved", "callback", "idle"])
+
+        # Coda vuota: eseguita al successivo dispatch_completed
+        worker.when_idle(lambda: events.append("idle again"))
+        self.assertEqual(worker.dispatch_completed(), 1)
+        self.assertEqual(events[-1], "idle again")
+        worker.close(timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 import sys
 import os
 import datetime
+import math
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -120,5 +121,147 @@ class TestManualShifts(unittest.TestCase):
         verdi = next(e for e in self.emp_manager.emp_list if e.id == 3)
         self.assertGreaterEqual(verdi.shift_count["pomeriggio"], 1, "Verdi afternoon count should be at least 1")
 
+    def test_shift_locks_index(self):
+        locks = library.ShiftLocks({
+            ("2025-01-01", 1): "mattina",
+            ("2025-01-01", 3): "pomeriggio",
+            ("2025-01-02", 1): "off_duty"
+        })
+
+        # Indici per data e per employee
+        self.assertEqual(locks.for_date("2025-01-01"), {1: "mattina", 3: "pomeriggio"})
+        self.assertEqual(locks.for_employee(1), {"2025-01-01": "mattina", "2025-01-02": "off_duty"})
+
+        # La rimozione aggiorna entrambi gli indici
+        del locks[("2025-01-01", 3)]
+        self.assertEqual(locks.for_date("2025-01-01"), {1: "mattina"})
+        self.assertEqual(locks.for_employee(3), {})
+        self.assertEqual(len(locks), 2)
+
+        # Il generatore accetta direttamente un ShiftLocks
+        success = self.shift_manager.shift_assignator(2025, 1, self.config, locked_shifts=locks)
+        self.assertTrue(success)
+        mattina_ids = [e.id for e in self.shift_manager.shift_schedule[datetime.date(2025, 1, 1)]["mattina"]]
+        self.assertIn(1, mattina_ids)
+
+    def test_fairness_queue(self):
+        employees = self.emp_manager.emp_list
+        for i, emp in enumerate(employees):
+            emp.shift_count["mattina"] = i  # Rossi 0, Bianchi 1, Verdi 2, ...
+
+        queues = library.FairnessQueues(employees)
+
+        # Ritorna i meno carichi tra i disponibili (Rossi escluso)
+        selected = queues.least_loaded("mattina", 2, lambda emp: emp.id != 1)
+        self.assertEqual(sorted(e.id for e in selected), [2, 3])
+
+        # Gli incrementi riposizionano l'impiegato nella coda
+        rossi = employees[0]
+        for _ in range(10):
+            queues.increment(rossi, "mattina")
+        self.assertEqual(rossi.shift_count["mattina"], 10)
+        selected = queues.least_loaded("mattina", 4, lambda emp: True)
+        self.assertNotIn(1, [e.id for e in selected])
+
+        # Gli esclusi non vengono scelti fino a restore(), che li reinserisce con il contatore aggiornato
+        bianchi = employees[1]
+        queues.exclude(bianchi, ("mattina",))
+        queues.increment(bianchi, "mattina")
+        self.assertNotIn(2, [e.id for e in queues.least_loaded("mattina", len(employees))])
+        queues.restore()
+        self.assertEqual(bianchi.shift_count["mattina"], 2)
+        self.assertIn(2, [e.id for e in queues.least_loaded("mattina", len(employees))])
+
+        # La scelta tra candidati dati ritorna i meno carichi tra loro
+        selected = library.FairnessQueues.least_loaded_among("mattina", [rossi, bianchi], 1)
+        self.assertEqual([e.id for e in selected], [2])
+
+    def test_days_off_calendar(self):
+        rossi = self.emp_manager.emp_list[0]
+        rossi.days_off = [datetime.date(2025, 3, 1), datetime.date(2024, 12, 31)]
+        rossi.days_off.append(datetime.date(2025, 1, 1))
+
+        self.assertIsInstance(rossi.days_off, library.DaysOff)
+        self.assertIn(datetime.date(2024, 12, 31), rossi.days_off)
+        self.assertNotIn(datetime.date(2025, 1, 2), rossi.days_off)
+        self.assertEqual(len(rossi.days_off), 3)
+
+        # Iterazione ordinata: stesso formato di days_off in employees.json
+        self.assertEqual([d.isoformat() for d in rossi.days_off], ["2024-12-31", "2025-01-01", "2025-03-01"])
+        self.assertEqual(list(rossi.days_off.between(datetime.date(2025, 1, 1), datetime.date(2025, 1, 31))),
+                         [datetime.date(2025, 1, 1)])
+
+        rossi.days_off.remove(datetime.date(2025, 1, 1))
+        with self.assertRaises(ValueError):
+            rossi.days_off.remove(datetime.date(2025, 1, 1))
+
+    def _assert_day_consistent(self, day_schedule, available_ids):
+        mattina_ids = [e.id for e in day_schedule["mattina"]]
+        pomeriggio_ids = [e.id for e in day_schedule["pomeriggio"]]
+        self.assertEqual(sorted(mattina_ids + pomeriggio_ids), sorted(available_ids))
+        self.assertEqual(len(mattina_ids), math.ceil(len(available_ids) / 2))
+        self.assertEqual(len(day_schedule["mattina_rep"]), 1)
+        self.assertIn(day_schedule["mattina_rep"][0].id, mattina_ids)
+
+    def test_incremental_repair(self):
+        self.shift_manager.shift_assignator(2025, 1, self.config)
+        schedule = self.shift_manager.shift_schedule
+        day = datetime.date(2025, 1, 2)  # Giovedì
+        other_days = {d: {t: [e.id for e in emps] for t, emps in shifts.items()}
+                      for d, shifts in schedule.items() if d != day}
+        employees = {e.id: e for e in self.emp_manager.emp_list}
+
+        # Lock: un impiegato di mattina viene spostato al pomeriggio
+        moved = schedule[day]["mattina"][0]
+        locks = library.ShiftLocks({(day.isoformat(), moved.id): "pomeriggio"})
+        changed = self.shift_manager.repair_schedule(schedule, day, self.config, locked_shifts=locks)
+        self.assertIn(moved.id, changed)
+        self.assertIn(moved, schedule[day]["pomeriggio"])
+        self._assert_day_consistent(schedule[day], list(employees))
+
+        # Ferie: l'impiegato esce dal giorno e i posti vengono ribilanciati
+        locks[(day.isoformat(), moved.id)] = "off_duty"
+        moved.days_off.append(day)
+        self.shift_manager.repair_schedule(schedule, day, self.config, locked_shifts=locks)
+        self._assert_day_consistent(schedule[day], [emp_id for emp_id in employees if emp_id != moved.id])
+
+        # Il resto del mese non cambia e i contatori corrispondono alla schedule
+        self.assertEqual(other_days, {d: {t: [e.id for e in emps] for t, emps in shifts.items()}
+                                      for d, shifts in schedule.items() if d != day})
+        for emp in employees.values():
+            for shift_type in ("mattina", "mattina_rep", "pomeriggio", "weekend_rep"):
+                n_assigned = sum(emp in shifts[shift_type] for shifts in schedule.values())
+                self.assertEqual(emp.shift_count[shift_type], n_assigned)
+
+    def test_draft_session(self):
+        rossi = self.emp_manager.emp_list[0]
+        rossi.days_off = [datetime.date(2024, 12, 31)]
+        session = library.DraftSession(self.emp_manager.emp_list)
+
+        # La generazione sulla bozza non tocca gli impiegati originali
+        self.shift_manager.shift_assignator(2025, 1, self.config, employees_list=session.employees)
+        draft_rossi = session.employees[0]
+        draft_rossi.days_off.append(datetime.date(2025, 2, 3))
+        self.assertEqual(rossi.shift_count["mattina"], 0)
+        self.assertNotIn(datetime.date(2025, 2, 3), rossi.days_off)
+        self.assertEqual(draft_rossi.surname, rossi.surname)
+
+        # Discard: le bozze tornano allo stato degli originali
+        session.discard()
+        self.assertEqual(session.changed_employees, [])
+        self.assertEqual(draft_rossi.shift_count, rossi.shift_count)
+        self.assertNotIn(datetime.date(2025, 2, 3), draft_rossi.days_off)
+
+        # Commit: vengono riportati solo gli impiegati modificati
+        draft_rossi.shift_count["mattina"] += 2
+        draft_rossi.days_off.append(datetime.date(2025, 2, 3))
+        self.assertEqual(session.commit(), 1)
+        self.assertEqual(rossi.shift_count["mattina"], 2)
+        self.assertEqual(list(rossi.days_off), [datetime.date(2024, 12, 31), datetime.date(2025, 2, 3)])
+
+        # Dopo il commit bozza e originale non condividono più lo stato modificabile
+        draft_rossi.days_off.append(datetime.date(2025, 2, 4))
+        self.assertNotIn(datetime.date(2025, 2, 4), rossi.days_off)
+
 if __name__ == '__main__':
     unittest.main()